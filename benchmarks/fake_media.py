@@ -0,0 +1,231 @@
+# fake_media.py
+# Local HTTP server with synthetic media for the offline benchmarks.
+# Nothing is stored: every byte comes from one repeating pattern block, so a
+# "1 GB video" costs no disk and no RAM.
+#
+#   /watch/<kind>/<spec>/<id>               page the stub extractor understands
+#   /api/<kind>/<spec>/<id>.json            extraction metadata (optional artificial latency)
+#   /progressive/<spec>/<id>.mp4            single file, HTTP Range supported
+#   /dash/<spec>/<id>/manifest.mpd          SegmentTemplate MPD + init.mp4 + seg-<n>.m4s
+#   /hls/<spec>/<id>/master.m3u8            master -> media.m3u8 -> seg-<n>.ts
+#
+# <spec> is "s<bytes>n<segments>r<bytes/s>": total size, fragment count
+# (DASH/HLS) and a per-connection rate limit (0 = as fast as possible).
+import re
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+KINDS = ('progressive', 'dash', 'hls')
+PATTERN = bytes(range(256)) * 4096  # 1 MiB
+CHUNK = 64 * 1024
+INIT_SIZE = 1024
+SEGMENT_SECONDS = 4
+
+SPEC_RE = re.compile(r'^s(?P<size>\d+)n(?P<segments>\d+)r(?P<rate>\d+)$')
+ROUTE_RE = re.compile(r'^/(?P<route>watch|api|progressive|dash|hls)/(?:(?P<kind>progressive|dash|hls)/)?'
+                      r'(?P<spec>s\d+n\d+r\d+)/(?P<id>[\w-]+)(?:\.json|\.mp4)?(?:/(?P<file>[\w.-]+))?$')
+SEGMENT_RE = re.compile(r'^seg-(\d+)\.(?:m4s|ts)$')
+
+def make_spec(size, segments=16, rate=0):
+    return f"s{int(size)}n{max(1, int(segments))}r{int(rate)}"
+
+def parse_spec(spec):
+    m = SPEC_RE.match(spec)
+    return int(m.group('size')), int(m.group('segments')), int(m.group('rate'))
+
+def segment_sizes(size, segments):
+    """Splits `size` media bytes into `segments` fragments (the remainder goes to the last one)."""
+    base = size // segments
+    return [base] * (segments - 1) + [size - base * (segments - 1)]
+
+def media_bytes(kind, size, segments):
+    """Bytes a complete download of this item writes (DASH adds its init segment)."""
+    return size + (INIT_SIZE if kind == 'dash' else 0)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so yt-dlp's connection pool is exercised
+
+    def log_message(self, *args): pass
+
+    def do_HEAD(self): self._dispatch(head=True)
+    def do_GET(self): self._dispatch(head=False)
+
+    def _dispatch(self, head):
+        server = self.server
+        m = ROUTE_RE.match(self.path.split('?', 1)[0])
+        if not m: return self._send_error(404)
+        route, kind, spec, vid, fname = m.group('route', 'kind', 'spec', 'id', 'file')
+        size, segments, rate = parse_spec(spec)
+        server.count(route if route in ('watch', 'api') else ('manifest' if fname and fname.endswith(('.mpd', '.m3u8')) else 'media'))
+        try:
+            if route == 'watch':
+                self._send_bytes(f'<html><title>{vid}</title></html>'.encode(), 'text/html', head)
+            elif route == 'api':
+                if server.api_latency: time.sleep(server.api_latency)
+                self._send_bytes(json.dumps(server.metadata(kind, spec, vid)).encode(), 'application/json', head)
+            elif route == 'progressive':
+                self._send_range(size, rate, head)
+            elif route == 'dash':
+                if fname == 'manifest.mpd': self._send_bytes(self._mpd(size, segments).encode(), 'application/dash+xml', head)
+                elif fname == 'init.mp4': self._send_payload(INIT_SIZE, rate, head, 'video/mp4')
+                else: self._send_segment(fname, size, segments, rate, head, 'video/iso.segment')
+            elif route == 'hls':
+                if fname == 'master.m3u8': self._send_bytes(self._master(size, segments).encode(), 'application/vnd.apple.mpegurl', head)
+                elif fname == 'media.m3u8': self._send_bytes(self._media_playlist(segments).encode(), 'application/vnd.apple.mpegurl', head)
+                else: self._send_segment(fname, size, segments, rate, head, 'video/mp2t')
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            self.close_connection = True  # client aborted (cancel / pause benchmarks)
+
+    # --- Manifests ---
+    @staticmethod
+    def _bandwidth(size, segments):
+        return max(1, size * 8 // (segments * SEGMENT_SECONDS))
+
+    def _mpd(self, size, segments):
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" minBufferTime="PT2S" '
+            f'mediaPresentationDuration="PT{segments * SEGMENT_SECONDS}S" profiles="urn:mpeg:dash:profile:isoff-live:2011">\n'
+            ' <Period id="0">\n'
+            '  <AdaptationSet mimeType="video/mp4" contentType="video" segmentAlignment="true">\n'
+            f'   <Representation id="720p" bandwidth="{self._bandwidth(size, segments)}" '
+            'codecs="avc1.64001f,mp4a.40.2" width="1280" height="720" frameRate="30">\n'
+            f'    <SegmentTemplate timescale="1" duration="{SEGMENT_SECONDS}" startNumber="1" '
+            'initialization="init.mp4" media="seg-$Number$.m4s"/>\n'
+            '   </Representation>\n'
+            '  </AdaptationSet>\n'
+            ' </Period>\n'
+            '</MPD>\n')
+
+    def _master(self, size, segments):
+        return ('#EXTM3U\n'
+                f'#EXT-X-STREAM-INF:BANDWIDTH={self._bandwidth(size, segments)},RESOLUTION=1280x720,'
+                'CODECS="avc1.64001f,mp4a.40.2"\n'
+                'media.m3u8\n')
+
+    @staticmethod
+    def _media_playlist(segments):
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{SEGMENT_SECONDS}',
+                 '#EXT-X-MEDIA-SEQUENCE:0', '#EXT-X-PLAYLIST-TYPE:VOD']
+        for n in range(1, segments + 1): lines += [f'#EXTINF:{SEGMENT_SECONDS}.0,', f'seg-{n}.ts']
+        return '\n'.join(lines + ['#EXT-X-ENDLIST', ''])
+
+    # --- Responses ---
+    def _send_error(self, code):
+        self.send_response(code)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _send_bytes(self, body, ctype, head):
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head: self.wfile.write(body)
+
+    def _send_segment(self, fname, size, segments, rate, head, ctype):
+        m = SEGMENT_RE.match(fname or '')
+        if not m or not 1 <= int(m.group(1)) <= segments: return self._send_error(404)
+        self._send_payload(segment_sizes(size, segments)[int(m.group(1)) - 1], rate, head, ctype)
+
+    def _send_range(self, size, rate, head):
+        start, end = 0, size - 1
+        rng = re.match(r'bytes=(\d*)-(\d*)', self.headers.get('Range') or '')
+        if rng and (rng.group(1) or rng.group(2)):
+            if rng.group(1):
+                start = int(rng.group(1))
+                if rng.group(2): end = min(end, int(rng.group(2)))
+            else:
+                start = max(0, size - int(rng.group(2)))
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if not head: self._stream(start, end - start + 1, rate)
+
+    def _send_payload(self, length, rate, head, ctype):
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+        if not head: self._stream(0, length, rate)
+
+    def _stream(self, offset, length, rate):
+        """Writes `length` pattern bytes starting at `offset`, paced to `rate` bytes/s when set."""
+        view = memoryview(PATTERN)
+        began = time.monotonic()
+        sent = 0
+        while sent < length:
+            pos = (offset + sent) % len(PATTERN)
+            n = min(CHUNK, length - sent, len(PATTERN) - pos)
+            self.wfile.write(view[pos:pos + n])
+            sent += n
+            self.server.add_bytes(n)
+            if rate:
+                ahead = sent / rate - (time.monotonic() - began)
+                if ahead > 0: time.sleep(ahead)
+
+class FakeMediaServer(ThreadingHTTPServer):
+    """
+    Serves the routes above on 127.0.0.1 from a background thread.
+    requests[route] counts hits per route ('api' = extractions that reached
+    the "site", i.e. metadata cache misses); bytes_sent counts media bytes.
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, api_latency=0.0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.api_latency = api_latency
+        self.requests = {}
+        self.bytes_sent = 0
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True, name="fake-media-server")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def count(self, route):
+        with self._stats_lock: self.requests[route] = self.requests.get(route, 0) + 1
+
+    def add_bytes(self, n):
+        with self._stats_lock: self.bytes_sent += n
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.requests = {}
+            self.bytes_sent = 0
+
+    def watch_url(self, kind, video_id, size, segments=16, rate=0):
+        return f"{self.base_url}/watch/{kind}/{make_spec(size, segments, rate)}/{video_id}"
+
+    def metadata(self, kind, spec, video_id):
+        size, segments, _ = parse_spec(spec)
+        base = f"{self.base_url}/{kind}/{spec}/{video_id}"
+        meta = {'id': video_id, 'title': f"Bench {kind} {video_id}", 'duration': segments * SEGMENT_SECONDS,
+                'filesize': media_bytes(kind, size, segments)}
+        if kind == 'progressive': meta['url'] = base + '.mp4'
+        elif kind == 'dash': meta['manifest_url'] = base + '/manifest.mpd'
+        else: meta['manifest_url'] = base + '/master.m3u8'
+        return meta
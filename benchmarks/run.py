@@ -0,0 +1,458 @@
+# run.py
+# Offline benchmark suite. Drives DownloadManager end to end against a local
+# fake media server (progressive / DASH / HLS) and a stub extractor, so runs
+# need no internet access and are comparable between versions.
+#
+#   python benchmarks/run.py                         # every suite, saved to benchmarks/results/
+#   python benchmarks/run.py throughput cache --quick
+#   python benchmarks/run.py --compare latest        # exit 1 if something regressed
+#
+# Persistent state (journal, archive, caches, tuning) lives in a temp folder,
+# never in the app data dir. FFmpeg is not needed: the stub formats are
+# single muxed streams and fixups are off, so post-processing is a no-op.
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import utils
+from logic import DownloadManager, DownloadJob
+from cache import MetadataCache
+from journal import JobJournal
+from archive import DownloadArchive
+from tuning import ThroughputTuner
+from metrics import MetricsSink
+from dir_index import DirectoryIndex
+from progress import ProgressBus
+from fake_media import FakeMediaServer, KINDS, media_bytes
+from stub_extractor import BenchPool
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+QUALITY = "720p Limit"
+MiB = 1024 ** 2
+# Metric name suffix -> which way is better (anything else is informational)
+HIGHER_IS_BETTER = ('_mbps', '_per_s', '_hit_rate')
+LOWER_IS_BETTER = ('_ms', '_us', '_seconds', '_pct')
+
+# --- Harness ---
+class RecordingSink(MetricsSink):
+    """MetricsSink that keeps the per-run records in memory instead of writing files."""
+    def __init__(self):
+        super().__init__(jsonl_path="", prom_path="")
+        self.records = []
+
+    def emit(self, job):
+        record = super().emit(job)
+        self.records.append(record)
+        return record
+
+class Bench:
+    """A DownloadManager wired to the fake server, with all of its state in a temp folder."""
+    def __init__(self, server, workers=3, cache_items=None):
+        self.server = server
+        self.tmp = tempfile.mkdtemp(prefix='ytdl-bench-')
+        self.out = os.path.join(self.tmp, 'out')
+        self.state = os.path.join(self.tmp, 'state')
+        os.makedirs(self.out)
+        self.pool = BenchPool()
+        self.sink = RecordingSink()
+        self.journal = JobJournal(db_path=os.path.join(self.state, 'jobs.sqlite3'))
+        self.manager = DownloadManager(
+            max_workers=workers, ydl_pool=self.pool, journal=self.journal, metrics=self.sink,
+            metadata_cache=MetadataCache(cache_dir=os.path.join(self.state, 'metadata'), memory_items=cache_items),
+            archive=DownloadArchive(os.path.join(self.state, 'archive.txt')),
+            tuner=ThroughputTuner(os.path.join(self.state, 'tuning.json')))
+        self.bus = ProgressBus()
+        self.errors = []
+
+    def advanced_opts(self, *extra_args):
+        return utils.build_advanced_opts(QUALITY, embed_meta=False, use_archive=False,
+                                         custom_args=[{'quiet': True, 'noprogress': True, 'fixup': 'never'}, *extra_args])
+
+    def submit(self, url, opts, on_finish=None):
+        return self.manager.start_download(
+            url, self.out, QUALITY, "", opts, self.bus.sink(url), lambda msg, color: None,
+            on_finish or (lambda success: None), self.errors.append)
+
+    def run(self, urls, *extra_args):
+        """Downloads every URL and blocks until all of them are post-processed. Returns wall seconds."""
+        opts = self.advanced_opts(*extra_args)
+        start = time.perf_counter()
+        for url in urls: self.submit(url, dict(opts))
+        self.manager.wait()
+        elapsed = time.perf_counter() - start
+        if self.errors: raise RuntimeError(f"{len(self.errors)} job(s) failed: {self.errors[0]}")
+        return elapsed
+
+    def warm(self):
+        """Builds the pooled YoutubeDL instances up front so suites don't time yt-dlp's import."""
+        self.pool.warm(self.pool.size)
+
+    def out_bytes(self):
+        return sum(e.stat().st_size for e in os.scandir(self.out) if e.is_file())
+
+    def close(self):
+        self.journal.close()
+        self.pool.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+def mean(values): return statistics.fmean(values) if values else 0.0
+
+def percentile(values, pct):
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def phase_ms(records, name):
+    return mean([r['phases'].get(name, 0.0) for r in records]) * 1000
+
+# --- Suites ---
+def bench_throughput(server, args):
+    """Aggregate speed of `jobs` parallel downloads per delivery type, plus TTFB."""
+    size = args.size * MiB
+    results = {}
+    for kind in KINDS:
+        bench = Bench(server, workers=args.jobs)
+        try:
+            bench.warm()
+            urls = [server.watch_url(kind, f"tp-{kind}-{i}", size, args.segments) for i in range(args.jobs)]
+            wall = bench.run(urls)
+            expected = media_bytes(kind, size, args.segments) * len(urls)
+            written = bench.out_bytes()
+            if written != expected: raise RuntimeError(f"{kind}: wrote {written} bytes, expected {expected}")
+            records = bench.sink.records
+            results.update({
+                f'{kind}_mbps': written / wall / MiB,
+                f'{kind}_wall_seconds': wall,
+                f'{kind}_ttfb_ms': mean([r['ttfb_seconds'] or 0.0 for r in records]) * 1000,
+                f'{kind}_job_mbps': mean([r['avg_bps'] or 0 for r in records]) / MiB,
+            })
+        finally:
+            bench.close()
+    return results
+
+def bench_overhead(server, args):
+    """Fixed cost per job: many tiny downloads one after another, split by phase."""
+    bench = Bench(server, workers=1)
+    try:
+        bench.warm()
+        urls = [server.watch_url('progressive', f"oh-{i}", 64 * 1024, 1) for i in range(args.overhead_jobs)]
+        wall = bench.run(urls)
+        records = bench.sink.records
+        busy = [sum(s for p, s in r['phases'].items() if p not in ('queue_wait', 'transfer')) for r in records]
+        return {
+            'jobs': len(urls),
+            'per_job_ms': wall / len(urls) * 1000,
+            'jobs_per_s': len(urls) / wall,
+            'non_transfer_ms': mean(busy) * 1000,
+            **{f'{p}_ms': phase_ms(records, p) for p in ('metadata', 'extract', 'transfer', 'postprocess_wait', 'postprocess')},
+        }
+    finally:
+        bench.close()
+
+def bench_hooks(server, args):
+    """Cost of DownloadManager's progress hook per call (journal, bandwidth, metrics, UI bus)."""
+    results = {}
+    size = args.size * MiB
+    for kind, extra in (('progressive', {'buffersize': 16 * 1024, 'noresizebuffer': True}), ('dash', {})):
+        bench = Bench(server, workers=1)
+        try:
+            bench.warm()
+            bench.run([server.watch_url(kind, f"hook-{kind}", size, max(args.segments, 64))], extra)
+            times = bench.pool.hook_times
+            transfer = sum(r['phases'].get('transfer', 0.0) for r in bench.sink.records)
+            results.update({
+                f'{kind}_calls': len(times),
+                f'{kind}_mean_us': mean(times) * 1e6,
+                f'{kind}_p50_us': percentile(times, 50) * 1e6,
+                f'{kind}_p99_us': percentile(times, 99) * 1e6,
+                f'{kind}_share_of_transfer_pct': sum(times) / transfer * 100 if transfer else 0.0,
+            })
+        finally:
+            bench.close()
+    return results
+
+def bench_filenames(server, args):
+    """_get_unique_filename in folders with many files: first (scanning) call, warm calls, a long "(n)" chain."""
+    results = {}
+    bench = Bench(server, workers=1)
+    try:
+        manager = bench.manager
+        for count in args.dir_sizes:
+            folder = os.path.join(bench.tmp, f'dir-{count}')
+            os.makedirs(folder)
+            chain = min(count // 10, 500)
+            open(os.path.join(folder, 'Video.mp4'), 'w').close()
+            for i in range(1, chain + 1): open(os.path.join(folder, f'Video ({i}).mp4'), 'w').close()
+            for i in range(count - chain - 1):
+                open(os.path.join(folder, f'Other clip {i:06d}.{"mp4" if i % 4 else "webp"}'), 'w').close()
+
+            manager.dir_index = DirectoryIndex()
+            start = time.perf_counter()
+            manager._get_unique_filename(folder, 'Fresh title', 'mp4')
+            cold = time.perf_counter() - start
+
+            fresh = []
+            for i in range(200):
+                start = time.perf_counter()
+                manager._get_unique_filename(folder, f'Fresh title {i}', 'mp4')
+                fresh.append(time.perf_counter() - start)
+
+            collided = []
+            for _ in range(10):
+                start = time.perf_counter()
+                name = manager._get_unique_filename(folder, 'Video', 'mp4')
+                collided.append(time.perf_counter() - start)
+            if name != f'Video ({chain + 1})': raise RuntimeError(f"unexpected unique name {name!r}")
+
+            results.update({
+                f'{count}_cold_ms': cold * 1000,
+                f'{count}_warm_us': statistics.median(fresh) * 1e6,
+                f'{count}_chain{chain}_ms': statistics.median(collided) * 1000,
+            })
+            shutil.rmtree(folder, ignore_errors=True)
+    finally:
+        bench.close()
+    return results
+
+def bench_cleanup(server, args):
+    """
+    Manifest cleanup on its own (cancel deletes, pause renames), then the full
+    cancel path: cancel() on a live throttled download until finish_callback.
+    """
+    results = {}
+    bench = Bench(server, workers=1)
+    try:
+        manager = bench.manager
+        noop = lambda *a, **k: None
+        for action in ('cancel', 'pause'):
+            samples = []
+            for r in range(args.repeats):
+                job = DownloadJob('bench://cleanup', bench.out, QUALITY, "", {}, noop, noop, noop, noop)
+                base = os.path.join(bench.out, f'cleanup-{action}-{r}.mp4')
+                files = [base + '.part', base + '.part.ytdl', base[:-4] + '.webp']
+                files += [f'{base}.part-Frag{i}' for i in range(args.fragments)]
+                for f in files:
+                    with open(f, 'wb') as fh: fh.write(b'\0' * 512)
+                    job.track(f)
+                job.abort_action = action
+                start = time.perf_counter()
+                manager._handle_cleanup_and_exit(job)
+                samples.append(time.perf_counter() - start)
+            results[f'{action}_{args.fragments}frags_ms'] = statistics.median(samples) * 1000
+        for e in os.scandir(bench.out): os.remove(e.path)
+
+        for kind in ('progressive', 'dash'):
+            samples = []
+            for r in range(max(1, args.repeats // 5)):
+                done = threading.Event()
+                url = server.watch_url(kind, f"cancel-{kind}-{r}", 512 * MiB, 128, rate=4 * MiB)
+                job = bench.submit(url, bench.advanced_opts(), lambda success: done.set())
+                while job.state != 'running' or not job.manifest: time.sleep(0.01)
+                time.sleep(0.5)
+                start = time.perf_counter()
+                job.cancel()
+                if not done.wait(30): raise RuntimeError(f"{kind}: cancel did not finish within 30s")
+                samples.append(time.perf_counter() - start)
+                bench.manager.wait()
+            results[f'live_cancel_{kind}_ms'] = statistics.median(samples) * 1000
+            results[f'live_cancel_{kind}_leftover_files'] = len(os.listdir(bench.out))
+    finally:
+        bench.close()
+    return results
+
+def bench_cache(server, args):
+    """
+    Metadata cache under a skewed (Zipf) lookup mix bigger than the in-memory
+    LRU, then the same mix after a "restart" (empty memory, warm disk).
+    api_requests is what reached the fake site, i.e. real extractions.
+    """
+    rng = random.Random(args.seed)
+    urls = [server.watch_url('progressive', f"meta-{i}", MiB, 1) for i in range(args.distinct)]
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(urls))]
+    mix = rng.choices(urls, weights, k=args.lookups)
+    server.api_latency = args.api_latency
+    results = {}
+    cache_dir = None
+    try:
+        for label in ('cold', 'restart'):
+            bench = Bench(server, workers=1, cache_items=args.cache_items)
+            if cache_dir:
+                shutil.rmtree(bench.manager.metadata_cache.cache_dir, ignore_errors=True)
+                shutil.copytree(cache_dir, bench.manager.metadata_cache.cache_dir)
+            try:
+                bench.warm()
+                cache = bench.manager.metadata_cache
+                server.reset_stats()
+                hit_times, miss_times = [], []
+                for url in mix:
+                    before = server.requests.get('api', 0)
+                    start = time.perf_counter()
+                    if not bench.manager.fetch_video_info(url): raise RuntimeError(f"metadata fetch failed: {url}")
+                    elapsed = time.perf_counter() - start
+                    (miss_times if server.requests.get('api', 0) > before else hit_times).append(elapsed)
+                results.update({
+                    f'{label}_hit_rate': cache.hits / max(1, cache.hits + cache.misses),
+                    f'{label}_api_requests': server.requests.get('api', 0),
+                    f'{label}_hit_us': statistics.median(hit_times) * 1e6 if hit_times else 0.0,
+                    f'{label}_miss_ms': statistics.median(miss_times) * 1000 if miss_times else 0.0,
+                })
+                if cache_dir is None:
+                    cache_dir = os.path.join(tempfile.mkdtemp(prefix='ytdl-bench-cache-'), 'metadata')
+                    shutil.copytree(cache.cache_dir, cache_dir)
+            finally:
+                bench.close()
+    finally:
+        server.api_latency = 0.0
+        if cache_dir: shutil.rmtree(os.path.dirname(cache_dir), ignore_errors=True)
+    results['lookups'] = args.lookups
+    results['distinct'] = args.distinct
+    return results
+
+SUITES = {
+    'throughput': bench_throughput,
+    'overhead': bench_overhead,
+    'hooks': bench_hooks,
+    'filenames': bench_filenames,
+    'cleanup': bench_cleanup,
+    'cache': bench_cache,
+}
+
+# --- Results ---
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        rev = out.stdout.strip() or 'unknown'
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, timeout=10).stdout.strip()
+        return rev + ('-dirty' if dirty else '')
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+def environment():
+    import yt_dlp
+    return {
+        'revision': git_revision(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'yt_dlp': yt_dlp.version.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+def latest_result(directory, exclude=None):
+    files = sorted(f for f in os.listdir(directory) if f.endswith('.json')) if os.path.isdir(directory) else []
+    files = [os.path.join(directory, f) for f in files if os.path.join(directory, f) != exclude]
+    return files[-1] if files else None
+
+def direction(metric):
+    if metric.endswith(HIGHER_IS_BETTER): return 1
+    if metric.endswith(LOWER_IS_BETTER): return -1
+    return 0
+
+def compare(current, baseline, threshold):
+    """Prints every shared metric with its change. Returns the regressions beyond `threshold` (a fraction)."""
+    regressions = []
+    print(f"\nCompared with {baseline['env']['revision']} ({baseline['env']['time']}):")
+    for suite, metrics in current['results'].items():
+        old_suite = baseline['results'].get(suite) or {}
+        for name, value in metrics.items():
+            old = old_suite.get(name)
+            if not isinstance(old, (int, float)) or not old: continue
+            change = (value - old) / old
+            sign = direction(name)
+            worse = sign and change * sign < -threshold
+            if worse: regressions.append(f"{suite}.{name}")
+            print(f"  {suite + '.' + name:<48} {old:>12.3f} -> {value:>12.3f}  {change:+7.1%}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+def print_results(results):
+    for suite, metrics in results.items():
+        print(f"{suite}:")
+        for name, value in metrics.items():
+            print(f"  {name:<40} {value:>12.3f}" if isinstance(value, float) else f"  {name:<40} {value:>12}")
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="run.py", description="Offline DownloadManager benchmarks (no internet needed).")
+    p.add_argument("suites", nargs="*", metavar="SUITE",
+                   help=f"Suites to run (default: all): {', '.join(SUITES)}.")
+    p.add_argument("--quick", action="store_true", help="Smaller sizes and fewer repeats (smoke test).")
+    p.add_argument("--jobs", type=int, default=3, help="Parallel downloads in the throughput suite.")
+    p.add_argument("--size", type=int, default=64, help="MiB per download (throughput, hooks).")
+    p.add_argument("--segments", type=int, default=32, help="Fragments per DASH/HLS download.")
+    p.add_argument("--overhead-jobs", type=int, default=60, help="Tiny downloads in the overhead suite.")
+    p.add_argument("--dir-sizes", type=lambda s: [int(x) for x in s.split(',')], default=[1000, 10000, 50000],
+                   help="Comma-separated folder sizes for the filenames suite.")
+    p.add_argument("--fragments", type=int, default=200, help="Fragment files per job in the cleanup suite.")
+    p.add_argument("--repeats", type=int, default=20, help="Repeats of the cleanup measurements.")
+    p.add_argument("--lookups", type=int, default=1000, help="Metadata lookups in the cache suite.")
+    p.add_argument("--distinct", type=int, default=200, help="Distinct videos in the cache suite.")
+    p.add_argument("--cache-items", type=int, default=64, help="In-memory metadata LRU size for the cache suite.")
+    p.add_argument("--api-latency", type=float, default=0.05, help="Seconds the fake site takes per extraction.")
+    p.add_argument("--seed", type=int, default=1234)
+    p.add_argument("--output-dir", default=RESULTS_DIR, help="Where results are saved.")
+    p.add_argument("--no-save", action="store_true", help="Print only.")
+    p.add_argument("--compare", metavar="FILE", help="Earlier result to compare with ('latest' = newest in --output-dir).")
+    p.add_argument("--threshold", type=float, default=0.15, help="Relative change counted as a regression.")
+    return p
+
+QUICK = {'jobs': 2, 'size': 8, 'segments': 8, 'overhead_jobs': 15, 'dir_sizes': [1000, 10000],
+         'fragments': 50, 'repeats': 5, 'lookups': 200, 'distinct': 60, 'cache_items': 16, 'api_latency': 0.01}
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    unknown = [s for s in args.suites if s not in SUITES]
+    if unknown: parser.error(f"unknown suite(s): {', '.join(unknown)} (choose from {', '.join(SUITES)})")
+    if args.quick:
+        defaults = parser.parse_args([])
+        for key, value in QUICK.items():
+            if getattr(args, key) == getattr(defaults, key): setattr(args, key, value)
+    baseline_path = args.compare
+    if baseline_path == 'latest':
+        baseline_path = latest_result(args.output_dir)
+        if not baseline_path: print("No earlier result to compare with.", file=sys.stderr)
+
+    server = FakeMediaServer().start()
+    report = {'env': environment(), 'args': {k: v for k, v in vars(args).items() if k not in ('compare', 'output_dir', 'no_save')},
+              'results': {}}
+    try:
+        for name in args.suites or SUITES:
+            print(f"Running {name}...", flush=True)
+            start = time.perf_counter()
+            report['results'][name] = SUITES[name](server, args)
+            print(f"  ({time.perf_counter() - start:.1f}s)", flush=True)
+            gc.collect()
+    finally:
+        server.stop()
+
+    print()
+    print_results(report['results'])
+    if not args.no_save:
+        os.makedirs(args.output_dir, exist_ok=True)
+        path = os.path.join(args.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['env']['revision']}.json")
+        with open(path, 'w', encoding='utf-8') as fh: json.dump(report, fh, indent=2)
+        print(f"\nSaved {path}")
+
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as fh: baseline = json.load(fh)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# stub_extractor.py
+# yt-dlp side of the offline benchmarks: an extractor for the fake media
+# server's /watch/ pages and a YDLPool that puts it in front of yt-dlp's own
+# extractors (the generic one would otherwise claim every http URL first).
+import time
+import threading
+from yt_dlp.extractor.common import InfoExtractor
+from ydl_pool import YDLPool
+
+class BenchIE(InfoExtractor):
+    IE_NAME = 'bench'
+    _VALID_URL = (r'(?P<base>https?://(?:127\.0\.0\.1|localhost):\d+)/watch/'
+                  r'(?P<kind>progressive|dash|hls)/(?P<spec>s\d+n\d+r\d+)/(?P<id>[\w-]+)')
+
+    def _real_extract(self, url):
+        base, kind, spec, video_id = self._match_valid_url(url).group('base', 'kind', 'spec', 'id')
+        meta = self._download_json(f'{base}/api/{kind}/{spec}/{video_id}.json', video_id)
+        # Manifests go through yt-dlp's real MPD/M3U8 parsers, like a site extractor would
+        if kind == 'dash':
+            formats = self._extract_mpd_formats(meta['manifest_url'], video_id, mpd_id='dash')
+        elif kind == 'hls':
+            formats = self._extract_m3u8_formats(meta['manifest_url'], video_id, 'mp4', m3u8_id='hls')
+        else:
+            formats = [{
+                'format_id': 'http-720p', 'url': meta['url'], 'ext': 'mp4', 'width': 1280, 'height': 720,
+                'vcodec': 'avc1.64001f', 'acodec': 'mp4a.40.2', 'filesize': meta['filesize'],
+            }]
+        return {'id': video_id, 'title': meta['title'], 'duration': meta['duration'], 'formats': formats}
+
+class BenchPool(YDLPool):
+    """
+    YDLPool whose instances try BenchIE before anything else and time every
+    call of the progress hooks DownloadManager installs (hook_times, seconds).
+    """
+    def __init__(self, size=None, base_params=None):
+        super().__init__(size, base_params)
+        self.hook_times = []
+        self._hook_lock = threading.Lock()
+
+    def reset_hook_times(self):
+        with self._hook_lock: self.hook_times = []
+
+    def _build(self):
+        ydl, base = super()._build()
+        ie = BenchIE()
+        ydl._ies = {ie.ie_key(): ie, **ydl._ies}
+        ydl._ies_instances[ie.ie_key()] = ie
+        ie.set_downloader(ydl)
+        return ydl, base
+
+    def _apply(self, ydl, base, overlay):
+        super()._apply(ydl, base, overlay)
+        ydl._progress_hooks = [self._timed(hook) for hook in ydl._progress_hooks]
+
+    def _timed(self, hook):
+        def timed(d):
+            start = time.perf_counter()
+            try: return hook(d)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._hook_lock: self.hook_times.append(elapsed)
+        return timed
@@ -0,0 +1,63 @@
+import os
+import threading
+import config
+from utils import canonical_video_id
+
+class DownloadArchive:
+    """
+    Set of already-downloaded videos, stored in yt-dlp's --download-archive
+    format ("<extractor> <id>" per line), so the same file works with the
+    yt-dlp CLI. Loaded once into memory; membership checks are set lookups
+    and new entries are appended (never rewritten).
+    """
+    def __init__(self, path=None):
+        self.path = path or config.ARCHIVE_PATH
+        self._ids = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        ids = set()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                for line in fh:
+                    line = line.strip()
+                    if line: ids.add(line)
+        except FileNotFoundError:
+            pass
+        return ids
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            with self._lock:
+                if self._ids is None: self._ids = self._load()
+        return self._ids
+
+    def __len__(self): return len(self.ids)
+
+    def __contains__(self, archive_id):
+        return bool(archive_id) and archive_id in self.ids
+
+    def add(self, archive_id):
+        if not archive_id: return
+        ids = self.ids  # loads under the lock itself (not re-entrant)
+        with self._lock:
+            # Check and append together, or two jobs finishing the same video both write it
+            if archive_id in ids: return
+            ids.add(archive_id)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as fh:
+                fh.write(archive_id + '\n')
+
+    # --- ID helpers ---
+    @staticmethod
+    def id_for_url(url):
+        """Archive ID derived from the URL alone (no network); None if we can't tell."""
+        key = canonical_video_id(url)
+        if key and key.startswith("youtube:"): return "youtube " + key.split(":", 1)[1]
+        return None
+
+    @staticmethod
+    def id_for_info(info):
+        if not info or not info.get('id') or not info.get('extractor'): return None
+        return f"{info['extractor'].lower()} {info['id']}"
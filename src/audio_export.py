@@ -0,0 +1,67 @@
+# audio_export.py
+# Several audio outputs (codec + bitrate) from one download and one decode:
+# a single FFmpeg process reads the source once and fans out to every encoder.
+import os
+from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor, ACODECS
+from yt_dlp.utils import prepend_extension
+from utils import AUDIO_CODECS
+
+LOSSLESS = ('flac', 'wav')
+
+def output_paths(root, outputs):
+    """[(format, bitrate)] -> [(path, format, bitrate)]. Repeated formats get the bitrate in the name."""
+    counts = {}
+    for fmt, _ in outputs: counts[fmt] = counts.get(fmt, 0) + 1
+    paths = []
+    for fmt, bitrate in outputs:
+        codec = AUDIO_CODECS[fmt]
+        ext = ACODECS[codec][0]
+        suffix = f".{bitrate}k" if counts[fmt] > 1 and codec not in LOSSLESS else ""
+        paths.append((f"{root}{suffix}.{ext}", fmt, bitrate))
+    # Same lossless format twice would be the same file
+    seen = set()
+    return [p for p in paths if not (p[0] in seen or seen.add(p[0]))]
+
+class MultiAudioExportPP(FFmpegPostProcessor):
+    """
+    Replaces FFmpegExtractAudio when a job asks for more than one audio output.
+    `outputs` is a list of (format, bitrate) pairs, format being a key of
+    utils.AUDIO_CODECS ("MP3", "FLAC", ...). The downloaded source is deleted
+    afterwards; info['filepath'] points at the first output and
+    info['audio_exports'] lists all of them. When an output has the source's
+    own name (an .m4a download exported to M4A), the source is moved to
+    "<name>.orig.<ext>" first, like FFmpegExtractAudio does: FFmpeg can't
+    write a file in place.
+    """
+    def __init__(self, downloader, outputs):
+        super().__init__(downloader)
+        self.outputs = [(fmt, str(bitrate or "192")) for fmt, bitrate in outputs]
+
+    def run(self, info):
+        src = info['filepath']
+        targets = output_paths(os.path.splitext(src)[0], self.outputs)
+        opts = []
+        for path, fmt, bitrate in targets:
+            _, encoder, extra = ACODECS[AUDIO_CODECS[fmt]]
+            args = ['-map', '0:a:0', '-vn', '-map_metadata', '0', *(['-c:a', encoder] if encoder else []), *extra]
+            if AUDIO_CODECS[fmt] not in LOSSLESS: args += ['-b:a', f"{bitrate}k"]
+            opts.append((path, args))
+
+        source = src
+        if any(os.path.abspath(path) == os.path.abspath(src) for path, _, _ in targets):
+            source = prepend_extension(src, 'orig')
+            os.replace(src, source)
+
+        self.to_screen(f'Exporting {len(targets)} audio formats from "{source}": ' +
+                       ", ".join(os.path.basename(p) for p, _, _ in targets))
+        try:
+            self.real_run_ffmpeg([(source, [])], opts)
+        except Exception:
+            # Put the download back under its name, so a retry / cleanup finds it
+            if source != src: os.replace(source, src)
+            raise
+
+        info['filepath'] = targets[0][0]
+        info['ext'] = os.path.splitext(targets[0][0])[1][1:]
+        info['audio_exports'] = [p for p, _, _ in targets]
+        return [source], info
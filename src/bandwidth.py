@@ -0,0 +1,120 @@
+import time
+import threading
+import config
+from utils import parse_rate
+
+class _Flow:
+    __slots__ = ('weight', 'priority', 'rate', 'tokens', 'stamp', 'window_bytes', 'measured')
+
+    def __init__(self, weight, priority):
+        self.weight = max(0.01, float(weight))
+        self.priority = int(priority)
+        self.rate = 0.0          # bytes/s currently granted
+        self.tokens = 0.0
+        self.stamp = time.monotonic()
+        self.window_bytes = 0    # bytes since the last rebalance
+        self.measured = None     # bytes/s actually used in the last window
+
+class BandwidthScheduler:
+    """
+    Process-wide token bucket shared by every active download.
+    Each job is a flow with a weight and a priority. The total budget is split
+    by weighted water-filling: a flow that used less than its share last
+    window keeps roughly what it used and the rest goes to the others, so the
+    link stays full without going over budget. Priorities multiply the weight
+    by BANDWIDTH_PRIORITY_FACTOR per level, so a higher level takes almost all
+    of the budget while it can use it.
+    Shares are recomputed when a job starts, pauses or finishes and every
+    BANDWIDTH_REBALANCE_SECONDS. consume() is called from progress hooks and
+    sleeps the download thread while that flow has no tokens left; every
+    rebalance wakes the sleepers, so a new share applies at once.
+    A total of 0 means unlimited (consume() returns immediately).
+    """
+    def __init__(self, total_rate=None):
+        self.total_rate = parse_rate(config.BANDWIDTH_TOTAL if total_rate is None else total_rate)
+        self._flows = {}
+        self._lock = threading.Lock()
+        self._rebalanced = threading.Condition(self._lock)
+        self._last_rebalance = time.monotonic()
+
+    # --- Flow lifecycle ---
+    def register(self, key, weight=1.0, priority=0):
+        with self._lock:
+            self._flows[key] = _Flow(weight, priority)
+            self._rebalance()
+
+    def unregister(self, key):
+        with self._lock:
+            if self._flows.pop(key, None) is not None: self._rebalance()
+
+    def set_total(self, total_rate):
+        with self._lock:
+            self.total_rate = parse_rate(total_rate)
+            self._rebalance()
+
+    def rate_of(self, key):
+        with self._lock:
+            flow = self._flows.get(key)
+            return flow.rate if flow else None
+
+    # --- Hot path ---
+    def consume(self, key, nbytes, should_abort=None):
+        """Charges `nbytes` to the flow and blocks until its bucket is back in credit."""
+        if not self.total_rate or nbytes <= 0: return
+        with self._lock:
+            flow = self._flows.get(key)
+            if flow is None: return
+            now = time.monotonic()
+            if now - self._last_rebalance >= config.BANDWIDTH_REBALANCE_SECONDS: self._rebalance(now)
+            self._refill(flow, now)
+            flow.tokens -= nbytes
+            flow.window_bytes += nbytes
+            # The debt is paid at whatever rate the flow has *now*: a rebalance (another job
+            # ending, a new total or priority) wakes us, and tokens/rate are re-read each time.
+            # Short slices also keep pause/cancel responsive.
+            while flow.tokens < 0 and flow.rate > 0 and self.total_rate and self._flows.get(key) is flow:
+                self._rebalanced.wait(min(-flow.tokens / flow.rate, 0.1))
+                if should_abort and should_abort(): return
+                now = time.monotonic()
+                if now - self._last_rebalance >= config.BANDWIDTH_REBALANCE_SECONDS: self._rebalance(now)
+                self._refill(flow, now)
+
+    # --- Internals (lock held) ---
+    def _refill(self, flow, now):
+        burst = flow.rate * config.BANDWIDTH_BURST_SECONDS
+        flow.tokens = min(burst, flow.tokens + (now - flow.stamp) * flow.rate)
+        flow.stamp = now
+
+    def _rebalance(self, now=None):
+        now = now or time.monotonic()
+        window = now - self._last_rebalance
+        self._last_rebalance = now
+        # Sleeping consume() calls re-read their rate once we release the lock
+        self._rebalanced.notify_all()
+        if not self._flows or not self.total_rate: return
+
+        for flow in self._flows.values():
+            self._refill(flow, now)
+            if window > 0.2: flow.measured = flow.window_bytes / window
+            flow.window_bytes = 0
+
+        # Weighted water-filling over the flows' recent demand
+        remaining = float(self.total_rate)
+        pending = list(self._flows.values())
+        while pending:
+            weights = {id(f): f.weight * config.BANDWIDTH_PRIORITY_FACTOR ** f.priority for f in pending}
+            total_w = sum(weights.values())
+            capped = []
+            for f in pending:
+                share = remaining * weights[id(f)] / total_w
+                # Demand = what it used plus headroom to grow; unknown demand = wants its full share
+                demand = f.measured * 1.25 + 64 * 1024 if f.measured is not None else None
+                if demand is not None and demand < share: capped.append((f, demand))
+            if not capped:
+                for f in pending: f.rate = remaining * weights[id(f)] / total_w
+                break
+            for f, demand in capped:
+                f.rate = demand
+                remaining -= demand
+                pending.remove(f)
+            remaining = max(remaining, 0.0)
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import config
+
+class MetadataCache:
+    """
+    Two-level cache for extracted video info.
+    Level 1: in-memory LRU (instant, lost on exit).
+    Level 2: one JSON file per key on disk, expired after `ttl` seconds and
+             trimmed (oldest first) once the folder grows past `max_bytes`.
+    """
+    def __init__(self, cache_dir=None, ttl=None, max_bytes=None, memory_items=None):
+        self.cache_dir = cache_dir or config.METADATA_CACHE_DIR
+        self.ttl = config.METADATA_CACHE_TTL if ttl is None else ttl
+        self.max_bytes = config.METADATA_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.memory_items = memory_items or config.METADATA_CACHE_MEMORY_ITEMS
+
+        self._memory = OrderedDict()  # key -> (stored_at, info)
+        self._lock = threading.Lock()
+        self._disk_bytes = None       # lazily measured on first write
+        self.hits = 0
+        self.misses = 0
+
+    # --- Public API ---
+    def get(self, key):
+        if not key: return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        entry = self._read_disk(key)
+        if entry and now - entry[0] < self.ttl:
+            with self._lock:
+                self._remember(key, entry)
+                self.hits += 1
+            return entry[1]
+
+        with self._lock: self.misses += 1
+        return None
+
+    def put(self, info, *keys):
+        entry = (time.time(), info)
+        for key in dict.fromkeys(k for k in keys if k):
+            with self._lock: self._remember(key, entry)
+            self._write_disk(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = 0
+        if not os.path.isdir(self.cache_dir): return
+        for e in os.scandir(self.cache_dir):
+            if e.name.endswith('.json'):
+                try: os.remove(e.path)
+                except OSError: pass
+
+    # --- Memory Layer ---
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    # --- Disk Layer ---
+    def _file_for(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._file_for(key), 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+            if data.get('key') != key: return None
+            return (data['stored_at'], data['info'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key, entry):
+        target = self._file_for(key)
+        tmp = f"{target}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            payload = json.dumps({'key': key, 'stored_at': entry[0], 'info': entry[1]}, separators=(',', ':'))
+            old_size = os.path.getsize(target) if os.path.exists(target) else 0
+            with open(tmp, 'w', encoding='utf-8') as fh:
+                fh.write(payload)
+            os.replace(tmp, target)
+        except OSError as e:
+            print(f"Metadata cache write error: {e}")
+            try: os.remove(tmp)
+            except OSError: pass
+            return
+
+        with self._lock:
+            if self._disk_bytes is None: self._disk_bytes = self._measure_disk()
+            else: self._disk_bytes += len(payload) - old_size
+            over_budget = self._disk_bytes > self.max_bytes
+        if over_budget: self._evict()
+
+    def _measure_disk(self):
+        total = 0
+        for e in os.scandir(self.cache_dir):
+            if e.name.endswith('.json'):
+                try: total += e.stat().st_size
+                except OSError: pass
+        return total
+
+    def _evict(self):
+        """Drops expired entries first, then the oldest ones, until we are back under 90% of the cap."""
+        now = time.time()
+        files = []
+        for e in os.scandir(self.cache_dir):
+            if not e.name.endswith('.json'): continue
+            try:
+                st = e.stat()
+                files.append((st.st_mtime, st.st_size, e.path))
+            except OSError: pass
+        files.sort()
+
+        total = sum(f[1] for f in files)
+        target = self.max_bytes * 0.9
+        for mtime, size, fpath in files:
+            if total <= target and now - mtime < self.ttl: break
+            try:
+                os.remove(fpath)
+                total -= size
+            except OSError: pass
+        with self._lock: self._disk_bytes = total
@@ -0,0 +1,255 @@
+# cli.py
+# Headless batch mode. Drives DownloadManager directly and never imports
+# tkinter or PIL, so it starts fast on servers / cron.
+#
+#   python src/cli.py URL [URL ...] -o ~/Videos -q "720p Limit"
+#   python src/cli.py -f urls.txt --jobs 4
+#   cat urls.txt | python src/cli.py -
+#   pbpaste | python src/cli.py -        (any text: links are picked out and deduplicated)
+import argparse
+import os
+import sys
+import threading
+import time
+
+import config
+import utils
+import formats
+from logic import DownloadManager
+from archive import DownloadArchive
+from bandwidth import BandwidthScheduler
+from metrics import MetricsSink
+from progress import ProgressBus
+
+QUALITY_CHOICES = ["1080p (MP4 - Fast)", "4K / Best (MKV/WebM)", "720p Limit", "Audio Only", "auto"]
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="cli.py", description="Headless batch downloader (same options as the GUI).")
+    p.add_argument("urls", nargs="*", help="Video URLs. Use '-' to read URLs from stdin.")
+    p.add_argument("-f", "--file", action="append", default=[],
+                   help="Read URLs from a text file (one per line or mixed into text, # for comments).")
+    p.add_argument("-o", "--output", default=os.path.join(os.path.expanduser("~"), "Desktop"), help="Save folder.")
+    p.add_argument("-q", "--quality", default=config.DEFAULT_QUALITY,
+                   help=f"Quality label as shown in the GUI, e.g. {', '.join(repr(q) for q in QUALITY_CHOICES)} or '480p'.")
+    p.add_argument("-t", "--time-budget", default=str(config.AUTO_TIME_BUDGET), metavar="TIME",
+                   help="With -q auto: pick the best quality that downloads within this time (MM:SS or seconds) "
+                        "at the measured link speed.")
+    p.add_argument("-F", "--list-qualities", action="store_true",
+                   help="Show each quality's estimated download size (and the format table), then exit.")
+    p.add_argument("-n", "--name", default="", help="Custom file name (only sensible with a single URL).")
+    p.add_argument("-p", "--playlist", action="store_true",
+                   help="Expand playlist/channel URLs and download every entry (entries start as they are discovered).")
+    p.add_argument("--resume-unfinished", action="store_true",
+                   help="Also resume every job the journal recorded as queued/running/paused (e.g. after a crash).")
+    p.add_argument("-j", "--jobs", type=int, default=config.MAX_CONCURRENT_DOWNLOADS, help="Concurrent downloads.")
+    p.add_argument("-r", "--limit-rate", default=config.BANDWIDTH_TOTAL, metavar="RATE",
+                   help="Total speed limit shared by all downloads (e.g. 8M, 500K). 0 = unlimited.")
+    p.add_argument("--priority", type=int, default=0, help="Bandwidth priority of these downloads (higher goes first).")
+    p.add_argument("--weight", type=float, default=1.0, help="Bandwidth share relative to other downloads of the same priority.")
+
+    adv = p.add_argument_group("advanced")
+    adv.add_argument("--audio-format", default="MP3", choices=config.AUDIO_FORMATS)
+    adv.add_argument("--bitrate", default="192", help="Audio bitrate (kbps) for Audio Only.")
+    adv.add_argument("--audio-outputs", metavar="LIST",
+                     help="Several audio files from one download, e.g. 'FLAC,MP3:320,MP3:128' (Audio Only).")
+    adv.add_argument("--compat", action="store_true", help="Force compatibility (H.264).")
+    adv.add_argument("--embed-subs", action="store_true", help="Embed English subtitles.")
+    adv.add_argument("--no-embed-meta", action="store_true", help="Don't embed metadata/thumbnail.")
+    adv.add_argument("--start", default="", help="Clip start (HH:MM:SS / MM:SS / seconds).")
+    adv.add_argument("--end", default="", help="Clip end (HH:MM:SS / MM:SS / seconds).")
+    adv.add_argument("--arg", action="append", default=[], metavar="NAME",
+                     help="Power arg from the GUI list, matched by substring (e.g. 'SponsorBlock', 'Geo Bypass').")
+    adv.add_argument("--no-archive", action="store_true", help="Download even if the video is already in the archive.")
+    adv.add_argument("--archive", metavar="FILE", help=f"Download archive file (yt-dlp format). Default: {config.ARCHIVE_PATH}")
+    adv.add_argument("--list-args", action="store_true", help="List available power args and exit.")
+    adv.add_argument("--metrics-jsonl", metavar="FILE", help=f"Per-job timing records (JSON lines). Default: {config.METRICS_JSONL_PATH}")
+    adv.add_argument("--metrics-prom", metavar="FILE", help=f"Prometheus text file with totals. Default: {config.METRICS_PROM_PATH}")
+    return p
+
+def read_urls(args):
+    """URLs from the arguments, stdin and list files, canonical and deduplicated. Returns (urls, duplicates)."""
+    chunks = []
+    for u in args.urls:
+        chunks.append(sys.stdin.read() if u == "-" else u)
+    for path in args.file:
+        with open(path, "r", encoding="utf-8") as fh: chunks.append(fh.read())
+    # Playlist mode keeps the links as given: canonical watch URLs would lose their &list=
+    return utils.parse_url_list("\n".join(chunks), canonicalize=not args.playlist)
+
+def list_qualities(manager, urls, compat, budget):
+    """-F: estimated size/time per quality option, what auto would pick, and the format table."""
+    failed = False
+    for url in urls:
+        info = manager.fetch_video_info(url)
+        if not info:
+            print(f"{url}: could not fetch formats", file=sys.stderr)
+            failed = True
+            continue
+        speed = manager.link_speed(url)
+        estimates = manager.estimate_sizes(info, compatibility_mode=compat)
+        width = max(len(label) for label, _ in estimates)
+        print(f"{info['title']} ({utils.format_seconds(info.get('duration'))}) - {url}")
+        for label, size in estimates:
+            print(f"  {label:<{width}}  {formats.describe_estimate(size, speed)}")
+        link = f"{utils.format_bytes(int(speed))}/s" if speed else "not measured yet"
+        print(f"  {'auto':<{width}}  -> {formats.pick_for_budget(estimates, budget, speed) or '?'} "
+              f"(budget {utils.format_seconds(budget)}, link {link})")
+        print("\n".join("    " + line for line in formats.format_table(info).splitlines()))
+    return 1 if failed else 0
+
+def match_power_arg(name):
+    """The POWER_ARGS entry whose label contains `name` (case-insensitive); ValueError unless exactly one does."""
+    matches = [k for k in config.POWER_ARGS if name.lower() in k.lower()]
+    if len(matches) != 1: raise ValueError(f"{name!r} matches {len(matches)} power args")
+    return config.POWER_ARGS[matches[0]]
+
+def resolve_power_args(names):
+    try: return [match_power_arg(name) for name in names]
+    except ValueError as e: raise SystemExit(f"--arg {e}; use --list-args.")
+
+class TerminalReporter:
+    """Prints status lines per job, plus one live progress line when attached to a TTY."""
+    def __init__(self, total, stream=sys.stdout):
+        self.total = total
+        self.stream = stream
+        self.is_tty = stream.isatty()
+        self.bus = ProgressBus()
+        self.done = 0
+        self.failed = 0
+        self._latest = {}
+        self._closed = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add(self, url):
+        """Registers one more job and returns its callbacks."""
+        with self._lock:
+            self.total += 1
+            key = self.total
+        return self.callbacks(key, url)
+
+    def callbacks(self, key, url):
+        def status(msg, color): self._line(f"[{key}] {msg}")
+        def finish(success):
+            with self._lock:
+                self.done += 1
+                if not success: self.failed += 1
+                self._closed.add(key)
+            self._line(f"[{key}] {'Done' if success else 'Stopped'}: {url}")
+        def error(msg):
+            with self._lock:
+                self.done += 1
+                self.failed += 1
+                self._closed.add(key)
+            self._line(f"[{key}] Error: {msg.strip()}")
+        return {'progress_callback': self.bus.sink(key), 'status_callback': status,
+                'finish_callback': finish, 'error_callback': error}
+
+    def _line(self, text):
+        with self._lock:
+            if self.is_tty: self.stream.write("\r\033[K")
+            self.stream.write(text + "\n")
+            self.stream.flush()
+
+    def run(self):
+        interval = 1.0 / config.PROGRESS_UI_HZ
+        while not self._stop.wait(interval):
+            if not self.is_tty: continue
+            self._latest.update(self.bus.drain())
+            with self._lock: closed, self._closed = self._closed, set()
+            for key in closed:
+                self._latest.pop(key, None)
+                self.bus.forget(key)
+            parts = []
+            for key, snap in sorted(self._latest.items())[:4]:
+                pct = f"{snap.percent:.0f}%" if snap.total else utils.format_bytes(snap.downloaded)
+                parts.append(f"#{key} {pct} {utils.format_bytes(int(snap.speed))}/s ETA {utils.format_seconds(snap.eta)}")
+            with self._lock:
+                self.stream.write(f"\r\033[K[{self.done}/{self.total}] " + " | ".join(parts))
+                self.stream.flush()
+
+    def stop(self):
+        self._stop.set()
+        if self.is_tty: self._line(f"[{self.done}/{self.total}] finished, {self.failed} failed.")
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.list_args:
+        for k in config.POWER_ARGS: print(k)
+        return 0
+
+    urls, duplicates = read_urls(args)
+    if duplicates: print(f"Skipping {duplicates} duplicate link(s).", file=sys.stderr)
+    if not urls and not args.resume_unfinished:
+        print("No URLs given.", file=sys.stderr)
+        return 2
+    if args.quality.lower() == "auto": args.quality = config.AUTO_QUALITY
+    budget = utils.parse_time_to_seconds(args.time_budget)
+    if not budget:
+        print(f"Invalid --time-budget {args.time_budget!r} (use MM:SS or seconds).", file=sys.stderr)
+        return 2
+    if args.list_qualities:
+        return list_qualities(DownloadManager(), urls, args.compat, budget)
+    if not utils.is_ffmpeg_installed():
+        print("Warning: FFmpeg not found. Merging, audio conversion and clipping will fail.", file=sys.stderr)
+    os.makedirs(args.output, exist_ok=True)
+
+    custom_args = resolve_power_args(args.arg)
+    # Keep yt-dlp's own console output out of the way of ours
+    custom_args.append({'quiet': True, 'noprogress': True})
+    advanced_opts = utils.build_advanced_opts(
+        quality=args.quality,
+        audio_format=args.audio_format,
+        compatibility_mode=args.compat,
+        audio_bitrate=args.bitrate,
+        embed_subs=args.embed_subs,
+        embed_meta=not args.no_embed_meta,
+        custom_args=custom_args,
+        time_start=args.start,
+        time_end=args.end,
+        use_archive=not args.no_archive,
+        bandwidth_weight=args.weight,
+        bandwidth_priority=args.priority,
+        audio_outputs=utils.parse_audio_outputs(args.audio_outputs, args.bitrate) or None,
+        time_budget=budget,
+    )
+
+    manager = DownloadManager(max_workers=max(1, args.jobs), archive=DownloadArchive(args.archive),
+                              bandwidth=BandwidthScheduler(args.limit_rate),
+                              metrics=MetricsSink(args.metrics_jsonl, args.metrics_prom))
+    reporter = TerminalReporter(0)
+    printer = threading.Thread(target=reporter.run, daemon=True)
+    printer.start()
+
+    runs = []
+    if args.resume_unfinished:
+        recovered = manager.recover_jobs(lambda rec: reporter.add(rec['url']))
+        for job in recovered: manager.resume(job)
+        if recovered: print(f"Resuming {len(recovered)} unfinished job(s) from the journal.")
+    if args.playlist:
+        for url in urls:
+            runs.append(manager.start_playlist(url, args.output, args.quality, advanced_opts,
+                                               lambda entry: reporter.add(entry['url'])))
+    elif len(urls) == 1:
+        manager.start_download(url=urls[0], path=args.output, quality=args.quality, custom_name=args.name,
+                               advanced_opts=dict(advanced_opts), is_resume=False, **reporter.add(urls[0]))
+    elif urls:
+        # Metadata for the whole list is prefetched in parallel; jobs queue as their info arrives
+        runs.append(manager.start_batch(urls, args.output, args.quality, advanced_opts,
+                                        lambda entry: reporter.add(entry['url'])))
+    try:
+        # join() in small steps so Ctrl+C still reaches us
+        while not all(r.is_done for r in runs) or reporter.done < reporter.total: time.sleep(0.2)
+    except KeyboardInterrupt:
+        print("\nCancelling...", file=sys.stderr)
+        for r in runs: r.cancel()
+        manager.cancel_all()
+        manager.wait()
+    finally:
+        reporter.stop()
+    for r in runs:
+        if r.error: print(f"Playlist error ({r.url or 'batch'}): {r.error}", file=sys.stderr)
+    return 1 if reporter.failed or any(r.error for r in runs) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
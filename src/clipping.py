@@ -0,0 +1,205 @@
+# clipping.py
+# Frame-accurate clips at close to stream-copy speed ("smart cut").
+# Only the partial GOPs at each end of the range are re-encoded; everything
+# between the first and last keyframe inside the range is copied as-is.
+import os
+import json
+import shutil
+import tempfile
+import subprocess
+from yt_dlp.postprocessor.common import PostProcessor
+import config
+
+# Re-encoders for the boundary pieces (must produce the same codec as the copied bulk)
+ENCODERS = {'h264': 'libx264', 'hevc': 'libx265', 'vp9': 'libvpx-vp9', 'av1': 'libsvtav1'}
+H264_PROFILES = {'Constrained Baseline': 'baseline', 'Baseline': 'baseline', 'Main': 'main', 'High': 'high'}
+# MPEG-TS keeps H.264/HEVC parameter sets in-band, so pieces from two encoders concat cleanly
+SEGMENT_EXT = {'h264': 'ts', 'hevc': 'ts'}
+EPSILON = 0.001
+
+def _run(cmd, timeout=None):
+    return subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=timeout,
+                          creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+
+def _header_args(http_headers):
+    if not http_headers: return []
+    return ['-headers', ''.join(f'{k}: {v}\r\n' for k, v in http_headers.items())]
+
+# --- Probing ---
+def probe_keyframes(src, intervals, http_headers=None):
+    """
+    Keyframe timestamps (seconds) of the first video stream. `intervals` is
+    ffprobe's -read_intervals syntax ("10%+20,300%320"), so a remote URL only
+    costs a few range requests around the cut points. Packets are not decoded.
+    """
+    out = _run(['ffprobe', '-v', 'error', *_header_args(http_headers), '-select_streams', 'v:0',
+                '-read_intervals', intervals, '-show_entries', 'packet=pts_time,flags',
+                '-of', 'csv=p=0', src], config.FFPROBE_TIMEOUT).stdout
+    keyframes = set()
+    for line in out.splitlines():
+        pts, _, flags = line.partition(',')
+        if 'K' in flags and pts not in ('', 'N/A'): keyframes.add(float(pts))
+    return sorted(keyframes)
+
+def probe_video_stream(src):
+    out = _run(['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries',
+                'stream=codec_name,profile,pix_fmt,avg_frame_rate:format=duration', '-of', 'json', src],
+               config.FFPROBE_TIMEOUT).stdout
+    data = json.loads(out or '{}')
+    stream = (data.get('streams') or [{}])[0]
+    num, _, den = (stream.get('avg_frame_rate') or '0/1').partition('/')
+    stream['fps'] = float(num) / float(den) if float(den or 0) else 0.0
+    stream['duration'] = float((data.get('format') or {}).get('duration') or 0)
+    return stream
+
+def boundary_intervals(start, end):
+    """read_intervals covering the first keyframe after `start` and the last one before `end`."""
+    window = config.CLIP_PROBE_WINDOW
+    if end - start <= 2 * window: return f"{max(0.0, start - window)}%{end + EPSILON}"
+    return f"{max(0.0, start - window)}%{start + window},{end - window}%{end + EPSILON}"
+
+class ClipPlan:
+    """
+    How a [start, end) range splits into re-encoded head/tail and a copied body.
+    With no keyframe inside the range everything is re-encoded.
+    """
+    __slots__ = ('start', 'end', 'body_start', 'body_end')
+
+    def __init__(self, keyframes, start, end):
+        self.start, self.end = start, end
+        inside = [k for k in keyframes if start - EPSILON <= k <= end]
+        if len(inside) >= 2:
+            self.body_start, self.body_end = inside[0], inside[-1]
+        else:
+            self.body_start = self.body_end = end
+
+    @property
+    def copy_seconds(self): return max(0.0, self.body_end - self.body_start)
+
+    @property
+    def encode_seconds(self): return max(0.0, (self.end - self.start) - self.copy_seconds)
+
+    @property
+    def estimated_seconds(self):
+        return self.encode_seconds / config.CLIP_ENCODE_SPEED + self.copy_seconds / config.CLIP_COPY_SPEED
+
+    def describe(self):
+        if not self.copy_seconds: return f"Full re-encode of {self.encode_seconds:.0f}s (~{self.estimated_seconds:.0f}s CPU)"
+        return (f"Re-encode {self.encode_seconds:.1f}s, copy {self.copy_seconds:.0f}s "
+                f"(~{max(1, round(self.estimated_seconds))}s CPU)")
+
+def plan_remote(url, start, end, http_headers=None):
+    """ClipPlan for a format URL before anything is downloaded (used for the GUI estimate)."""
+    return ClipPlan(probe_keyframes(url, boundary_intervals(start, end), http_headers), start, end)
+
+# --- Cutting ---
+def smart_cut(src, dst, start, end):
+    """
+    Writes src[start:end] to dst (may be the same path). Returns the ClipPlan used.
+    Unknown codecs, or ranges with too little to copy, fall back to one accurate re-encode.
+    """
+    stream = probe_video_stream(src)
+    plan = ClipPlan(probe_keyframes(src, boundary_intervals(start, end)), start, end)
+    codec = stream.get('codec_name')
+    root, ext = os.path.splitext(dst)
+    out = f"{root}.clip{ext}"
+    work = tempfile.mkdtemp(prefix='.clip-', dir=os.path.dirname(os.path.abspath(dst)))
+    try:
+        if codec not in ENCODERS or plan.copy_seconds < config.CLIP_MIN_COPY_SECONDS:
+            plan.body_start = plan.body_end = end
+            _run(['ffmpeg', '-y', '-v', 'error', '-ss', str(start), '-i', src, '-t', str(end - start),
+                  '-map', '0:v:0', '-map', '0:a?', '-map_metadata', '0',
+                  *_encoder_args(stream), '-c:a', 'copy', out])
+        else:
+            seg_ext = SEGMENT_EXT.get(codec, 'mkv')
+            pieces = []
+            if plan.body_start - start > EPSILON:
+                pieces.append(_encode_piece(src, work, 'head', seg_ext, stream, start, plan.body_start))
+            pieces.append(_copy_piece(src, work, seg_ext, stream, plan.body_start, plan.body_end))
+            if end - plan.body_end > EPSILON:
+                pieces.append(_encode_piece(src, work, 'tail', seg_ext, stream, plan.body_end, end))
+
+            listing = os.path.join(work, 'pieces.txt')
+            with open(listing, 'w', encoding='utf-8') as fh:
+                for p in pieces: fh.write("file '" + p.replace("'", "'\\''") + "'\n")
+            # Video from the pieces, audio/subs copied straight from the source range
+            _run(['ffmpeg', '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', listing,
+                  '-ss', str(start), '-t', str(end - start), '-i', src,
+                  '-map', '0:v:0', '-map', '1:a?', '-map', '1:s?', '-map_metadata', '1',
+                  '-c', 'copy', out])
+        os.replace(out, dst)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+        if os.path.exists(out): os.remove(out)
+    return plan
+
+def _encoder_args(stream):
+    codec = stream.get('codec_name')
+    args = ['-c:v', ENCODERS.get(codec, 'libx264')]
+    if stream.get('pix_fmt'): args += ['-pix_fmt', stream['pix_fmt']]
+    if codec in ('h264', 'hevc') or codec not in ENCODERS:
+        args += ['-preset', config.CLIP_ENCODE_PRESET, '-crf', str(config.CLIP_CRF)]
+        if codec == 'h264' and stream.get('profile') in H264_PROFILES:
+            args += ['-profile:v', H264_PROFILES[stream['profile']]]
+    elif codec == 'vp9':
+        args += ['-crf', str(config.CLIP_CRF + 13), '-b:v', '0', '-deadline', 'good', '-cpu-used', '5', '-row-mt', '1']
+    elif codec == 'av1':
+        args += ['-crf', str(config.CLIP_CRF + 12), '-preset', '8']
+    return args
+
+def _encode_piece(src, work, name, seg_ext, stream, a, b):
+    piece = os.path.join(work, f"{name}.{seg_ext}")
+    # Input seek + transcode is frame-accurate: ffmpeg decodes from the GOP start and drops frames before `a`
+    _run(['ffmpeg', '-y', '-v', 'error', '-ss', str(a), '-i', src, '-t', str(b - a),
+          '-map', '0:v:0', '-an', '-sn', *_encoder_args(stream), piece])
+    return piece
+
+def _copy_piece(src, work, seg_ext, stream, a, b):
+    # Seeking just past keyframe `a` lands exactly on it. A plain -t would overshoot by the
+    # B-frame reorder delay, so let the segment muxer split at keyframe `b` and keep piece 0.
+    pattern = os.path.join(work, f"body%d.{seg_ext}")
+    _run(['ffmpeg', '-y', '-v', 'error', '-ss', str(a + EPSILON), '-i', src, '-t', str(b - a + 1),
+          '-map', '0:v:0', '-an', '-sn', '-c', 'copy',
+          '-f', 'segment', '-segment_times', str(b - a - EPSILON), '-reset_timestamps', '1', pattern])
+    return pattern.replace('%d', '0')
+
+# --- yt-dlp integration ---
+class KeyframeClipPP(PostProcessor):
+    """
+    Runs after yt-dlp stream-copied the section [start, end] (so the file
+    starts at the keyframe before `start`) and trims it frame-accurately.
+    `end` None means the clip runs to the end of the video.
+    """
+    def __init__(self, downloader, start, end=None):
+        super().__init__(downloader)
+        self.start, self.end = start, end
+
+    def run(self, info):
+        path = info.get('filepath')
+        if not path or not os.path.exists(path): return [], info
+        origin = self._section_origin(info, path)
+        if origin is None:
+            self.report_warning('Could not locate the clip start; keeping the keyframe-aligned cut')
+            return [], info
+        end = self.end if self.end is not None else origin + probe_video_stream(path)['duration']
+        self.to_screen(f'Smart-cutting {self.start - origin:.3f}s-{end - origin:.3f}s of "{path}"')
+        plan = smart_cut(path, path, max(0.0, self.start - origin), end - origin)
+        self.to_screen(plan.describe())
+        return [], info
+
+    def _section_origin(self, info, path):
+        """Source timestamp of the downloaded file's t=0: the keyframe at or before `start`."""
+        if self.start <= EPSILON: return 0.0
+        fmt = next((f for f in info.get('requested_formats') or [info] if f.get('vcodec') != 'none'), info)
+        if fmt.get('url'):
+            try:
+                keyframes = probe_keyframes(fmt['url'], f"{max(0.0, self.start - config.CLIP_PROBE_WINDOW)}%{self.start + EPSILON}",
+                                            fmt.get('http_headers') or info.get('http_headers'))
+                before = [k for k in keyframes if k <= self.start + EPSILON]
+                if before: return before[-1]
+            except (subprocess.SubprocessError, OSError, ValueError) as e:
+                self.report_warning(f'Keyframe probe failed ({e}); estimating clip origin from duration')
+        if self.end is None: return None
+        # The copy ends at `end`, so whatever the file holds beyond end - start is lead-in
+        duration = probe_video_stream(path).get('duration') or (self.end - self.start)
+        return max(0.0, self.end - duration)
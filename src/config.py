@@ -1,4 +1,5 @@
 # config.py
+import os
 
 # ... (Window Settings, Colors, Fonts remain the same) ...
 WINDOW_TITLE = "YouTube Downloader Ultimate"
@@ -20,6 +21,107 @@ FONT_MONO = ("Consolas", 9)
 # --- CHANGED: Default Quality ---
 DEFAULT_QUALITY = "1080p (MP4 - Fast)" 
 
+# --- Auto Quality (best option that downloads within a time budget) ---
+AUTO_QUALITY = "Auto (Fit Time Budget)"
+AUTO_TIME_BUDGET = 300                     # seconds, default budget for a single download
+LINK_SPEED_SMOOTHING = 0.3                 # EWMA weight of the newest measured download speed
+
+# --- Startup ---
+STARTUP_BUDGET_MS = 500                    # time-to-first-window budget checked by --startup-profile
+STARTUP_WARMUP_DELAY_MS = 150              # wait after first paint before background imports start
+
+# --- App Data (caches, state) ---
+if os.name == 'nt':
+    APP_DATA_DIR = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "GameelYTDownloader")
+else:
+    APP_DATA_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "gameel-yt-downloader")
+
+# --- Metadata Cache ---
+METADATA_CACHE_DIR = os.path.join(APP_DATA_DIR, "metadata")
+METADATA_CACHE_TTL = 6 * 3600              # seconds an on-disk entry stays fresh
+METADATA_CACHE_MAX_BYTES = 50 * 1024**2    # on-disk size cap (oldest evicted first)
+METADATA_CACHE_MEMORY_ITEMS = 256          # in-memory LRU entries
+
+# --- Thumbnails ---
+THUMBNAIL_CACHE_DIR = os.path.join(APP_DATA_DIR, "thumbnails")
+THUMBNAIL_WIDTH = 250
+THUMBNAIL_TIMEOUT = 10                     # seconds per HTTP request
+THUMBNAIL_MEMORY_ITEMS = 32                # PhotoImage objects kept alive
+THUMBNAIL_CACHE_MAX_FILES = 2000           # resized PNGs kept on disk
+PREVIEW_DEBOUNCE_MS = 400                  # typing in the URL box previews once it has been still this long
+
+# --- Job Journal (pause/resume across restarts) ---
+JOURNAL_PATH = os.path.join(APP_DATA_DIR, "jobs.sqlite3")
+JOURNAL_FLUSH_INTERVAL = 1.0               # seconds between batched progress writes
+
+# --- Download Archive (yt-dlp --download-archive format) ---
+ARCHIVE_PATH = os.path.join(APP_DATA_DIR, "archive.txt")
+
+# --- Job Metrics (see metrics.py; set a path to "" to turn that output off) ---
+METRICS_JSONL_PATH = os.path.join(APP_DATA_DIR, "metrics.jsonl")
+METRICS_PROM_PATH = os.path.join(APP_DATA_DIR, "metrics.prom")
+
+# --- Adaptive Fragment Downloads (see tuning.py) ---
+TUNING_PATH = os.path.join(APP_DATA_DIR, "tuning.json")
+TUNING_MIN_GAIN = 0.05                     # a rung must beat the best speed by 5% to count as better
+TUNING_PATIENCE = 3                        # misses in a row before a host is considered settled
+TUNING_MIN_SECONDS = 2.0                   # shorter streams are too noisy to learn from
+TUNING_MIN_BYTES = 2 * 1024**2
+
+# --- Clipping (keyframe-aware smart cut) ---
+CLIP_PROBE_WINDOW = 20.0                   # seconds searched around each cut point for keyframes
+CLIP_MIN_COPY_SECONDS = 2.0                # below this a single re-encode is simpler and as fast
+CLIP_ENCODE_PRESET = "veryfast"            # x264/x265 preset for the re-encoded boundary GOPs
+CLIP_CRF = 18
+CLIP_ENCODE_SPEED = 3.0                    # rough re-encode speed (x realtime) for the GUI estimate
+CLIP_COPY_SPEED = 150.0                    # rough stream-copy speed (x realtime)
+CLIP_ESTIMATE_DELAY_MS = 400               # GUI waits this long after the last slider move before probing
+FFPROBE_TIMEOUT = 20
+
+# --- Bandwidth (shared by all downloads) ---
+BANDWIDTH_TOTAL = 0                        # bytes/s or "8M"-style string; 0 = unlimited
+BANDWIDTH_BURST_SECONDS = 0.5              # a flow may run this far ahead of its rate
+BANDWIDTH_REBALANCE_SECONDS = 1.0          # re-split the budget from measured usage this often
+BANDWIDTH_PRIORITY_FACTOR = 100            # weight multiplier per priority level
+
+# --- Disk Space Admission (see diskspace.py) ---
+DISK_MIN_FREE = 512 * 1024**2              # downloads are never planned into the last 512 MB of a volume
+DISK_ESTIMATE_FACTOR = 1.15                # headroom on format size estimates (approximate sizes run low)
+DISK_RECHECK_SECONDS = 5.0                 # jobs held for space are retried this often (and when a job ends)
+
+# --- Download Queue ---
+MAX_CONCURRENT_DOWNLOADS = 3
+DIR_INDEX_REFRESH_SECONDS = 30             # rescan an output folder at most this often (if its mtime changed)
+PLAYLIST_METADATA_WORKERS = 4              # entries resolved in parallel while a playlist / URL batch expands
+PLAYLIST_MAX_PENDING = 16                  # entries discovered but not finished before expansion waits
+PLAYLIST_MAX_DEPTH = 2                     # nested tabs/sub-playlists followed
+CLEANUP_RETRIES = 6                        # only used while a file is still locked (Windows/AV)
+CLEANUP_RETRY_DELAY = 0.05                 # first backoff step in seconds, doubles each retry
+# Merges are I/O bound and transcodes already use several FFmpeg threads each
+POSTPROCESS_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# Warm YoutubeDL instances (downloads + post-processing + previews); built lazily
+YDL_POOL_SIZE = MAX_CONCURRENT_DOWNLOADS + POSTPROCESS_WORKERS + 2
+
+# --- Daemon (daemon.py, HTTP/JSON job service) ---
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+DAEMON_TOKEN = os.environ.get("YTDL_DAEMON_TOKEN", "")  # required when listening beyond localhost
+DAEMON_KEEP_FINISHED = 500                 # finished jobs still listed (oldest dropped first)
+DAEMON_EVENT_BACKLOG = 5000                # events kept for SSE clients that reconnect (Last-Event-ID)
+DAEMON_HEARTBEAT_SECONDS = 15              # SSE keep-alive comment when nothing happened
+DAEMON_MAX_BODY = 1024**2                  # largest accepted request body
+
+# --- History / Queue Panel (gui/history.py) ---
+HISTORY_MAX_ROWS = 100000                  # newest jobs kept in the panel (older ones stay in the journal)
+HISTORY_POLL_MS = 1000                     # journal re-read interval while the panel is open
+HISTORY_ROW_HEIGHT = 54                    # pixels; rows are drawn on a canvas, never one widget each
+HISTORY_THUMB_WIDTH = 80                   # 16:9 thumbnails -> 45 px high
+HISTORY_THUMB_WORKERS = 2                  # background thumbnail downloads for the visible rows
+
+# --- Progress Display ---
+PROGRESS_UI_HZ = 10                        # UI refreshes per second (samples in between are coalesced)
+PROGRESS_SMOOTHING = 0.3                   # EWMA weight of the newest speed measurement
+
 # --- Feature Options ---
 AUDIO_FORMATS = ["MP3", "M4A", "WAV", "FLAC"]
 
@@ -35,6 +137,7 @@ POWER_ARGS = {
     "ℹ️ Save Metadata to Disk (.json)": {"writeinfojson": True},
     "🌍 Bypass Region Locks (Geo Bypass)": {"geo_bypass": True},
     "🐌 Limit Download Speed (5 MB/s)": {"ratelimit": "5M"},
+    "⚡ Adaptive Fragment Downloads (DASH/HLS)": {"adaptive_fragments": True},
     "🔡 Restrict Filenames (ASCII Only)": {"restrictfilenames": True},
     "⚠️ Ignore Errors (Skip Unavailable)": {"ignoreerrors": True},
     "🕒 Use Download Date (No Mod Time)": {"updatetime": False},
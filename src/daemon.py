@@ -0,0 +1,581 @@
+# daemon.py
+# Long-running job service: one warm DownloadManager (metadata cache, YoutubeDL
+# pool, journal and bandwidth budget shared by every client) behind a small
+# HTTP/JSON API, so scripts and other machines can queue downloads on one box
+# without each paying for a cold yt-dlp start. Headless like cli.py.
+#
+#   python src/daemon.py -o ~/Videos                     # http://127.0.0.1:8765
+#   python src/daemon.py --host 0.0.0.0 --token SECRET    # reachable from the LAN
+#
+#   GET  /api/health                        job counts per state
+#   GET  /api/jobs                          every job the daemon knows, newest first
+#   POST /api/jobs                          submit (body: see JobService.submit)
+#   GET  /api/jobs/<id>                     one job
+#   POST /api/jobs/<id>/pause|resume|cancel
+#   GET  /api/events[?job=<id>]             Server-Sent Events: snapshot, job, status, progress, state
+#
+# With a token, requests need "Authorization: Bearer <token>" (or ?token=..., for EventSource).
+import argparse
+import hmac
+import inspect
+import ipaddress
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import config
+import utils
+from cli import match_power_arg
+from logic import DownloadManager
+from archive import DownloadArchive
+from bandwidth import BandwidthScheduler
+from metrics import MetricsSink
+from progress import ProgressBus
+
+# build_advanced_opts() keywords a client may set (yt-dlp options only through named power args)
+OPTION_NAMES = frozenset(inspect.signature(utils.build_advanced_opts).parameters) - {'quality', 'custom_args'}
+FINISHED_STATES = ('done', 'cancelled', 'error', 'skipped', 'stopped')
+BOOL_OPTIONS = ('compatibility_mode', 'embed_subs', 'embed_meta', 'use_archive')
+MAX_PRIORITY = 10       # |bandwidth_priority|: the scheduler weighs flows by BANDWIDTH_PRIORITY_FACTOR ** priority
+MAX_WEIGHT = 1000.0
+
+JOB_PATH_RE = re.compile(r'^/api/jobs/(?P<id>[\w-]+)(?:/(?P<action>pause|resume|cancel))?$')
+
+class ConflictError(Exception):
+    """The job exists but can't do that in its current state (HTTP 409)."""
+
+def build_job_opts(quality, options):
+    """
+    advanced_opts for a client's "options" object, validated like the CLI flags.
+    Values are checked here too (ValueError -> 400): a bad one would otherwise
+    only fail inside a worker, or in the bandwidth scheduler shared by every job.
+    """
+    if not isinstance(options or {}, dict): raise ValueError("'options' must be an object")
+    options = dict(options or {})
+    unknown = set(options) - OPTION_NAMES - {'power_args'}
+    if unknown: raise ValueError(f"unknown option(s): {', '.join(sorted(unknown))}")
+    power_args = options.pop('power_args', None) or []
+    if not isinstance(power_args, list) or not all(isinstance(name, str) for name in power_args):
+        raise ValueError("'power_args' must be a list of strings")
+    custom_args = [match_power_arg(name) for name in power_args]
+    # Keep yt-dlp's own console output out of the daemon's log
+    custom_args.append({'quiet': True, 'noprogress': True})
+
+    for key in BOOL_OPTIONS:
+        if key in options and not isinstance(options[key], bool): raise ValueError(f"'{key}' must be true or false")
+    if 'audio_format' in options:
+        options['audio_format'] = _audio_format(options['audio_format'])
+    if 'audio_bitrate' in options:
+        options['audio_bitrate'] = _bitrate(options['audio_bitrate'])
+    outputs = options.get('audio_outputs')
+    if isinstance(outputs, str): outputs = [part for part in outputs.split(",") if part.strip()]
+    if outputs is not None:
+        if not isinstance(outputs, list) or not outputs:
+            raise ValueError("'audio_outputs' must be a 'FLAC, MP3:320' string or a list of [format, bitrate]")
+        options['audio_outputs'] = []
+        for entry in outputs:
+            pair = _audio_output(entry, options.get('audio_bitrate', "192"))
+            if pair not in options['audio_outputs']: options['audio_outputs'].append(pair)
+    for key in ('time_start', 'time_end'):
+        value = options.get(key)
+        if value in (None, ""): continue
+        if not isinstance(value, str) or utils.parse_time_to_seconds(value) is None:
+            raise ValueError(f"invalid {key} {value!r} (use HH:MM:SS, MM:SS or seconds)")
+    if 'total_duration' in options: _number(options, 'total_duration', 0, 7 * 24 * 3600)
+    if 'bandwidth_weight' in options: _number(options, 'bandwidth_weight', 0.01, MAX_WEIGHT)
+    if 'bandwidth_priority' in options: _number(options, 'bandwidth_priority', -MAX_PRIORITY, MAX_PRIORITY, integer=True)
+    if options.get('time_budget') is not None:
+        budget = utils.parse_time_to_seconds(str(options['time_budget']))
+        if not budget: raise ValueError(f"invalid time_budget {options['time_budget']!r} (use MM:SS or seconds)")
+        options['time_budget'] = budget
+    return utils.build_advanced_opts(quality=quality, custom_args=custom_args, **options)
+
+def _audio_format(value):
+    fmt = value.strip().upper() if isinstance(value, str) else None
+    if fmt not in utils.AUDIO_CODECS: raise ValueError(f"unknown audio format {str(value).strip()!r} (one of {', '.join(utils.AUDIO_CODECS)})")
+    return fmt
+
+def _audio_output(entry, default_bitrate):
+    """'MP3', 'MP3:320' or ['MP3', 320] -> ('MP3', '320')."""
+    if isinstance(entry, str): fmt, _, bitrate = entry.partition(":")
+    elif isinstance(entry, (list, tuple)) and 1 <= len(entry) <= 2: fmt, bitrate = (list(entry) + [""])[:2]
+    else: raise ValueError(f"invalid audio output {entry!r}")
+    return _audio_format(fmt), _bitrate(bitrate or default_bitrate)
+
+def _bitrate(value):
+    # kbps, as in the GUI / CLI ("192", 320 or "320k")
+    text = str(value).strip().lower().removesuffix("k") if isinstance(value, (str, int)) and not isinstance(value, bool) else ""
+    if not text.isdigit() or not 8 <= int(text) <= 1536: raise ValueError(f"invalid audio bitrate {value!r} (kbps, 8-1536)")
+    return text
+
+def _number(options, key, low, high, integer=False):
+    value = options[key]
+    kinds = int if integer else (int, float)
+    # "not low <= value" also catches NaN
+    if isinstance(value, bool) or not isinstance(value, kinds) or not low <= value <= high:
+        raise ValueError(f"'{key}' must be {'an integer' if integer else 'a number'} from {low} to {high}")
+
+class JobRecord:
+    """What the daemon reports about one job, or about a playlist / URL batch being expanded into jobs."""
+    __slots__ = ('id', 'kind', 'url', 'folder', 'quality', 'parent', 'job', 'run',
+                 'status', 'error', 'progress', 'created_at', 'finished_at')
+
+    def __init__(self, kind, url, folder, quality, parent=None):
+        self.id = None
+        self.kind = kind          # 'job', 'playlist' or 'batch'
+        self.url = url
+        self.folder = folder
+        self.quality = quality
+        self.parent = parent      # playlist / batch record id of an entry
+        self.job = None           # DownloadJob
+        self.run = None           # PlaylistRun
+        self.status = ""          # latest status line
+        self.error = None
+        self.progress = None      # latest coalesced progress sample (dict)
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def state(self):
+        if self.run:
+            if not self.run.is_done: return 'running'
+            if self.run.error: return 'error'
+            return 'cancelled' if self.run.cancelled else 'done'
+        return self.job.state if self.job else 'queued'
+
+    @property
+    def finished(self): return self.state in FINISHED_STATES
+
+    def to_dict(self):
+        d = {'id': self.id, 'kind': self.kind, 'url': self.url, 'folder': self.folder,
+             'quality': self.job.quality if self.job else self.quality, 'state': self.state,
+             'status': self.status, 'error': self.error, 'progress': self.progress, 'parent': self.parent,
+             'created_at': self.created_at, 'finished_at': self.finished_at}
+        if self.job: d['file'] = self.job.active_file_prefix
+        if self.run:
+            d.update(total=self.run.total, discovered=self.run.discovered, completed=self.run.finished, failed=self.run.failed,
+                     duplicates=self.run.duplicates)
+            d['error'] = d['error'] or self.run.error
+        return d
+
+class EventLog:
+    """
+    Numbered events for the SSE streams. publish() appends to a bounded deque
+    and wakes every waiting client. Clients remember the last number they saw,
+    so a reconnect with Last-Event-ID carries on where it stopped (as long as
+    the backlog still reaches back that far).
+    """
+    def __init__(self, size=None):
+        self._events = deque(maxlen=size or config.DAEMON_EVENT_BACKLOG)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def last(self):
+        with self._cond: return self._seq
+
+    def publish(self, kind, data):
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, kind, data))
+            self._cond.notify_all()
+
+    def since(self, seq, timeout):
+        """Events numbered after `seq`, waiting up to `timeout` seconds for one if there are none yet."""
+        with self._cond:
+            if self._seq <= seq: self._cond.wait(timeout)
+            missing = min(self._seq - seq, len(self._events))
+            return list(self._events)[len(self._events) - missing:] if missing > 0 else []
+
+class JobService:
+    """
+    The daemon's state around one DownloadManager: a record per submitted job,
+    callbacks that turn the manager's status/finish/error reports into events,
+    and a pump that forwards coalesced progress (ProgressBus) at PROGRESS_UI_HZ.
+    """
+    def __init__(self, manager, output_dir):
+        self.manager = manager
+        self.output_dir = os.path.realpath(output_dir)
+        self.events = EventLog()
+        self.bus = ProgressBus()
+        self.records = {}       # id -> JobRecord, in submission order
+        self._closed = set()    # finished records whose progress history can go
+        # Held while a record gets its id, so its first callbacks can't publish without one
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        threading.Thread(target=self._pump_progress, daemon=True, name="daemon-progress").start()
+
+    # --- Queries ---
+    def get(self, record_id):
+        with self._lock: record = self.records.get(record_id)
+        if record is None: raise LookupError(f"no job {record_id!r}")
+        return record
+
+    def list(self, record_id=None):
+        with self._lock:
+            records = [r for r in self.records.values() if record_id in (None, r.id, r.parent)]
+            return [r.to_dict() for r in reversed(records)]
+
+    def health(self):
+        counts = {}
+        with self._lock:
+            for r in self.records.values(): counts[r.state] = counts.get(r.state, 0) + 1
+        return {'jobs': counts, 'workers': self.manager.max_workers, 'output': self.output_dir}
+
+    # --- Submission ---
+    def submit(self, body):
+        """
+        Queues the download(s) of a POST /api/jobs body and returns their records:
+          {"url": "..." | "urls": [...] | "text": "pasted text with links",
+           "quality": "720p Limit" | "auto" | ..., "name": "custom file name",
+           "folder": "sub-folder of the output dir", "playlist": false,
+           "options": {build_advanced_opts() keywords, "power_args": [...]}}
+        Links are deduplicated by video; several of them become one 'batch' record
+        whose entries are prefetched in parallel. Everything is validated before
+        anything is queued (ValueError).
+        """
+        for field in ('url', 'text', 'quality', 'name', 'folder'):
+            if body.get(field) is not None and not isinstance(body[field], str):
+                raise ValueError(f"'{field}' must be a string")
+        if not isinstance(body.get('playlist', False), bool): raise ValueError("'playlist' must be true or false")
+        urls = body.get('urls') or ([body['url']] if body.get('url') else [])
+        if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+            raise ValueError("'urls' must be a list of strings")
+        urls, _ = utils.parse_url_list("\n".join(urls + [body.get('text') or ""]), canonicalize=not body.get('playlist'))
+        if not urls: raise ValueError("'url', 'urls' or 'text' with at least one link is required")
+        quality = body.get('quality') or config.DEFAULT_QUALITY
+        if quality.lower() == "auto": quality = config.AUTO_QUALITY
+        name = (body.get('name') or "").strip()
+        if name and len(urls) > 1: raise ValueError("'name' only works with a single URL")
+        path = self._folder(body.get('folder'))
+        self._check_name(name, path)
+        advanced_opts = build_job_opts(quality, body.get('options'))
+        os.makedirs(path, exist_ok=True)
+
+        if body.get('playlist'):
+            return [self._start_run('playlist', url, path, quality, advanced_opts) for url in urls]
+        if len(urls) > 1: return [self._start_run('batch', urls, path, quality, advanced_opts)]
+        return [self._start_job(urls[0], path, quality, name, advanced_opts)]
+
+    def _folder(self, folder):
+        path = os.path.realpath(os.path.join(self.output_dir, folder or ""))
+        if os.path.commonpath([path, self.output_dir]) != self.output_dir:
+            raise ValueError("'folder' must stay inside the output directory")
+        return path
+
+    @staticmethod
+    def _check_name(name, path):
+        # The name ends up in yt-dlp's outtmpl: no folders, and no %(field)s templates
+        if not name: return
+        if any(c in name for c in '/\\%\0') or '..' in name:
+            raise ValueError("'name' must be a plain file name (no '/', '\\', '..' or '%')")
+        target = os.path.realpath(os.path.join(path, name))
+        if os.path.commonpath([target, path]) != path or target == path:
+            raise ValueError("'name' must stay inside the output folder")
+
+    def _start_job(self, url, path, quality, name, advanced_opts):
+        record = JobRecord('job', url, path, quality)
+        with self._lock:
+            record.job = self.manager.start_download(url=url, path=path, quality=quality, custom_name=name,
+                                                     advanced_opts=dict(advanced_opts), **self._callbacks(record))
+            record.id = record.job.uid
+            self._register(record)
+        return record
+
+    def _start_run(self, kind, url, path, quality, advanced_opts):
+        """A playlist (`url` is its link) or a batch (`url` is the list) expanded by the manager."""
+        record = JobRecord(kind, url, path, quality)
+        record.id = uuid.uuid4().hex
+
+        def make_callbacks(entry):
+            child = JobRecord('job', entry['url'], path, quality, parent=record.id)
+            def queued(job):
+                with self._lock:
+                    child.job = job
+                    child.id = job.uid
+                    self._register(child)
+            return dict(self._callbacks(child), job_callback=queued)
+
+        start = self.manager.start_playlist if kind == 'playlist' else self.manager.start_batch
+        with self._lock:
+            record.run = start(url, path, quality, advanced_opts, make_callbacks)
+            self._register(record)
+        return record
+
+    def recover(self, resume=False):
+        """Lists the jobs the journal left unfinished (paused) and optionally resumes them."""
+        pending = []
+        def make_callbacks(rec):
+            record = JobRecord('job', rec['url'], rec['path'], rec['quality'])
+            record.id = rec['uid']
+            pending.append(record)
+            return self._callbacks(record)
+
+        jobs = self.manager.recover_jobs(make_callbacks)
+        with self._lock:
+            for record, job in zip(pending, jobs):
+                record.job = job
+                self._register(record)
+        if resume:
+            for job in jobs: self.manager.resume(job)
+        return jobs
+
+    def _register(self, record):
+        self.records[record.id] = record
+        finished = [r.id for r in self.records.values() if r.finished_at]
+        for old in finished[:max(0, len(finished) - config.DAEMON_KEEP_FINISHED)]: del self.records[old]
+        self._publish('job', record)
+
+    # --- Control ---
+    def control(self, record_id, action):
+        """pause / resume / cancel. LookupError for an unknown id, ConflictError if the state doesn't allow it."""
+        record = self.get(record_id)
+        if record.run:
+            if action != 'cancel': raise ConflictError(f"a {record.kind} can only be cancelled (control its entries instead)")
+            if record.finished: raise ConflictError(f"{record.kind} is already {record.state}")
+            record.run.cancel()
+        else:
+            job, state = record.job, record.job.state
+            if action == 'pause':
+                if state not in ('queued', 'running'): raise ConflictError(f"can't pause a {state} job")
+                job.pause()
+            elif action == 'resume':
+                if state != 'paused': raise ConflictError(f"can't resume a {state} job")
+                record.error = None
+                self.manager.resume(job)
+            elif state == 'paused':
+                # No worker owns a paused job: clean up its partials right here (finish_callback ends the record)
+                record.status = self.manager.manual_cleanup(job)
+            elif state in ('queued', 'running', 'processing'):
+                job.cancel()
+            else:
+                raise ConflictError(f"can't cancel a {state} job")
+        self._publish('state', record)
+        return record
+
+    def shutdown(self, timeout=10.0):
+        """Pauses what is still downloading (the journal brings it back next start) and stops the pump."""
+        for job in self.manager.active_jobs(): job.pause()
+        deadline = time.monotonic() + timeout
+        while self.manager.active_jobs() and time.monotonic() < deadline: time.sleep(0.1)
+        self._stop.set()
+        self.manager.journal.close()
+
+    # --- Events ---
+    def _callbacks(self, record):
+        def status(msg, color):
+            record.status = msg
+            self._publish('status', record)
+        def finish(success):
+            if record.state == 'done':
+                record.status = "Done."
+                # The last coalesced sample may predate the final tick
+                if record.progress: record.progress = dict(record.progress, downloaded=record.progress['total'] or
+                                                            record.progress['downloaded'], eta=0, percent=100.0)
+            self._finished(record)
+        def error(msg):
+            record.error = msg.strip()
+            self._finished(record)
+        return {'progress_callback': self.bus.sink(record), 'status_callback': status,
+                'finish_callback': finish, 'error_callback': error}
+
+    def _finished(self, record):
+        # finish_callback(False) also reports a pause, which isn't the end of the job
+        if record.finished and not record.finished_at: record.finished_at = time.time()
+        with self._lock: self._closed.add(record)
+        self._publish('state', record)
+
+    def _publish(self, kind, record):
+        if record.id is None: return  # entry skipped before it was queued (duplicate video)
+        with self._lock: data = record.to_dict()
+        self.events.publish(kind, data)
+
+    def _pump_progress(self):
+        interval = 1.0 / config.PROGRESS_UI_HZ
+        while not self._stop.wait(interval):
+            for record, snap in self.bus.drain().items():
+                record.progress = {'downloaded': snap.downloaded, 'total': snap.total, 'speed': int(snap.speed),
+                                   'eta': round(snap.eta) if snap.eta is not None else None,
+                                   'percent': round(snap.percent, 1)}
+                self.events.publish('progress', {'id': record.id, 'parent': record.parent, **record.progress})
+            with self._lock:
+                closed, self._closed = self._closed, set()
+                expanding = [r for r in self.records.values() if r.run and not r.finished_at]
+            for record in closed: self.bus.forget(record)
+            # PlaylistRun has no callback of its own; its end shows up in the counters
+            for record in expanding:
+                if record.finished: self._finished(record)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GameelYTDaemon'
+
+    def log_message(self, *args): pass
+
+    def do_GET(self): self._dispatch('GET')
+    def do_POST(self): self._dispatch('POST')
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        service = self.server.service
+        if not self._authorized(query): return self._send_json(401, {'error': "missing or wrong token"})
+        try:
+            m = JOB_PATH_RE.match(url.path)
+            if method == 'GET' and url.path == '/api/health':
+                self._send_json(200, service.health())
+            elif method == 'GET' and url.path == '/api/jobs':
+                self._send_json(200, service.list())
+            elif method == 'POST' and url.path == '/api/jobs':
+                records = service.submit(self._read_json())
+                self._send_json(201, [r.to_dict() for r in records])
+            elif method == 'GET' and url.path == '/api/events':
+                self._stream_events((query.get('job') or [None])[0])
+            elif m and method == 'GET' and not m.group('action'):
+                self._send_json(200, service.get(m.group('id')).to_dict())
+            elif m and method == 'POST' and m.group('action'):
+                self._send_json(200, service.control(m.group('id'), m.group('action')).to_dict())
+            else:
+                self._send_json(404, {'error': f"no route {method} {url.path}"})
+        except LookupError as e: self._send_json(404, {'error': e.args[0] if e.args else "not found"})
+        except ConflictError as e: self._send_json(409, {'error': str(e)})
+        except ValueError as e: self._send_json(400, {'error': str(e)})
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            self.close_connection = True  # client went away (e.g. an SSE stream closed)
+        except Exception as e:
+            print(f"Daemon request error ({method} {url.path}): {e}")
+            self._send_json(500, {'error': str(e)})
+
+    def _authorized(self, query):
+        token = self.server.token
+        if not token: return True
+        auth = self.headers.get('Authorization') or ""
+        given = auth[7:] if auth.startswith("Bearer ") else (query.get('token') or [""])[0]
+        return hmac.compare_digest(given.encode(), token.encode())
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > config.DAEMON_MAX_BODY: raise ValueError("request body too large")
+        try: body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e: raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(body, dict): raise ValueError("expected a JSON object")
+        return body
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self, record_id):
+        """SSE: a snapshot of the (filtered) job list, then every event until the client hangs up."""
+        service = self.server.service
+        if record_id: service.get(record_id)
+        last = self.headers.get('Last-Event-ID') or ""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')  # no length: the stream ends when the connection does
+        self.end_headers()
+        self.close_connection = True
+
+        seq = int(last) if last.isdigit() else None
+        # An id we never handed out (numbering restarts with the daemon): start from a snapshot
+        if seq is not None and seq > service.events.last: seq = None
+        while not self.server.stopping.is_set():
+            if seq is None:
+                seq = service.events.last
+                self._write_event(seq, 'snapshot', service.list(record_id))
+            events = service.events.since(seq, config.DAEMON_HEARTBEAT_SECONDS)
+            if events and events[0][0] > seq + 1:
+                seq = None  # fell behind the backlog: start over from a fresh snapshot
+                continue
+            for n, kind, data in events:
+                seq = n
+                if record_id in (None, data.get('id'), data.get('parent')): self._write_event(n, kind, data)
+            if not events: self.wfile.write(b": keep-alive\n\n")
+            self.wfile.flush()
+
+    def _write_event(self, seq, kind, data):
+        self.wfile.write(f"id: {seq}\nevent: {kind}\ndata: {json.dumps(data)}\n\n".encode())
+
+class DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service, host, port, token=""):
+        super().__init__((host, port), _Handler)
+        self.service = service
+        self.token = token
+        self.stopping = threading.Event()
+
+def is_loopback(host):
+    if host == "localhost": return True
+    try: return ipaddress.ip_address(host).is_loopback
+    except ValueError: return False
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="daemon.py", description="Download job service with an HTTP/JSON API (one warm process for every client).")
+    p.add_argument("--host", default=config.DAEMON_HOST, help=f"Address to listen on (default {config.DAEMON_HOST}).")
+    p.add_argument("--port", type=int, default=config.DAEMON_PORT, help=f"Port (default {config.DAEMON_PORT}).")
+    p.add_argument("--token", default=config.DAEMON_TOKEN,
+                   help="Shared secret clients send as 'Authorization: Bearer <token>'. Required unless --host is "
+                        "a loopback address. Default: $YTDL_DAEMON_TOKEN.")
+    p.add_argument("-o", "--output", default=os.path.join(os.path.expanduser("~"), "Desktop"),
+                   help="Save folder. Clients can only choose sub-folders of it.")
+    p.add_argument("-j", "--jobs", type=int, default=config.MAX_CONCURRENT_DOWNLOADS, help="Concurrent downloads.")
+    p.add_argument("-r", "--limit-rate", default=config.BANDWIDTH_TOTAL, metavar="RATE",
+                   help="Total speed limit shared by all downloads (e.g. 8M, 500K). 0 = unlimited.")
+    p.add_argument("--resume-unfinished", action="store_true",
+                   help="Resume the jobs the journal recorded as unfinished (otherwise they are listed as paused).")
+    p.add_argument("--archive", metavar="FILE", help=f"Download archive file (yt-dlp format). Default: {config.ARCHIVE_PATH}")
+    p.add_argument("--metrics-jsonl", metavar="FILE", help=f"Per-job timing records (JSON lines). Default: {config.METRICS_JSONL_PATH}")
+    p.add_argument("--metrics-prom", metavar="FILE", help=f"Prometheus text file with totals. Default: {config.METRICS_PROM_PATH}")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.token and not is_loopback(args.host):
+        print(f"Refusing to listen on {args.host} without --token (anyone reaching it could write to {args.output}).",
+              file=sys.stderr)
+        return 2
+    if not utils.is_ffmpeg_installed():
+        print("Warning: FFmpeg not found. Merging, audio conversion and clipping will fail.", file=sys.stderr)
+    os.makedirs(args.output, exist_ok=True)
+
+    manager = DownloadManager(max_workers=max(1, args.jobs), archive=DownloadArchive(args.archive),
+                              bandwidth=BandwidthScheduler(args.limit_rate),
+                              metrics=MetricsSink(args.metrics_jsonl, args.metrics_prom))
+    service = JobService(manager, args.output)
+    recovered = service.recover(resume=args.resume_unfinished)
+    try:
+        server = DaemonServer(service, args.host, args.port, args.token)
+    except OSError as e:
+        print(f"Can't listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 1
+    # The first request shouldn't pay for importing yt-dlp
+    threading.Thread(target=manager.ydl_pool.warm, daemon=True, name="ydl-warmup").start()
+
+    print(f"Listening on http://{args.host}:{server.server_address[1]} (saving to {service.output_dir})")
+    if recovered:
+        print(f"{'Resuming' if args.resume_unfinished else 'Listed as paused'}: {len(recovered)} unfinished job(s) from the journal.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down (running downloads are paused)...", file=sys.stderr)
+    finally:
+        server.stopping.set()
+        server.server_close()
+        service.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+from collections import Counter
+import config
+
+# Sidecar files never count as a name collision
+IGNORED_SIDECARS = ('.webp', '.jpg', '.png', '.description', '.info.json', '.txt')
+
+class _DirState:
+    __slots__ = ('prefixes', 'files', 'scanned_at', 'mtime_ns')
+
+    def __init__(self):
+        self.prefixes = Counter()  # "name" -> how many counting files match "name.*"
+        self.files = set()
+        self.scanned_at = 0.0
+        self.mtime_ns = None
+
+class DirectoryIndex:
+    """
+    In-memory view of output folders for collision checks.
+    Each folder is read once with a single os.scandir pass. Every file
+    "A.B.C" registers the prefixes "A" and "A.B", which is exactly what the
+    old glob("A.*") matched, so is_taken() becomes a dict lookup.
+    Jobs report the files they create/remove; a folder is rescanned only when
+    its mtime changed and the snapshot is older than DIR_INDEX_REFRESH_SECONDS
+    (covers files added by other programs).
+    """
+    def __init__(self, refresh_after=None):
+        self.refresh_after = config.DIR_INDEX_REFRESH_SECONDS if refresh_after is None else refresh_after
+        self._dirs = {}
+        self._reserved = set()  # (dir_key, name_key) held by running jobs
+        self._lock = threading.RLock()
+
+    # --- Queries ---
+    def is_taken(self, path, name, ext=None):
+        dir_key, name_key = self._key(path), os.path.normcase(name)
+        with self._lock:
+            if (dir_key, name_key) in self._reserved: return True
+            if self._state(path, dir_key).prefixes[name_key] > 0: return True
+        # Cheap stat on the likely names in case the snapshot is stale
+        if ext:
+            base = os.path.join(path, f"{name}.{ext}")
+            if os.path.exists(base) or os.path.exists(base + ".part"): return True
+        return False
+
+    # --- Reservations ---
+    def reserve(self, path, name):
+        with self._lock: self._reserved.add((self._key(path), os.path.normcase(name)))
+
+    def release(self, path, name):
+        with self._lock: self._reserved.discard((self._key(path), os.path.normcase(name)))
+
+    # --- Updates from jobs ---
+    def add(self, filepath):
+        path, fname = os.path.split(filepath)
+        dir_key = self._key(path)
+        with self._lock:
+            state = self._dirs.get(dir_key)
+            if state is None: return  # never scanned, will be read fresh when needed
+            self._insert(state, os.path.normcase(fname))
+
+    def discard(self, filepath):
+        path, fname = os.path.split(filepath)
+        dir_key = self._key(path)
+        with self._lock:
+            state = self._dirs.get(dir_key)
+            if state is None: return
+            fname = os.path.normcase(fname)
+            if fname not in state.files: return
+            state.files.discard(fname)
+            if not fname.lower().endswith(IGNORED_SIDECARS):
+                for prefix in self._prefixes(fname):
+                    state.prefixes[prefix] -= 1
+                    if state.prefixes[prefix] <= 0: del state.prefixes[prefix]
+
+    def rename(self, src, dst):
+        self.discard(src)
+        self.add(dst)
+
+    # --- Internals ---
+    def _key(self, path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def _state(self, path, dir_key):
+        state = self._dirs.get(dir_key)
+        now = time.monotonic()
+        if state is not None and now - state.scanned_at < self.refresh_after: return state
+        try: mtime_ns = os.stat(path).st_mtime_ns
+        except OSError: mtime_ns = None
+        if state is not None and state.mtime_ns == mtime_ns:
+            state.scanned_at = now
+            return state
+
+        state = _DirState()
+        state.mtime_ns = mtime_ns
+        state.scanned_at = now
+        try:
+            with os.scandir(path) as it:
+                for entry in it: self._insert(state, os.path.normcase(entry.name))
+        except OSError:
+            pass  # folder doesn't exist yet: nothing is taken
+        self._dirs[dir_key] = state
+        return state
+
+    def _insert(self, state, fname):
+        if fname in state.files: return
+        state.files.add(fname)
+        if fname.lower().endswith(IGNORED_SIDECARS): return
+        for prefix in self._prefixes(fname): state.prefixes[prefix] += 1
+
+    @staticmethod
+    def _prefixes(fname):
+        i = fname.find('.')
+        while i > 0:
+            yield fname[:i]
+            i = fname.find('.', i + 1)
@@ -0,0 +1,76 @@
+import os
+import shutil
+import threading
+import config
+from utils import AUDIO_CODECS
+
+# Rough output bitrates of the lossless audio targets (lossy ones use the chosen bitrate)
+LOSSLESS_KBPS = {'wav': 1411, 'flac': 900}
+
+def peak_footprint(download, merge=False, clip=False, audio_outputs=None, seconds=0):
+    """
+    Most bytes a job has on disk at once. A merge writes the output while both
+    streams still exist, a smart cut writes the trimmed copy next to the source
+    and audio conversion writes every output next to the download.
+    """
+    extra = download if (merge or clip) else 0
+    audio = 0
+    for fmt, bitrate in audio_outputs or []:
+        codec = AUDIO_CODECS.get(fmt, 'mp3')
+        kbps = LOSSLESS_KBPS.get(codec) or int(bitrate or 192)
+        audio += kbps * 1000 / 8 * seconds
+    return int((download + max(extra, audio)) * config.DISK_ESTIMATE_FACTOR)
+
+def _existing(path):
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path: break
+        path = parent
+    return path
+
+class _Reservation:
+    __slots__ = ('volume', 'peak', 'written')
+
+    def __init__(self, volume, peak):
+        self.volume = volume
+        self.peak = peak
+        self.written = 0  # bytes the job has downloaded so far (already gone from free space)
+
+    @property
+    def outstanding(self): return max(0, self.peak - self.written)
+
+class DiskBudget:
+    """
+    Admission control for disk space. Each job reserves its estimated peak
+    footprint on the volume of its output folder before it starts. A job is
+    admitted when free space minus DISK_MIN_FREE covers its peak plus what the
+    running jobs on that volume still have to write. What a job already wrote
+    shows up in free space, so progress() shrinks its outstanding reservation.
+    """
+    def __init__(self, min_free=None):
+        self.min_free = config.DISK_MIN_FREE if min_free is None else min_free
+        self._reservations = {}
+        self._lock = threading.Lock()
+
+    def admit(self, key, path, nbytes):
+        """
+        Returns (verdict, available bytes): 'ok' (reserved), 'wait' (fits once the
+        running jobs are done) or 'never' (doesn't fit even on an otherwise idle volume).
+        """
+        path = _existing(path)
+        volume = os.stat(path).st_dev
+        usable = shutil.disk_usage(path).free - self.min_free
+        with self._lock:
+            pending = sum(r.outstanding for k, r in self._reservations.items() if r.volume == volume and k != key)
+            if nbytes > usable: return 'never', max(0, usable)
+            if nbytes > usable - pending: return 'wait', max(0, usable - pending)
+            self._reservations[key] = _Reservation(volume, nbytes)
+            return 'ok', usable - pending
+
+    def progress(self, key, written):
+        reservation = self._reservations.get(key)
+        if reservation: reservation.written = written
+
+    def release(self, key):
+        with self._lock: return self._reservations.pop(key, None) is not None
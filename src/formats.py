@@ -0,0 +1,71 @@
+# formats.py
+# Compact per-format table kept in the metadata cache, and the size / time
+# estimates built from it (quality menu, CLI listing, "Auto" quality).
+import re
+from utils import format_bytes, format_seconds
+
+# Everything yt-dlp's format selector needs for our quality specs, plus what we display.
+# 'url' stays so the clip estimate can probe keyframes without a second extraction.
+FORMAT_FIELDS = ('format_id', 'ext', 'protocol', 'vcodec', 'acodec', 'width', 'height', 'fps',
+                 'tbr', 'vbr', 'abr', 'filesize', 'filesize_approx', 'url')
+
+def compact_format(f):
+    return {k: f[k] for k in FORMAT_FIELDS if f.get(k) is not None}
+
+def estimate_size(fmt, duration=None):
+    """Bytes for one format (or a merged selection): exact size, yt-dlp's estimate, else bitrate x duration."""
+    if fmt.get('requested_formats'):
+        sizes = [estimate_size(f, duration) for f in fmt['requested_formats']]
+        return None if None in sizes else sum(sizes)
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if not size and fmt.get('tbr') and duration: size = fmt['tbr'] * 1000 / 8 * duration
+    return int(size) if size else None
+
+def quality_label(height):
+    """GUI/CLI label for a video height (get_quality_opts() reads the number back)."""
+    if height == 2160: return "2160p (4K)"
+    if height == 1440: return "1440p (2K)"
+    return f"{height}p"
+
+def quality_labels(info):
+    """Quality choices for a video, best first: one per height (just "Best" if none are known), then Audio Only."""
+    return ([quality_label(r) for r in info.get('resolutions') or []] or ["Best"]) + ["Audio Only"]
+
+def pick_for_budget(estimates, budget_seconds, speed):
+    """
+    Best video quality whose estimated download fits `budget_seconds` at
+    `speed` bytes/s. `estimates` is [(label, bytes or None)] best first.
+    Falls back to the smallest known video option when nothing fits, to the
+    best one up to 1080p (the default quality) when no speed is known yet, and
+    to the best option when no sizes are known at all.
+    """
+    options = [label for label, _ in estimates if label != "Audio Only"]
+    videos = [(label, size) for label, size in estimates if size and label != "Audio Only"]
+    if not videos: return options[0] if options else None
+    if not speed:
+        height = lambda label: int(re.match(r'\d*', label).group() or 0)
+        return next((label for label, _ in videos if height(label) <= 1080), videos[-1][0])
+    for label, size in videos:
+        if size / speed <= budget_seconds: return label
+    return min(videos, key=lambda v: v[1])[0]
+
+def describe_estimate(size, speed=None):
+    """'~85.2 MB' or '~85.2 MB, ~01:10' when a link speed is known."""
+    if not size: return "size unknown"
+    text = f"~{format_bytes(size)}"
+    if speed: text += f", ~{format_seconds(size / speed)}"
+    return text
+
+def format_table(info):
+    """Plain-text table of the compact formats (CLI --list-qualities)."""
+    duration = info.get('duration')
+    rows = [("ID", "EXT", "RES", "VCODEC", "ACODEC", "KBPS", "SIZE")]
+    for f in info.get('formats') or []:
+        res = f"{f.get('width', '?')}x{f['height']}" if f.get('height') else "audio" if f.get('vcodec') == 'none' else "?"
+        size = estimate_size(f, duration)
+        approx = "" if f.get('filesize') else "~"
+        rows.append((f.get('format_id', '?'), f.get('ext', '?'), res,
+                     (f.get('vcodec') or '?').split('.')[0], (f.get('acodec') or '?').split('.')[0],
+                     f"{f['tbr']:.0f}" if f.get('tbr') else "", approx + format_bytes(size) if size else ""))
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip() for r in rows)
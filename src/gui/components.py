@@ -38,6 +38,10 @@ class TimeClipper(ttk.LabelFrame):
         self.scale_end = ttk.Scale(self, from_=0, to=100, command=lambda v: self._sync_text(v, 'end'))
         self.scale_end.grid(row=1, column=2, sticky="ew", padx=10)
 
+        # Cost estimate for the current range (filled in by the main window)
+        self.note_label = ttk.Label(self, text="", foreground="#777")
+        self.note_label.grid(row=2, column=0, columnspan=3, sticky="w", padx=5)
+
     def set_duration(self, duration_seconds):
         self.video_duration = duration_seconds
         if duration_seconds > 0:
@@ -54,6 +58,9 @@ class TimeClipper(ttk.LabelFrame):
         self._sync_text(0, 'start')
         self._sync_text(self.video_duration, 'end')
 
+    def set_note(self, text):
+        self.note_label.configure(text=text)
+
     def get_times(self):
         return self.entry_start.get().strip(), self.entry_end.get().strip()
     
@@ -0,0 +1,224 @@
+# gui/history.py
+import math
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+from concurrent.futures import ThreadPoolExecutor
+import config
+import utils
+from history import JobHistory, thumbnail_url
+from gui.thumbnails import ThumbnailCache
+
+STATE_COLORS = {
+    'done': "green", 'error': "red", 'cancelled': "#999", 'skipped': "#999",
+    'running': "#1976d2", 'processing': "#1976d2", 'queued': "#555", 'paused': "orange", 'stopped': "orange",
+}
+
+class _Slot:
+    """Canvas items of one on-screen row; re-bound to another job when the list scrolls."""
+    __slots__ = ('bg', 'image', 'title', 'detail')
+
+class HistoryPanel(ttk.Frame):
+    """
+    Virtualised list of every job in the journal, newest first. The canvas
+    holds one set of items (background, thumbnail, two text lines) per row
+    that fits on screen; scrolling only re-binds those items to other jobs, so
+    100 000 jobs cost no more canvas items than ten. Thumbnails are resolved
+    and fetched for visible rows only (in the background), decoded when drawn,
+    and their PhotoImages are dropped once the rows scroll away.
+    """
+    def __init__(self, parent, journal, metadata_cache=None, on_open=None):
+        super().__init__(parent)
+        self.journal = journal
+        self.metadata_cache = metadata_cache
+        self.on_open = on_open  # called with the job's URL on double-click
+        self.model = JobHistory()
+        self.row_h = config.HISTORY_ROW_HEIGHT
+        self.thumbs = ThumbnailCache(width=config.HISTORY_THUMB_WIDTH)
+        self._fetcher = ThreadPoolExecutor(max_workers=config.HISTORY_THUMB_WORKERS, thread_name_prefix="history-thumbs")
+        self._thumb_urls = {}    # job URL -> thumbnail URL (None: there is none)
+        self._pending = set()    # job URLs whose thumbnail is being fetched
+        self._visible = set()    # job URLs on screen (read by the fetch threads)
+        self._slots = []
+        self._top = 0.0          # index of the first visible row (fractional while scrolling)
+        self._selected = None    # uid
+        self._polling = False
+        self._loading = False
+        self._loaded = False     # first journal read done
+
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.empty_text = self.canvas.create_text(10, 10, anchor=tk.NW, text="", fill="#888", font=config.FONT_MAIN)
+
+        self.canvas.bind('<Configure>', lambda e: self._layout())
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<Double-Button-1>', self._on_double_click)
+        self.canvas.bind('<MouseWheel>', self._on_wheel)              # Windows / macOS
+        self.canvas.bind('<Button-4>', self._on_wheel)                # X11
+        self.canvas.bind('<Button-5>', self._on_wheel)
+
+    # --- Journal polling ---
+    def start(self):
+        """Follows the journal while the panel is shown."""
+        if self._polling: return
+        self._polling = True
+        self._poll()
+
+    def stop(self):
+        self._polling = False
+
+    def _poll(self):
+        if not self._polling: return
+        if not self._loading:
+            # SQLite reads happen off the Tk thread; merging (cheap) happens on it
+            self._loading = True
+            threading.Thread(target=self._load, args=(self.model.synced_until,), daemon=True, name="history-load").start()
+        self.after(config.HISTORY_POLL_MS, self._poll)
+
+    def _load(self, since):
+        try: rows = self.journal.load_history(since, limit=self.model.max_rows)
+        except Exception as e:
+            print(f"History load error: {e}")
+            rows = []
+        self.after(0, self._apply, rows)
+
+    def _apply(self, rows):
+        self._loading = False
+        version = self.model.version
+        added = self.model.merge(rows)
+        # New jobs go on top: keep the rows the user scrolled to where they are
+        if added and self._top > 0: self._top += added
+        if self.model.version != version or not self._loaded:
+            self._loaded = True
+            self._redraw()
+
+    # --- Layout / Drawing ---
+    def _visible_rows(self):
+        return max(1, self.canvas.winfo_height()) / self.row_h
+
+    def _layout(self):
+        """Keeps exactly one slot per row that can be on screen (+1 for the partly scrolled one)."""
+        needed = math.ceil(self._visible_rows()) + 1
+        while len(self._slots) < needed:
+            slot = _Slot()
+            slot.bg = self.canvas.create_rectangle(0, 0, 0, 0, outline="", fill="white")
+            slot.image = self.canvas.create_image(6, 0, anchor=tk.NW)
+            slot.title = self.canvas.create_text(0, 0, anchor=tk.NW, font=config.FONT_BOLD, fill=config.COLOR_TEXT_PRIMARY)
+            slot.detail = self.canvas.create_text(0, 0, anchor=tk.NW, font=config.FONT_MAIN)
+            self._slots.append(slot)
+        while len(self._slots) > needed:
+            slot = self._slots.pop()
+            for item in (slot.bg, slot.image, slot.title, slot.detail): self.canvas.delete(item)
+        self._scroll_to(self._top)
+
+    def _redraw(self):
+        n = len(self.model)
+        self.canvas.itemconfigure(self.empty_text, text="" if n else "No downloads yet." if self._loaded else "Loading history...")
+        width = self.canvas.winfo_width()
+        text_x = config.HISTORY_THUMB_WIDTH + 14
+        first = int(self._top)
+        offset = (self._top - first) * self.row_h
+        visible = set()
+        for k, slot in enumerate(self._slots):
+            i = first + k
+            items = (slot.bg, slot.image, slot.title, slot.detail)
+            if i >= n:
+                for item in items: self.canvas.itemconfigure(item, state='hidden')
+                continue
+            row = self.model.row(i)
+            y = k * self.row_h - offset
+            for item in items: self.canvas.itemconfigure(item, state='normal')
+            fill = "#e3f2fd" if row.uid == self._selected else ("white" if i % 2 else "#f7f7f7")
+            self.canvas.coords(slot.bg, 0, y, width, y + self.row_h)
+            self.canvas.itemconfigure(slot.bg, fill=fill)
+            self.canvas.coords(slot.image, 6, y + (self.row_h - 45) // 2)
+            self.canvas.itemconfigure(slot.image, image=self._photo_for(row.url) or "")
+            self.canvas.coords(slot.title, text_x, y + 8)
+            self.canvas.itemconfigure(slot.title, text=self._title(row, width - text_x))
+            self.canvas.coords(slot.detail, text_x, y + 30)
+            self.canvas.itemconfigure(slot.detail, text=self._detail(row), fill=STATE_COLORS.get(row.state, "#555"))
+            visible.add(row.url)
+        self._visible = visible
+        self.thumbs.retain({self._thumb_urls.get(url) for url in visible})
+        self._update_scrollbar()
+
+    @staticmethod
+    def _title(row, pixels):
+        title = row.title or row.url
+        limit = max(10, pixels // 8)  # rough average glyph width of FONT_BOLD
+        return title if len(title) <= limit else title[:limit - 1] + "…"
+
+    @staticmethod
+    def _detail(row):
+        if row.state in ('running', 'paused', 'stopped') and row.total:
+            size = f"{row.downloaded / row.total * 100:.0f}% of {utils.format_bytes(row.total)}"
+        else:
+            size = utils.format_bytes(row.total or row.downloaded) if (row.total or row.downloaded) else ""
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(row.created_at))
+        return "  ·  ".join(p for p in (row.state.capitalize(), size, when) if p)
+
+    # --- Thumbnails ---
+    def _photo_for(self, url):
+        thumb = self._thumb_urls.get(url, False)
+        if thumb is None: return None                    # no thumbnail for this job
+        photo = self.thumbs.photo(thumb) if thumb else None
+        if photo is None and url not in self._pending:   # not resolved yet, or its PNG was trimmed
+            self._pending.add(url)
+            self._fetcher.submit(self._fetch_thumb, url)
+        return photo
+
+    def _fetch_thumb(self, url):
+        # Fetch thread. Rows scrolled away before their turn are skipped (and retried if they come back)
+        thumb = path = False
+        try:
+            if url not in self._visible: return
+            thumb = self._thumb_urls.get(url) or thumbnail_url(url, self.metadata_cache)
+            path = self.thumbs.fetch(thumb) if thumb else None
+        except Exception as e:
+            print(f"History thumbnail error: {e}")
+            path = None
+        finally:
+            self.after(0, self._thumb_ready, url, thumb, path)
+
+    def _thumb_ready(self, url, thumb, path):
+        self._pending.discard(url)
+        if thumb is False: return
+        self._thumb_urls[url] = thumb if path else None
+        if path and url in self._visible: self._redraw()
+
+    # --- Scrolling / Input ---
+    def _scroll_to(self, top):
+        self._top = min(max(0.0, top), max(0.0, len(self.model) - self._visible_rows()))
+        self._redraw()
+
+    def _update_scrollbar(self):
+        n = len(self.model)
+        if not n: return self.scrollbar.set(0, 1)
+        self.scrollbar.set(self._top / n, min(1.0, (self._top + self._visible_rows()) / n))
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self._scroll_to(float(amount) * len(self.model))
+        elif action == 'scroll':
+            step = int(self._visible_rows()) if unit == 'pages' else 1
+            self._scroll_to(self._top + int(amount) * step)
+
+    def _on_wheel(self, event):
+        up = event.num == 4 or getattr(event, 'delta', 0) > 0
+        self._scroll_to(self._top + (-3 if up else 3))
+
+    def _row_at(self, y):
+        i = int(self._top + y / self.row_h)
+        return self.model.row(i) if 0 <= i < len(self.model) else None
+
+    def _on_click(self, event):
+        row = self._row_at(event.y)
+        self._selected = row.uid if row else None
+        self._redraw()
+
+    def _on_double_click(self, event):
+        row = self._row_at(event.y)
+        if row and self.on_open: self.on_open(row.url)
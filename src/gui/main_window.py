@@ -1,30 +1,43 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import os
-import requests
-from PIL import Image, ImageTk
-from io import BytesIO
 import threading
 
 # Imports from root
 import config
 import utils
+import formats
 from logic import DownloadManager
+from progress import ProgressBus
 
 # Import from our new module
 from gui.components import TimeClipper
+from gui.thumbnails import ThumbnailCache
+from gui.history import HistoryPanel
+from gui.preview import PreviewController
 
 class YTDLPGui:
-    def __init__(self, root):
+    def __init__(self, root, startup_warnings=True):
         self.root = root
+        self.startup_warnings = startup_warnings
         self.logic = DownloadManager()
+        self.thumbnails = ThumbnailCache()
+        self.progress_bus = ProgressBus()
+        self._progress_key = 0
         
         self.current_image = None 
+        self._thumb_pending = False  # preview thumbnail still on its way (it may arrive before or after the metadata)
         self.active_custom_args = [] 
         
         # State Tracking
-        self.resume_args = None
+        self.current_job = None
         self.is_paused = False
+        self._clip_estimate_after = None
+        self._clip_estimate_gen = 0
+        self.size_estimates = []  # [(quality label, bytes)] for the previewed video, best first
+        self.link_speed = None
+        self.batches = []         # PlaylistRun handles of pasted / imported URL lists still running
+        self.history_window = None  # Toplevel with the HistoryPanel, built on first open
 
         self.root.title(config.WINDOW_TITLE)
         self.root.geometry("600x800")
@@ -32,23 +45,91 @@ class YTDLPGui:
         self.style = ttk.Style()
         self.style.theme_use('clam')
         
-        # --- FEATURE 1: FFmpeg Check on Startup ---
-        self._check_ffmpeg()
-        
         self._build_ui()
+        self.preview = PreviewController(self.root, self.logic, self.thumbnails, on_start=self._preview_started,
+                                         on_info=self._show_preview_info, on_thumbnail=self._show_preview_thumbnail,
+                                         on_failed=self._preview_failed)
+        self._pump_progress()
+        self._recover_unfinished()
+
+        # Heavy imports (yt_dlp, PIL, requests) + FFmpeg check run after first paint
+        self.warmup_done = threading.Event()
+        self.root.after(config.STARTUP_WARMUP_DELAY_MS, self._start_background_init)
+
+    def _job_callbacks(self):
+        """Callbacks for a new job; progress goes to a fresh ProgressBus key."""
+        self.progress_bus.forget(self._progress_key)
+        self._progress_key += 1
+        return {
+            'progress_callback': self.progress_bus.sink(self._progress_key),
+            'status_callback': self.update_status,
+            'finish_callback': self.on_finish,
+            'error_callback': self.on_error,
+        }
 
-    def _check_ffmpeg(self):
+    @staticmethod
+    def _quiet_callbacks():
+        """Callbacks for jobs that run next to the current one (URL lists, recovered downloads)."""
+        return {'progress_callback': lambda *a: None, 'status_callback': lambda msg, color: None,
+                'finish_callback': lambda success: None, 'error_callback': lambda msg: None}
+
+    def _recover_unfinished(self):
+        """Brings back the downloads that were paused or cut off by a crash/exit; the newest one shows up here."""
+        jobs = self.logic.recover_jobs(lambda rec: self._job_callbacks())
+        if not jobs: return
+        job = jobs[-1]
+        self.current_job = job
+        self.is_paused = True
+        self.url_entry.insert(0, job.url)
+        self._set_button_state("paused")
+        name = job.active_file_prefix or job.url
+        self.status_label.config(text=f"Recovered unfinished download: {name}. Press Resume.", foreground="orange")
+        # A modal prompt must not hold up the first paint
+        if len(jobs) > 1: self.root.after(config.STARTUP_WARMUP_DELAY_MS, self._ask_about_recovered, jobs[:-1])
+
+    def _ask_about_recovered(self, jobs):
+        """One prompt for the older recovered downloads: resume them all in the background, or discard them all."""
+        names = "\n".join(f"  {job.active_file_prefix or job.url}" for job in jobs[:10])
+        if len(jobs) > 10: names += f"\n  (+{len(jobs) - 10} more)"
+        answer = messagebox.askyesnocancel(
+            "Unfinished Downloads",
+            f"{len(jobs)} more unfinished download(s) were found:\n{names}\n\n"
+            "Yes: resume them in the background.\nNo: discard them and delete their partial files.\n"
+            "Cancel: ask again at the next start.")
+        if answer is None: return
+        for job in jobs:
+            for name, callback in self._quiet_callbacks().items(): setattr(job, name, callback)
+            # manual_cleanup also marks the job cancelled in the journal, so it doesn't come back
+            if answer: self.logic.resume(job)
+            else: self.logic.manual_cleanup(job)
+        self.batch_label.config(text=f"{'Resuming' if answer else 'Discarded'} {len(jobs)} unfinished download(s).", foreground="#555")
+
+    def _start_background_init(self):
+        threading.Thread(target=self._background_init, daemon=True, name="startup-warmup").start()
+
+    def _background_init(self):
+        try:
+            # --- FEATURE 1: FFmpeg Check on Startup ---
+            if not utils.is_ffmpeg_installed() and self.startup_warnings:
+                self.root.after(0, self._warn_ffmpeg_missing)
+            self.logic.ydl_pool.warm(1)
+            self.thumbnails.warm()
+        except Exception as e:
+            print(f"Warm-up error: {e}")
+        finally:
+            self.warmup_done.set()
+
+    def _warn_ffmpeg_missing(self):
         """Warns the user if FFmpeg is missing."""
-        if not utils.is_ffmpeg_installed():
-            messagebox.showwarning(
-                "FFmpeg Missing", 
-                "Critical Dependency Missing: FFmpeg.\n\n"
-                "Without FFmpeg:\n"
-                "- High-Res (1080p+) videos cannot be merged.\n"
-                "- Audio conversion (MP3) will fail.\n"
-                "- Time clipping will not work.\n\n"
-                "Please install FFmpeg or place ffmpeg.exe in this folder."
-            )
+        messagebox.showwarning(
+            "FFmpeg Missing", 
+            "Critical Dependency Missing: FFmpeg.\n\n"
+            "Without FFmpeg:\n"
+            "- High-Res (1080p+) videos cannot be merged.\n"
+            "- Audio conversion (MP3) will fail.\n"
+            "- Time clipping will not work.\n\n"
+            "Please install FFmpeg or place ffmpeg.exe in this folder."
+        )
 
     def _build_ui(self):
         main_frame = ttk.Frame(self.root, padding="20")
@@ -65,9 +146,11 @@ class YTDLPGui:
         
         self.url_entry = ttk.Entry(url_box, width=50, font=config.FONT_MAIN)
         self.url_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.url_entry.bind('<KeyRelease>', self._on_url_typed)
         
         tk.Button(url_box, text="Paste", command=self.paste_from_clipboard, bg="#e1f5fe", relief="flat", padx=10).pack(side=tk.LEFT, padx=(5, 0))
         tk.Button(url_box, text="Check", command=self.load_preview, bg="#ddd", relief="flat", padx=10).pack(side=tk.LEFT, padx=(5, 0))
+        tk.Button(url_box, text="List...", command=self.import_url_list, bg="#ddd", relief="flat", padx=10).pack(side=tk.LEFT, padx=(5, 0))
 
         self.preview_frame = tk.Frame(input_frame, bg="#f0f0f0", height=150)
         self.preview_frame.pack(fill=tk.X, pady=5)
@@ -102,14 +185,21 @@ class YTDLPGui:
         ttk.Label(settings_frame, text="Quality:", font=config.FONT_BOLD).grid(row=1, column=0, sticky=tk.W, pady=5)
         self.quality_var = tk.StringVar(value=config.DEFAULT_QUALITY)
         
-        options = ["1080p (MP4 - Fast)", "4K / Best (MKV/WebM)", "720p Limit", "Audio Only"]
+        options = ["1080p (MP4 - Fast)", "4K / Best (MKV/WebM)", "720p Limit", "Audio Only", config.AUTO_QUALITY]
         self.quality_menu = ttk.OptionMenu(settings_frame, self.quality_var, options[0], *options, command=self.on_quality_change)
         self.quality_menu.grid(row=1, column=1, sticky="ew", padx=10)
+        # Estimated download size (and time at the measured speed) of the selected quality
+        self.size_label = ttk.Label(settings_frame, text="", foreground="#777")
+        self.size_label.grid(row=1, column=2, sticky=tk.W, padx=5)
 
         # --- Advanced Options Toggle ---
         self.show_advanced = tk.BooleanVar(value=False)
-        self.btn_adv = ttk.Checkbutton(main_frame, text="Show Advanced Options", variable=self.show_advanced, command=self.toggle_advanced)
-        self.btn_adv.pack(anchor=tk.W, pady=(0, 5))
+        self.toggle_row = ttk.Frame(main_frame)
+        self.toggle_row.pack(fill=tk.X, pady=(0, 5))
+        self.btn_adv = ttk.Checkbutton(self.toggle_row, text="Show Advanced Options", variable=self.show_advanced, command=self.toggle_advanced)
+        self.btn_adv.pack(side=tk.LEFT)
+        self.show_history = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.toggle_row, text="History / Queue", variable=self.show_history, command=self.toggle_history).pack(side=tk.RIGHT)
 
         # --- Advanced Frame ---
         self.adv_frame = ttk.LabelFrame(main_frame, text="Advanced Controls", padding="10")
@@ -150,11 +240,43 @@ class YTDLPGui:
         self.arg_dropdown.grid(row=3, column=3, sticky="ew", padx=5)
         
         # Row 4: Buttons/Lists
+        self.use_archive = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.adv_frame, text="Skip Already Downloaded (Archive)", variable=self.use_archive).grid(row=4, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
         tk.Button(self.adv_frame, text="+ Add Argument", command=self.add_argument, bg="#ddd", relief="flat", font=("Segoe UI", 8)).grid(row=4, column=3, sticky="ew", padx=5, pady=(5, 0))
 
         self.arg_listbox = tk.Listbox(self.adv_frame, height=3, font=("Consolas", 8), bg="#f9f9f9", selectmode=tk.SINGLE)
         self.arg_listbox.grid(row=5, column=0, columnspan=4, sticky="ew", pady=5)
         self.arg_listbox.bind('<Double-Button-1>', self.remove_argument)
+
+        # Row 6: Total speed limit, shared by every running download (applied live)
+        ttk.Label(self.adv_frame, text="Total Speed Limit:").grid(row=6, column=0, sticky=tk.W)
+        self.total_rate_var = tk.StringVar(value=str(config.BANDWIDTH_TOTAL or ""))
+        rate_entry = ttk.Entry(self.adv_frame, textvariable=self.total_rate_var, width=10)
+        rate_entry.grid(row=6, column=1, sticky="w", padx=5)
+        rate_entry.bind('<Return>', self.apply_total_rate)
+        rate_entry.bind('<FocusOut>', self.apply_total_rate)
+        ttk.Label(self.adv_frame, text="e.g. 8M, 500K (empty = unlimited)", foreground="#777").grid(row=6, column=2, columnspan=2, sticky=tk.W)
+
+        # Row 7: Extra audio formats written from the same download (Audio Only)
+        ttk.Label(self.adv_frame, text="Also Export:").grid(row=7, column=0, sticky=tk.W, pady=(5, 0))
+        extras_frame = ttk.Frame(self.adv_frame)
+        extras_frame.grid(row=7, column=1, columnspan=3, sticky=tk.W, padx=5, pady=(5, 0))
+        self.extra_audio_vars = {}
+        self.extra_audio_checks = []
+        for fmt in config.AUDIO_FORMATS:
+            self.extra_audio_vars[fmt] = tk.BooleanVar(value=False)
+            chk = ttk.Checkbutton(extras_frame, text=fmt, variable=self.extra_audio_vars[fmt], state="disabled")
+            chk.pack(side=tk.LEFT, padx=(0, 8))
+            self.extra_audio_checks.append(chk)
+
+        # Row 8: Time budget for the Auto quality
+        ttk.Label(self.adv_frame, text="Auto Time Budget:").grid(row=8, column=0, sticky=tk.W, pady=(5, 0))
+        self.time_budget_var = tk.StringVar(value=utils.format_seconds(config.AUTO_TIME_BUDGET))
+        budget_entry = ttk.Entry(self.adv_frame, textvariable=self.time_budget_var, width=10)
+        budget_entry.grid(row=8, column=1, sticky="w", padx=5, pady=(5, 0))
+        budget_entry.bind('<Return>', lambda e: self._update_size_label())
+        budget_entry.bind('<FocusOut>', lambda e: self._update_size_label())
+        ttk.Label(self.adv_frame, text="MM:SS, used by the Auto quality", foreground="#777").grid(row=8, column=2, columnspan=2, sticky=tk.W, pady=(5, 0))
         
         # --- Progress & Controls ---
         self.progress_frame = ttk.Frame(main_frame)
@@ -163,6 +285,9 @@ class YTDLPGui:
         self.status_label.pack(anchor=tk.W, pady=(0, 5))
         self.progress = ttk.Progressbar(self.progress_frame, orient=tk.HORIZONTAL, mode='determinate')
         self.progress.pack(fill=tk.X)
+        # Pasted / imported URL lists run next to the single download above
+        self.batch_label = ttk.Label(self.progress_frame, text="", font=config.FONT_MONO, foreground="#555")
+        self.batch_label.pack(anchor=tk.W, pady=(5, 0))
 
         btn_frame = tk.Frame(main_frame)
         btn_frame.pack(fill=tk.X, pady=10)
@@ -194,44 +319,44 @@ class YTDLPGui:
 
     def toggle_pause(self):
         if not self.is_paused:
+            if self.current_job and self.current_job.state == 'processing':
+                # Nothing left to download; FFmpeg runs to the end
+                self.status_label.config(text="Downloaded. Post-processing can't be paused.", foreground="orange")
+                return
             self.is_paused = True
-            # Check for None safety
-            if self.logic.active_file_prefix and self.resume_args is not None:
-                self.resume_args['custom_name'] = self.logic.active_file_prefix
-
-            self.logic.stop_and_save()
+            if self.current_job: self.current_job.pause()
             self._set_button_state("paused")
             self.status_label.config(text="Paused. Press Resume to continue.", foreground="orange")
             
         else:
-            if not self.resume_args:
+            if not self.current_job:
                 messagebox.showerror("Error", "Resume data lost. Please restart.")
                 return
 
             self.is_paused = False
-            self.logic.restore_partials()
             self._set_button_state("downloading")
             self.status_label.config(text="Resuming...", foreground="blue")
             
-            # Resume with is_resume=True
-            self.logic.start_download(**self.resume_args, is_resume=True)
+            # Re-queues the same job with its saved name (is_resume=True)
+            self.logic.resume(self.current_job)
 
     def save_partial(self):
         if self.is_paused:
             self.is_paused = False
-            self.resume_args = None
+            self.current_job = None
             self._set_button_state("idle")
             self.status_label.config(text="Partial saved.", foreground="orange")
             return
-        if not self.logic.is_downloading:
+        job = self.current_job
+        if not job or not job.is_downloading:
             return
         self.is_paused = False
-        self.resume_args = None
+        self.current_job = None
         self.btn_pause.config(state=tk.DISABLED)
         self.btn_save_partial.config(state=tk.DISABLED)
         self.btn_cancel.config(state=tk.DISABLED)
         self.status_label.config(text="Stopping and saving partial...", foreground="orange")
-        self.logic.stop_and_save()
+        job.stop_and_save()
 
     def _set_button_state(self, state):
         if state == "downloading":
@@ -251,11 +376,11 @@ class YTDLPGui:
             self.btn_cancel.config(state=tk.DISABLED)
 
     def on_clip_change(self):
+        self._schedule_clip_estimate()
         if "Audio Only" in self.quality_var.get():
             self.chk_compat.configure(state="disabled")
             return
-        is_high_res = any(x in self.quality_var.get() for x in ["4K", "2K", "2160p", "1440p"])
-        if is_high_res:
+        if utils.is_high_res(self.quality_var.get()):
             self.chk_compat.configure(state="disabled")
             self.compat_mode.set(False)
             return
@@ -266,39 +391,75 @@ class YTDLPGui:
         else:
             self.chk_compat.configure(state="normal")
 
+    def _schedule_clip_estimate(self):
+        """Debounced: probes keyframes only once the sliders have settled."""
+        if self._clip_estimate_after: self.root.after_cancel(self._clip_estimate_after)
+        self._clip_estimate_after = None
+        self._clip_estimate_gen += 1
+        if not self.clipper.is_clipping_active() or "Audio Only" in self.quality_var.get() or not self.url_entry.get().strip():
+            self.clipper.set_note("")
+            return
+        self._clip_estimate_after = self.root.after(config.CLIP_ESTIMATE_DELAY_MS, self._estimate_clip)
+
+    def _estimate_clip(self):
+        self._clip_estimate_after = None
+        gen = self._clip_estimate_gen
+        url, quality = self.url_entry.get().strip(), self.quality_var.get()
+        start_txt, end_txt = self.clipper.get_times()
+        start = utils.parse_time_to_seconds(start_txt) or 0
+        end = utils.parse_time_to_seconds(end_txt)
+        self.clipper.set_note("Estimating clip cost...")
+
+        def work():
+            plan = self.logic.estimate_clip(url, quality, start, end)
+            text = f"Smart cut: {plan.describe()}" if plan else "Clip cost: unknown (keyframes could not be probed)"
+            # Drop the result if the range/quality changed while we were probing
+            self.root.after(0, lambda: gen == self._clip_estimate_gen and self.clipper.set_note(text))
+        threading.Thread(target=work, daemon=True).start()
+
     def on_quality_change(self, selection):
+        self._update_size_label()
         if "Audio Only" in selection:
             self.audio_menu.configure(state="normal")
             self.chk_compat.configure(state="disabled")
+            for chk in self.extra_audio_checks: chk.configure(state="normal")
         else:
             self.audio_menu.configure(state="disabled")
+            for chk in self.extra_audio_checks: chk.configure(state="disabled")
             self.on_clip_change()
 
     def set_quality(self, value):
         self.quality_var.set(value)
         self.on_quality_change(value)
 
-    def update_quality_menu(self, resolutions):
+    def update_quality_menu(self, estimates, link_speed=None):
+        """Rebuilds the menu from [(label, bytes)] of the previewed video; entries show the size."""
+        self.size_estimates, self.link_speed = estimates, link_speed
         menu = self.quality_menu["menu"]
         menu.delete(0, "end") 
-        new_options = []
-        for r in resolutions:
-            if r == 2160: label = "2160p (4K)"
-            elif r == 1440: label = "1440p (2K)"
-            elif r == 1080: label = "1080p"
-            elif r == 720: label = "720p"
-            elif r == 480: label = "480p"
-            else: label = f"{r}p"
-            new_options.append(label)
-        new_options.append("Audio Only")
-
-        for opt in new_options:
-            menu.add_command(label=opt, command=lambda value=opt: self.set_quality(value))
+        new_options = [label for label, _ in estimates] + [config.AUTO_QUALITY]
+        for label, size in estimates:
+            text = f"{label}    {formats.describe_estimate(size)}" if size else label
+            menu.add_command(label=text, command=lambda value=label: self.set_quality(value))
+        menu.add_command(label=config.AUTO_QUALITY, command=lambda: self.set_quality(config.AUTO_QUALITY))
         
         if "1080p" in new_options: self.quality_var.set("1080p")
         else: self.quality_var.set(new_options[0])
         self.on_quality_change(self.quality_var.get())
 
+    def _time_budget(self):
+        return utils.parse_time_to_seconds(self.time_budget_var.get()) or config.AUTO_TIME_BUDGET
+
+    def _update_size_label(self):
+        selection = self.quality_var.get()
+        sizes = dict(self.size_estimates)
+        if selection == config.AUTO_QUALITY:
+            pick = formats.pick_for_budget(self.size_estimates, self._time_budget(), self.link_speed)
+            text = f"-> {pick} ({formats.describe_estimate(sizes[pick], self.link_speed)})" if pick else ""
+        else:
+            text = formats.describe_estimate(sizes[selection], self.link_speed) if sizes.get(selection) else ""
+        self.size_label.config(text=text)
+
     def add_argument(self):
         selection = self.arg_selection.get()
         if selection and selection not in self.active_custom_args:
@@ -313,59 +474,129 @@ class YTDLPGui:
             self.active_custom_args.remove(value)
             self.arg_listbox.delete(index)
 
+    def apply_total_rate(self, event=None):
+        self.logic.bandwidth.set_total(self.total_rate_var.get())
+
     def browse_location(self):
         d = filedialog.askdirectory()
         if d: self.save_path.set(d)
 
     def toggle_advanced(self):
         if self.show_advanced.get():
-            self.adv_frame.pack(after=self.btn_adv, fill=tk.X, pady=(0, 15))
+            self.adv_frame.pack(after=self.toggle_row, fill=tk.X, pady=(0, 15))
         else:
             self.adv_frame.pack_forget()
 
+    def toggle_history(self):
+        """Separate window, so the main form keeps its layout; the panel only polls the journal while shown."""
+        if not self.show_history.get():
+            self.history_window.withdraw()
+            self.history_panel.stop()
+            return
+        if self.history_window is None:
+            self.history_window = tk.Toplevel(self.root)
+            self.history_window.title("History / Queue")
+            self.history_window.geometry("560x640")
+            self.history_window.protocol("WM_DELETE_WINDOW", lambda: (self.show_history.set(False), self.toggle_history()))
+            self.history_panel = HistoryPanel(self.history_window, self.logic.journal, self.logic.metadata_cache,
+                                              on_open=self._open_from_history)
+            self.history_panel.pack(fill=tk.BOTH, expand=True)
+        self.history_window.deiconify()
+        self.history_window.lift()
+        self.history_panel.start()
+
+    def _open_from_history(self, url):
+        self.url_entry.delete(0, tk.END)
+        self.url_entry.insert(0, url)
+        self.root.lift()
+        self.load_preview()
+
     def paste_from_clipboard(self):
+        try: content = self.root.clipboard_get()
+        except tk.TclError: return
+        urls, duplicates = utils.parse_url_list(content)
+        if len(urls) > 1: return self.queue_url_list(urls, duplicates)
+        if not urls: return
+        self.url_entry.delete(0, tk.END)
+        self.url_entry.insert(0, urls[0])
+        self.status_label.config(text="Pasted! Loading preview...", foreground="green")
+        self.load_preview()
+
+    def import_url_list(self):
+        path = filedialog.askopenfilename(title="Import URL List", filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if not path: return
         try:
-            content = self.root.clipboard_get().strip()
-            if "\n" in content or len(content) > 250: return
-            self.url_entry.delete(0, tk.END)
-            self.url_entry.insert(0, content)
-            self.status_label.config(text="Pasted! Loading preview...", foreground="green")
-            self.load_preview()
-        except: pass
+            with open(path, "r", encoding="utf-8", errors="replace") as fh: urls, duplicates = utils.parse_url_list(fh.read())
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not read {path}:\n{e}")
+            return
+        if not urls:
+            messagebox.showinfo("Import URL List", "No links found in that file.")
+            return
+        self.queue_url_list(urls, duplicates)
+
+    def queue_url_list(self, urls, duplicates=0):
+        """Several links at once: after a confirmation they are all queued with the current settings."""
+        dropped = f"\n({duplicates} duplicate link(s) dropped)" if duplicates else ""
+        if not messagebox.askyesno("Download List", f"Download {len(urls)} videos with the current settings?{dropped}"): return
+        # Clip times and the custom name belong to the previewed video, not to the list
+        advanced_opts = self._advanced_opts(clip=False)
+        quiet = self._quiet_callbacks()
+        self.batches.append(self.logic.start_batch(urls, self.save_path.get(), self.quality_var.get(),
+                                                   advanced_opts, lambda entry: quiet))
+        if len(self.batches) == 1: self._pump_batches()
+
+    def _pump_batches(self):
+        """Summary line for the running URL lists, refreshed twice a second while any is running."""
+        total = sum(r.total for r in self.batches)
+        finished = sum(r.finished for r in self.batches)
+        failed = sum(r.failed for r in self.batches)
+        duplicates = sum(r.duplicates for r in self.batches)
+        extra = ", ".join(p for p in (f"{failed} failed" if failed else "", f"{duplicates} duplicates" if duplicates else "") if p)
+        if all(r.is_done for r in self.batches):
+            self.batch_label.config(text=f"List finished: {finished - failed - duplicates} downloaded" + (f", {extra}" if extra else ""),
+                                    foreground=config.COLOR_TEXT_ERROR if failed else config.COLOR_TEXT_SUCCESS)
+            self.batches = []
+            return
+        self.batch_label.config(text=f"List: {finished} of {total} finished" + (f" ({extra})" if extra else ""), foreground="#555")
+        self.root.after(500, self._pump_batches)
 
     def load_preview(self):
-        url = self.url_entry.get()
-        if not url: return
-        self.lbl_thumbnail.config(text="Fetching info...", image="") 
+        url = self.url_entry.get().strip()
+        if url: self.preview.request(url, self.compat_mode.get())
+
+    def _on_url_typed(self, event=None):
+        """Typing / Ctrl+V in the URL box: preview once the text is a link and has settled."""
+        url = self.url_entry.get().strip()
+        if url == self.preview.url: return
+        if utils.URL_RE.fullmatch(url): self.preview.request(url, self.compat_mode.get(), config.PREVIEW_DEBOUNCE_MS)
+        else: self.preview.cancel()
+
+    def _preview_started(self, url):
+        self.lbl_thumbnail.config(text="Fetching info...", image="")
+        self.current_image = None
+        self._thumb_pending = True
         self.lbl_title.config(text="")
-        threading.Thread(target=self._fetch_and_display, args=(url,), daemon=True).start()
-
-    def _fetch_and_display(self, url):
-        info = self.logic.fetch_video_info(url)
-        if not info:
-            self.root.after(0, lambda: self.lbl_thumbnail.config(text="Could not load preview"))
-            return
-        try:
-            response = requests.get(info['thumbnail_url'])
-            pil_image = Image.open(BytesIO(response.content))
-            base_width = 250
-            w_percent = (base_width / float(pil_image.size[0]))
-            h_size = int((float(pil_image.size[1]) * float(w_percent)))
-            pil_image = pil_image.resize((base_width, h_size), Image.Resampling.LANCZOS)
-            tk_image = ImageTk.PhotoImage(pil_image)
-
-            def update_ui():
-                self.lbl_thumbnail.config(image=tk_image, text="")
-                self.current_image = tk_image 
-                self.lbl_title.config(text=info['title'])
-                if info.get('duration'):
-                    self.clipper.set_duration(info['duration'])
-                if info.get('resolutions'):
-                    self.update_quality_menu(info['resolutions'])
-            
-            self.root.after(0, update_ui)
-        except Exception as e:
-            print(f"Image load error: {e}")
+        self.size_estimates = []
+        self._update_size_label()
+
+    def _show_preview_info(self, info, estimates, speed):
+        self.lbl_title.config(text=info['title'])
+        if self.current_image is None: self.lbl_thumbnail.config(text="Loading thumbnail..." if self._thumb_pending else "No Preview")
+        if info.get('duration'):
+            self.clipper.set_duration(info['duration'])
+        if estimates:
+            self.update_quality_menu(estimates, speed)
+
+    def _show_preview_thumbnail(self, photo):
+        self._thumb_pending = False
+        self.current_image = photo
+        if photo: self.lbl_thumbnail.config(image=photo, text="")
+        elif self.lbl_title.cget("text"): self.lbl_thumbnail.config(text="No Preview")  # else on_info says so
+
+    def _preview_failed(self):
+        self.lbl_thumbnail.config(text="Could not load preview", image="")
+        self.current_image = None
 
     def start(self):
         url = self.url_entry.get()
@@ -376,69 +607,68 @@ class YTDLPGui:
         self._set_button_state("downloading")
         self.is_paused = False
         
+        self.current_job = self.logic.start_download(
+            url=url,
+            path=self.save_path.get(),
+            quality=self.quality_var.get(),
+            custom_name=self.name_entry.get().strip(),
+            advanced_opts=self._advanced_opts(),
+            is_resume=False,
+            **self._job_callbacks()
+        )
+
+    def _advanced_opts(self, clip=True):
         custom_arg_dicts = [config.POWER_ARGS[name] for name in self.active_custom_args]
-        start_time, end_time = self.clipper.get_times()
-        quality_sel = self.quality_var.get()
-        is_high_res = any(x in quality_sel for x in ["4K", "2K", "2160p", "1440p"])
-        
-        if "Audio Only" in quality_sel: final_container = "mp3" 
-        elif is_high_res: final_container = "mkv"
-        else: final_container = "mp4"
-
-        advanced_opts = {
-            'container': final_container,
-            'audio_format': self.audio_fmt_var.get(),
-            'compatibility_mode': self.compat_mode.get(),
-            'audio_bitrate': self.bitrate_var.get(),
-            'embed_subs': self.embed_subs.get(),
-            'embed_meta': self.embed_meta.get(),
-            'custom_args': custom_arg_dicts,
-            'time_start': start_time,
-            'time_end': end_time,
-            'total_duration': self.clipper.video_duration
-        }
-        
-        self.resume_args = {
-            'url': url,
-            'path': self.save_path.get(),
-            'quality': self.quality_var.get(),
-            'custom_name': self.name_entry.get().strip(),
-            'advanced_opts': advanced_opts,
-            'progress_callback': self.update_progress,
-            'status_callback': self.update_status,
-            'finish_callback': self.on_finish,
-            'error_callback': self.on_error
-        }
-        
-        self.logic.start_download(**self.resume_args, is_resume=False)
+        start_time, end_time = self.clipper.get_times() if clip else ("", "")
+        primary = (self.audio_fmt_var.get(), self.bitrate_var.get())
+        audio_outputs = [primary] + [(fmt, primary[1]) for fmt, var in self.extra_audio_vars.items()
+                                     if var.get() and fmt != primary[0]]
+        return utils.build_advanced_opts(
+            quality=self.quality_var.get(),
+            audio_format=self.audio_fmt_var.get(),
+            compatibility_mode=self.compat_mode.get(),
+            audio_bitrate=self.bitrate_var.get(),
+            embed_subs=self.embed_subs.get(),
+            embed_meta=self.embed_meta.get(),
+            custom_args=custom_arg_dicts,
+            time_start=start_time,
+            time_end=end_time,
+            total_duration=self.clipper.video_duration if clip else 0,
+            use_archive=self.use_archive.get(),
+            audio_outputs=audio_outputs,
+            time_budget=self._time_budget()
+        )
 
     def cancel(self): 
         if self.is_paused:
-            msg = self.logic.manual_cleanup()
+            if self.current_job: self.logic.manual_cleanup(self.current_job)
             self.is_paused = False
-            self.resume_args = None
+            self.current_job = None
             self._set_button_state("idle")
             self.progress['value'] = 0
             self.status_label.config(text="Ready", foreground="#555")
             messagebox.showinfo("Cancelled", "Download cancelled and files deleted.")
         else:
             self.is_paused = False 
-            self.resume_args = None
-            self.logic.cancel()
-
-    def update_progress(self, downloaded, total, speed, eta):
-        if total and total > 0: p = (downloaded / total) * 100
-        else: p = 0
-        p_text = f"{p:.1f}%" if total > 0 else "..."
-        total_str = utils.format_bytes(total) if total else "?"
-        stats = f"{p_text} | {utils.format_bytes(downloaded)} of {total_str} | {utils.format_bytes(speed)}/s | ETA: {utils.format_seconds(eta)}"
-        self.root.after(0, lambda: self._apply_progress(p, stats))
-
-    def _apply_progress(self, p, stats):
-        self.progress['value'] = p
+            if self.current_job: self.current_job.cancel()
+            self.current_job = None
+
+    def _pump_progress(self):
+        """Runs on the Tk loop at PROGRESS_UI_HZ; shows only the newest sample for the current job."""
+        snap = self.progress_bus.drain().get(self._progress_key)
+        if snap: self._apply_progress(snap)
+        self.root.after(int(1000 / config.PROGRESS_UI_HZ), self._pump_progress)
+
+    def _apply_progress(self, snap):
+        p_text = f"{snap.percent:.1f}%" if snap.total > 0 else "..."
+        total_str = utils.format_bytes(snap.total) if snap.total else "?"
+        stats = f"{p_text} | {utils.format_bytes(snap.downloaded)} of {total_str} | {utils.format_bytes(int(snap.speed))}/s | ETA: {utils.format_seconds(snap.eta)}"
+        self.progress['value'] = snap.percent
         self.status_label.config(text=stats, foreground=config.COLOR_TEXT_PRIMARY)
 
     def update_status(self, msg, color):
+        # A tick still waiting in the bus would overwrite this message on the next frame
+        self.progress_bus.discard(self._progress_key)
         self.root.after(0, lambda: self.status_label.config(text=msg, foreground=color))
 
     def on_finish(self, success: bool):
@@ -448,7 +678,9 @@ class YTDLPGui:
             self._set_button_state("idle")
             self.progress['value'] = 100 if success else 0
             
-            if success:
+            if success and self.current_job and self.current_job.state == 'skipped':
+                self.status_label.config(text="Already downloaded (in archive). Skipped.", foreground=config.COLOR_TEXT_SUCCESS)
+            elif success:
                 self.status_label.config(text="Download Complete!", foreground=config.COLOR_TEXT_SUCCESS)
                 
                 # --- AUTO OPEN FOLDER OPTION? ---
@@ -0,0 +1,87 @@
+# gui/preview.py
+import threading
+from history import thumbnail_url
+
+class PreviewController:
+    """
+    Fetches the preview for the URL box. Every request bumps `generation`;
+    results are delivered on the Tk thread only if no newer request started in
+    the meantime, so a slow, superseded preview can never overwrite the current
+    one. Requests made while typing are debounced (the last one within
+    PREVIEW_DEBOUNCE_MS wins). Metadata and thumbnail are fetched side by side
+    when the thumbnail URL can be derived from the link (YouTube, or the
+    metadata cache); otherwise the thumbnail starts the moment metadata arrives.
+    Title and quality menu never wait for the thumbnail.
+
+    Callbacks (all on the Tk thread):
+      on_start(url)                      the request left the debounce window
+      on_info(info, estimates, speed)    metadata, size estimates, link speed
+      on_thumbnail(photo)                PhotoImage, or None if there is none
+      on_failed()                        metadata could not be fetched
+    """
+    def __init__(self, root, logic, thumbnails, on_start, on_info, on_thumbnail, on_failed):
+        self.root = root
+        self.logic = logic
+        self.thumbnails = thumbnails
+        self.on_start, self.on_info, self.on_thumbnail, self.on_failed = on_start, on_info, on_thumbnail, on_failed
+        self.generation = 0
+        self.url = None          # URL of the newest request
+        self._after = None
+
+    def request(self, url, compat=False, delay_ms=0):
+        """Previews `url`, superseding any request still pending or running."""
+        self.cancel()
+        self.url = url
+        gen = self.generation
+        if delay_ms: self._after = self.root.after(delay_ms, self._start, gen, url, compat)
+        else: self._start(gen, url, compat)
+
+    def cancel(self):
+        """Drops the pending request and the results of running ones (their fetches still fill the caches)."""
+        if self._after: self.root.after_cancel(self._after)
+        self._after = None
+        self.generation += 1
+
+    def _start(self, gen, url, compat):
+        self._after = None
+        self.on_start(url)
+        threading.Thread(target=self._fetch_info, args=(gen, url, compat), daemon=True, name="preview-info").start()
+
+    # --- Worker threads ---
+    def _fetch_info(self, gen, url, compat):
+        if gen != self.generation: return  # superseded before it started
+        # May read the on-disk metadata cache, so not on the Tk thread
+        thumb = thumbnail_url(url, self.logic.metadata_cache)
+        if thumb: threading.Thread(target=self._fetch_thumb, args=(gen, thumb), daemon=True, name="preview-thumb").start()
+        info = self.logic.fetch_video_info(url)
+        if not info: return self._deliver(gen, self._failed)
+        try:
+            # Sizes come from yt-dlp's format selector over the cached table (no network);
+            # a site without known heights still gets "Best" and "Audio Only"
+            estimates = self.logic.estimate_sizes(info, compatibility_mode=compat) if info.get('formats') else []
+        except Exception as e:
+            print(f"Size estimate error: {e}")
+            estimates = []
+        self._deliver(gen, self.on_info, info, estimates, self.logic.link_speed(url))
+        if not thumb: self._fetch_thumb(gen, info.get('thumbnail_url'))
+
+    def _fetch_thumb(self, gen, thumb):
+        path = None
+        try:
+            if gen != self.generation: return
+            path = self.thumbnails.fetch(thumb) if thumb else None
+        except Exception as e:
+            print(f"Image load error: {e}")
+        self._deliver(gen, self._show_thumb, thumb, path)
+
+    def _deliver(self, gen, fn, *args):
+        self.root.after(0, lambda: gen == self.generation and fn(*args))
+
+    # --- Tk thread ---
+    def _show_thumb(self, thumb, path):
+        # PhotoImage has to be built on the Tk thread
+        self.on_thumbnail(self.thumbnails.photo(thumb, path) if path else None)
+
+    def _failed(self):
+        self.generation += 1  # a thumbnail guessed from the link must not show up after the error
+        self.on_failed()
@@ -0,0 +1,115 @@
+# gui/thumbnails.py
+import os
+import hashlib
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from io import BytesIO
+import config
+
+class ThumbnailCache:
+    """
+    Fetch -> decode -> resize pipeline for preview thumbnails.
+    - One pooled requests.Session (keep-alive, timeouts).
+    - Resized PNGs stored on disk under sha1(url|width), so a re-preview skips
+      the network and PIL entirely (Tk loads PNG natively).
+    - JPEGs are decoded in draft mode (DCT scaling) and other formats are
+      reduced before the final LANCZOS pass.
+    - A small LRU of PhotoImage objects for instant re-display.
+    fetch() is safe to call from worker threads; photo() must run on the Tk thread.
+    requests and PIL are only imported on the first fetch() to keep startup light.
+    """
+    def __init__(self, cache_dir=None, width=None, memory_items=None):
+        self.cache_dir = cache_dir or config.THUMBNAIL_CACHE_DIR
+        self.width = width or config.THUMBNAIL_WIDTH
+        self.memory_items = memory_items or config.THUMBNAIL_MEMORY_ITEMS
+
+        self._session = None
+        self._photos = OrderedDict()  # url -> PhotoImage
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def warm(self):
+        """Imports requests/PIL and opens the session ahead of the first preview."""
+        from PIL import Image  # noqa: F401
+        return self.session
+
+    # --- Worker thread ---
+    def fetch(self, url):
+        """Returns the path of the resized PNG for `url`, downloading it if needed."""
+        if not url: return None
+        path = self._path_for(url)
+        if os.path.exists(path): return path
+
+        response = self.session.get(url, timeout=config.THUMBNAIL_TIMEOUT)
+        response.raise_for_status()
+        image = self._decode(response.content)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        image.save(tmp, format="PNG")
+        os.replace(tmp, path)
+        self._maybe_trim()
+        return path
+
+    def _decode(self, data):
+        from PIL import Image
+        image = Image.open(BytesIO(data))
+        src_w, src_h = image.size
+        h_size = max(1, int(src_h * (self.width / float(src_w))))
+
+        # JPEG: let libjpeg decode at 1/2, 1/4 or 1/8 scale (never below target size)
+        if image.format == "JPEG": image.draft("RGB", (self.width, h_size))
+        if image.mode not in ("RGB", "RGBA"): image = image.convert("RGB")
+
+        # reducing_gap does a cheap box reduce() first, then LANCZOS on the small image
+        return image.resize((self.width, h_size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    # --- Tk thread ---
+    def photo(self, url, path=None):
+        """Returns a PhotoImage for `url` (LRU hit, or loaded from the cached PNG)."""
+        img = self._photos.get(url)
+        if img is not None:
+            self._photos.move_to_end(url)
+            return img
+        path = path or self._path_for(url)
+        if not os.path.exists(path): return None
+
+        img = tk.PhotoImage(file=path)
+        self._photos[url] = img
+        while len(self._photos) > self.memory_items:
+            self._photos.popitem(last=False)
+        return img
+
+    def retain(self, urls):
+        """Drops every PhotoImage not in `urls` (the history panel keeps only on-screen rows decoded)."""
+        for url in [u for u in self._photos if u not in urls]: del self._photos[url]
+
+    # --- Disk Layout ---
+    def _path_for(self, url):
+        digest = hashlib.sha1(f"{url}|{self.width}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+    def _maybe_trim(self):
+        with self._lock:
+            self._writes += 1
+            if self._writes % 50: return
+        try:
+            files = sorted((e.stat().st_mtime, e.path) for e in os.scandir(self.cache_dir) if e.name.endswith(".png"))
+        except OSError: return
+        for _, fpath in files[:max(0, len(files) - config.THUMBNAIL_CACHE_MAX_FILES)]:
+            try: os.remove(fpath)
+            except OSError: pass
@@ -0,0 +1,86 @@
+# history.py
+# Compact in-memory copy of the job journal behind the history / queue panel.
+# Headless (no tkinter), so it can be filled and measured without a display.
+import sys
+from array import array
+from collections import namedtuple
+import config
+from utils import canonical_video_id
+
+HistoryRow = namedtuple('HistoryRow', 'uid url title state downloaded total created_at')
+
+def thumbnail_url(url, metadata_cache=None):
+    """A job's thumbnail without extracting: YouTube's is predictable, others come from the metadata cache."""
+    key = canonical_video_id(url)
+    if key and key.startswith("youtube:"): return f"https://i.ytimg.com/vi/{key.split(':', 1)[1]}/mqdefault.jpg"
+    info = metadata_cache.get(key) if metadata_cache is not None and key else None
+    return info.get('thumbnail_url') if info else None
+
+class JobHistory:
+    """
+    Journal rows in parallel columns (one list or typed array per field, no
+    object per row), oldest first; row(i) serves them newest first. States are
+    interned, sizes and times live in arrays, so 100 000 jobs take a few MB.
+    At most `max_rows` are kept: the oldest tenth goes when that is exceeded.
+    `version` changes with the contents, so a view knows when to redraw.
+    """
+    def __init__(self, max_rows=None):
+        self.max_rows = max_rows or config.HISTORY_MAX_ROWS
+        self.version = 0
+        self.synced_until = 0.0  # newest updated_at merged (where the next journal read starts)
+        self.uids, self.urls, self.titles, self.states = [], [], [], []
+        self.downloaded, self.totals = array('q'), array('q')
+        self.created = array('d')
+        self._index = {}         # uid -> column position
+
+    def __len__(self): return len(self.uids)
+
+    def row(self, i):
+        """The i-th newest job."""
+        j = len(self.uids) - 1 - i
+        return HistoryRow(self.uids[j], self.urls[j], self.titles[j], self.states[j],
+                          self.downloaded[j], self.totals[j], self.created[j])
+
+    def merge(self, rows):
+        """Applies journal.load_history() rows. Returns how many jobs were new."""
+        if not self.uids and rows: return self._load(rows)
+        added = changed = 0
+        for uid, url, name, state, downloaded, total, created_at, updated_at in rows:
+            self.synced_until = max(self.synced_until, updated_at)
+            state, downloaded, total = sys.intern(state), downloaded or 0, total or 0
+            j = self._index.get(uid)
+            if j is None:
+                self._index[uid] = len(self.uids)
+                self.uids.append(uid)
+                self.urls.append(url)
+                self.titles.append(name)
+                self.states.append(state)
+                self.downloaded.append(downloaded)
+                self.totals.append(total)
+                self.created.append(created_at)
+                added += 1
+            elif (self.states[j], self.downloaded[j], self.totals[j], self.titles[j]) != (state, downloaded, total, name):
+                self.states[j], self.downloaded[j], self.totals[j], self.titles[j] = state, downloaded, total, name
+                changed += 1
+        if len(self.uids) > self.max_rows: self._trim()
+        if added or changed: self.version += 1
+        return added
+
+    def _load(self, rows):
+        # First fill: one pass per column instead of one append per field and row
+        uids, urls, names, states, downloaded, totals, created, updated = zip(*rows[-self.max_rows:])
+        self.uids, self.urls, self.titles = list(uids), list(urls), list(names)
+        self.states = [sys.intern(s) for s in states]
+        self.downloaded = array('q', [d or 0 for d in downloaded])
+        self.totals = array('q', [t or 0 for t in totals])
+        self.created = array('d', created)
+        self._index = {uid: j for j, uid in enumerate(self.uids)}
+        self.synced_until = max(self.synced_until, max(updated))
+        self.version += 1
+        return len(self.uids)
+
+    def _trim(self):
+        drop = len(self.uids) - self.max_rows + self.max_rows // 10
+        for column in (self.uids, self.urls, self.titles, self.states, self.downloaded, self.totals, self.created):
+            del column[:drop]
+        self._index = {uid: j for j, uid in enumerate(self.uids)}
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    uid             TEXT PRIMARY KEY,
+    url             TEXT NOT NULL,
+    path            TEXT NOT NULL,
+    quality         TEXT NOT NULL,
+    final_name      TEXT,
+    options         TEXT NOT NULL,
+    state           TEXT NOT NULL,
+    downloaded      INTEGER DEFAULT 0,
+    total           INTEGER DEFAULT 0,
+    manifest        TEXT DEFAULT '[]',
+    saved_partials  TEXT DEFAULT '[]',
+    created_at      REAL NOT NULL,
+    updated_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state);
+CREATE INDEX IF NOT EXISTS jobs_updated ON jobs(updated_at);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs(created_at);
+"""
+
+# States a restart should bring back (stopped = user kept the partial on purpose).
+# 'processing' jobs re-run: yt-dlp finds the downloaded streams and only merges/converts.
+UNFINISHED_STATES = ('queued', 'running', 'processing', 'paused')
+# What the history panel shows (no options / manifest JSON to parse)
+HISTORY_COLUMNS = ('uid', 'url', 'final_name', 'state', 'downloaded', 'total', 'created_at', 'updated_at')
+
+class JobJournal:
+    """
+    Crash-safe job store (SQLite, WAL mode).
+    record() snapshots a job on every state change; progress() only stores the
+    newest byte counts in memory. A single writer thread flushes everything in
+    one transaction every JOURNAL_FLUSH_INTERVAL seconds (state changes wake
+    it immediately), so the download hot path never touches the disk.
+    """
+    def __init__(self, db_path=None, flush_interval=None):
+        self.db_path = db_path or config.JOURNAL_PATH
+        self.flush_interval = config.JOURNAL_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._rows = {}      # uid -> full row (state changes)
+        self._progress = {}  # uid -> (downloaded, total)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flushed = threading.Condition(self._lock)
+        self._writing = False  # a batch has been taken and is being written
+        self._closed = False
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn: conn.executescript(SCHEMA)
+        self._writer = threading.Thread(target=self._run, daemon=True, name="job-journal")
+        self._writer.start()
+        atexit.register(self.close)
+
+    # --- Writes (any thread, never blocks on disk) ---
+    def record(self, job):
+        row = {
+            'uid': job.uid, 'url': job.url, 'path': job.path, 'quality': job.quality,
+            'final_name': job.active_file_prefix if job.active_file_prefix != "%(title)s" else None,
+            'options': json.dumps(job.advanced_opts, default=str),
+            'state': job.state,
+            'manifest': json.dumps(sorted(job.manifest)),
+            'saved_partials': json.dumps(job.saved_partials),
+            'created_at': job.created_at, 'updated_at': time.time(),
+        }
+        with self._lock: self._rows[job.uid] = row
+        self._wake.set()
+
+    def progress(self, job, downloaded, total):
+        # Under the lock: the writer swaps the dict out, a late write into the old one would be lost
+        with self._lock: self._progress[job.uid] = (downloaded or 0, total or 0)
+
+    def flush(self, timeout=5.0):
+        """Blocks until everything recorded so far is on disk."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            # A batch in flight may have been taken just before our rows: wait for the next one too
+            while (self._rows or self._progress or self._writing) and self._writer.is_alive():
+                self._wake.set()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: return
+                self._flushed.wait(remaining)
+            orphaned = bool(self._rows or self._progress)
+        # Recorded after the writer's last batch (close() racing a state change): write it here
+        if orphaned: self._write_now()
+
+    def close(self):
+        if self._closed: return
+        self._closed = True
+        self._wake.set()
+        self._writer.join(timeout=5.0)
+        self.flush()
+
+    # --- Reads ---
+    def load_unfinished(self):
+        """Returns rows (dicts) for jobs in UNFINISHED_STATES, oldest first."""
+        self.flush()
+        marks = ",".join("?" * len(UNFINISHED_STATES))
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"SELECT * FROM jobs WHERE state IN ({marks}) ORDER BY created_at", UNFINISHED_STATES).fetchall()
+        out = []
+        for r in rows:
+            rec = dict(r)
+            rec['options'] = json.loads(rec['options'])
+            rec['manifest'] = json.loads(rec['manifest'] or '[]')
+            rec['saved_partials'] = [tuple(p) for p in json.loads(rec['saved_partials'] or '[]')]
+            out.append(rec)
+        return out
+
+    def load_history(self, since=0.0, limit=None):
+        """
+        HISTORY_COLUMNS tuples, oldest first: the newest `limit` jobs changed since
+        `since` (epoch seconds), plus the running ones, whose byte counts move
+        without a state change. Doesn't wait for a flush (the panel polls anyway).
+        """
+        # The first read walks the created_at index. Later ones touch a few rows via
+        # updated_at / state; "+created_at" keeps the LIMIT from tempting SQLite to scan instead
+        if since:
+            where, order = "WHERE updated_at >= :since OR state IN ('running', 'processing')", "+created_at"
+        else:
+            where, order = "", "created_at"
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {', '.join(HISTORY_COLUMNS)} FROM jobs {where} ORDER BY {order} DESC LIMIT :limit",
+                                {'since': since, 'limit': -1 if limit is None else limit}).fetchall()
+        rows.reverse()
+        return rows
+
+    # --- Writer thread ---
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self._write_batch(conn)
+                if self._closed:
+                    self._write_batch(conn)
+                    return
+        finally:
+            conn.close()
+
+    def _write_now(self):
+        conn = self._connect()
+        try: self._write_batch(conn)
+        finally: conn.close()
+
+    def _write_batch(self, conn):
+        with self._lock:
+            rows, self._rows = self._rows, {}
+            progress, self._progress = self._progress, {}
+            self._writing = True
+        if rows or progress:
+            try:
+                with conn:
+                    if rows:
+                        cols = list(next(iter(rows.values())).keys())
+                        updates = ", ".join(f"{c}=excluded.{c}" for c in cols if c not in ('uid', 'created_at'))
+                        conn.executemany(
+                            f"INSERT INTO jobs ({', '.join(cols)}) VALUES ({', '.join(':' + c for c in cols)}) "
+                            f"ON CONFLICT(uid) DO UPDATE SET {updates}", list(rows.values()))
+                    if progress:
+                        conn.executemany("UPDATE jobs SET downloaded=?, total=? WHERE uid=?",
+                                         [(d, t, uid) for uid, (d, t) in progress.items()])
+            except sqlite3.Error as e:
+                print(f"Job journal write error: {e}")
+        with self._lock:
+            self._writing = False
+            self._flushed.notify_all()
@@ -1,143 +1,717 @@
-import yt_dlp
-from yt_dlp.utils import download_range_func
 import threading
+import itertools
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import os
+import re
+import gc
+import shutil
 import time
-import glob
-from utils import get_quality_opts, parse_time_to_seconds
+import uuid
+import config
+from cache import MetadataCache
+from ydl_pool import YDLPool
+from dir_index import DirectoryIndex
+from journal import JobJournal
+from archive import DownloadArchive
+from tuning import ThroughputTuner, host_key
+from bandwidth import BandwidthScheduler
+from metrics import JobMetrics, MetricsSink
+from diskspace import DiskBudget, peak_footprint
+from formats import compact_format, estimate_size, quality_labels, pick_for_budget, describe_estimate
+from utils import get_quality_opts, parse_time_to_seconds, canonical_video_id, parse_rate, is_high_res, format_bytes, AUDIO_CODECS
 
-class DownloadManager:
-    def __init__(self):
+_job_ids = itertools.count(1)
+
+# States that end a run of a job (metrics are emitted once per run)
+RUN_END_STATES = ('done', 'paused', 'stopped', 'cancelled', 'error', 'skipped')
+
+class DownloadJob:
+    """
+    One queued download. Holds everything that used to live on the manager
+    (abort token, active prefix/dir) so several jobs can run side by side.
+    """
+    def __init__(self, url, path, quality, custom_name, advanced_opts,
+                 progress_callback, status_callback, finish_callback, error_callback, is_resume=False):
+        self.id = next(_job_ids)
+        self.uid = uuid.uuid4().hex  # stable across restarts (journal key)
+        self.created_at = time.time()
+        self.url = url
+        self.path = path
+        self.quality = quality
+        self.custom_name = custom_name
+        self.advanced_opts = advanced_opts
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+        self.finish_callback = finish_callback
+        self.error_callback = error_callback
+        self.is_resume = is_resume
+
+        # queued -> running -> processing -> done; running -> paused / stopped / cancelled / error
+        self.state = 'queued'
         self.abort_action = None
-        self.is_downloading = False
         self.active_file_prefix = None
         self.active_dir = None
+        self.reserved_name = None
+        # Exact files this job created (from yt-dlp hooks), used instead of prefix globbing
+        self.manifest = set()
+        self.saved_partials = []  # (part_path, saved_path) renamed by stop/pause
+        self.recovered_bytes = None  # (downloaded, total) from the journal after a restart
+        self.archive_id = None        # "<extractor> <id>", yt-dlp download-archive style
+        self.pp_step = 0              # post-processors started so far (reported separately from bytes)
+        self.metrics = None           # JobMetrics of the current run (set by submit())
+
+    @property
+    def is_downloading(self): return self.state in ('queued', 'running')
+
+    def track(self, path):
+        if path: self.manifest.add(os.path.abspath(path))
+
+    def track_info(self, info):
+        """Records every output path yt-dlp put into an info dict (merged file, subs, thumbs, json)."""
+        if not info: return
+        for key in ('filepath', '_filename', 'filename', '__infojson_filename'):
+            self.track(info.get(key))
+        for src, dst in (info.get('__files_to_move') or {}).items():
+            self.track(src)
+            self.track(dst)
+        for sub in (info.get('requested_subtitles') or {}).values():
+            self.track(sub.get('filepath'))
+        for thumb in info.get('thumbnails') or []:
+            self.track(thumb.get('filepath'))
+        for export in info.get('audio_exports') or []:
+            self.track(export)
+
+    # --- Per-job control tokens (checked by the progress hook) ---
+    def cancel(self): self.abort_action = 'cancel'
+    def pause(self): self.abort_action = 'pause'
+    def stop_and_save(self): self.abort_action = 'stop_save'
+
+class PlaylistRun:
+    """
+    Handle for a playlist/channel (or a batch of pasted URLs) being expanded
+    into jobs. Only counters, the (bounded) set of in-flight jobs and the IDs
+    already queued are kept, so memory barely grows with the playlist length.
+    """
+    def __init__(self, url):
+        self.url = url                # None for a batch
+        self.total = None             # entry count, known up front for a batch
+        self.discovered = 0
+        self.finished = 0
+        self.failed = 0
+        self.duplicates = 0           # entries that resolved to a video already queued by this run
+        self.active = {}              # job.id -> job, at most PLAYLIST_MAX_PENDING
+        self.seen = set()             # archive IDs of the entries queued so far
+        self.expanded = threading.Event()
+        self.cancelled = False
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_done(self): return self.expanded.is_set() and self.finished >= self.discovered
+
+    def cancel(self):
+        self.cancelled = True
+        with self._lock: jobs = list(self.active.values())
+        for job in jobs: job.cancel()
+
+class DownloadManager:
+    def __init__(self, max_workers=None, metadata_cache=None, ydl_pool=None, journal=None, archive=None, tuner=None, bandwidth=None, metrics=None,
+                 disk=None):
+        self.max_workers = max_workers or config.MAX_CONCURRENT_DOWNLOADS
+        self.metadata_cache = metadata_cache or MetadataCache()
+        self.ydl_pool = ydl_pool or YDLPool()
+        self.journal = journal or JobJournal()
+        self.archive = archive or DownloadArchive()
+        self.tuner = tuner or ThroughputTuner()
+        self.bandwidth = bandwidth or BandwidthScheduler()
+        self.metrics = metrics or MetricsSink()
+        self.disk = disk or DiskBudget()
+        self.jobs = {}  # job.id -> job; finished/cancelled/failed jobs are dropped
+        self._queue = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        # Collision checks: folder snapshot + names reserved by running jobs
+        self._name_lock = threading.Lock()
+        self.dir_index = DirectoryIndex()
+        self._pp_executor = None  # second pipeline stage, created on first use
+        self._held = []           # jobs waiting for disk space (still counted by the queue)
+        self._disk_recheck = None
+
+    def _set_state(self, job, state):
+        job.state = state
+        self.journal.record(job)
+        if state in RUN_END_STATES and job.metrics is not None:
+            self.metrics.emit(job)
+            job.metrics = None
+
+    # --- Queue / Workers ---
+    def _ensure_workers(self):
+        with self._lock:
+            self._workers = [w for w in self._workers if w.is_alive()]
+            while len(self._workers) < self.max_workers:
+                w = threading.Thread(target=self._worker_loop, daemon=True,
+                                     name=f"download-worker-{len(self._workers) + 1}")
+                w.start()
+                self._workers.append(w)
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            handed_off = False
+            try:
+                if job.abort_action:
+                    # Cancelled / paused / stopped while still waiting for a slot: don't extract or
+                    # download. Only a re-queued resume has files on disk (its restored .part files)
+                    msg = self._handle_cleanup_and_exit(job) if job.manifest else \
+                        {'cancel': "Cancelled.", 'pause': "Paused."}.get(job.abort_action, "Stopped.")
+                    self._set_state(job, {'cancel': 'cancelled', 'pause': 'paused'}.get(job.abort_action, 'stopped'))
+                    job.status_callback(msg, "red" if job.abort_action == 'cancel' else "orange")
+                    job.finish_callback(success=False)
+                    continue
+                # Archive check: a set lookup on the URL, before any network access
+                job.archive_id = job.archive_id or DownloadArchive.id_for_url(job.url)
+                if self._skip_if_archived(job): continue
+                handed_off = self._run_process(job)
+            finally:
+                # Jobs handed to the post-processing pool (or held for disk space) are finished there
+                if not handed_off: self._finish_job(job)
+
+    def _finish_job(self, job):
+        if job.state in ('done', 'cancelled', 'error', 'skipped'):
+            with self._lock: self.jobs.pop(job.id, None)
+        self._queue.task_done()
+
+    def _skip_if_archived(self, job):
+        if job.is_resume or not job.advanced_opts.get('use_archive', True): return False
+        if job.archive_id not in self.archive: return False
+        self._set_state(job, 'skipped')
+        job.status_callback("Already downloaded (in archive). Skipped.", "green")
+        job.finish_callback(success=True)
+        return True
+
+    def active_jobs(self):
+        with self._lock: return [j for j in self.jobs.values() if j.state == 'running']
+
+    def wait(self):
+        """Blocks until every queued job has been downloaded and post-processed."""
+        self._queue.join()
+
+    def fetch_video_info(self, url, use_cache=True):
+        """
+        Returns title/thumbnail/duration/resolutions plus the full format list.
+        Served from the metadata cache when possible (keyed by canonical video ID).
+        """
+        url_key = canonical_video_id(url)
+        if use_cache:
+            cached = self.metadata_cache.get(url_key)
+            if cached: return cached
 
-    def fetch_video_info(self, url):
         opts = {'quiet': True, 'skip_download': True, 'noplaylist': True}
         try:
-            with yt_dlp.YoutubeDL(params=opts) as ydl: # type: ignore
+            with self.ydl_pool.lease(opts) as ydl:
                 info = ydl.extract_info(url, download=False)
-                formats = info.get('formats') or []
-                resolutions = set()
-                for f in formats:
-                    if f.get('vcodec') != 'none' and f.get('height'):
-                        resolutions.add(f['height'])
-                sorted_res = sorted(list(resolutions), reverse=True)
-                return {
-                    'title': info.get('title', 'Unknown Title'),
-                    'thumbnail_url': info.get('thumbnail', None),
-                    'duration': info.get('duration', 0),
-                    'resolutions': sorted_res
-                }
+                result = self._build_info(ydl.sanitize_info(info))
         except Exception as e:
             print(f"Metadata fetch error: {e}")
             return None
 
+        id_key = None
+        if result['id'] and result['extractor']:
+            id_key = f"{result['extractor'].lower()}:{result['id']}"
+        self.metadata_cache.put(result, url_key, id_key)
+        return result
+
+    def _build_info(self, info):
+        formats = []
+        resolutions = set()
+        for f in info.get('formats') or []:
+            # Only what format selection and size estimates need (no fragment lists / headers)
+            formats.append(compact_format(f))
+            if f.get('vcodec') != 'none' and f.get('height'):
+                resolutions.add(f['height'])
+        sorted_res = sorted(list(resolutions), reverse=True)
+        return {
+            'id': info.get('id'),
+            'extractor': info.get('extractor_key'),
+            'webpage_url': info.get('webpage_url'),
+            'title': info.get('title', 'Unknown Title'),
+            'thumbnail_url': info.get('thumbnail', None),
+            'duration': info.get('duration', 0),
+            'resolutions': sorted_res,
+            'formats': formats,
+        }
+
+    def estimate_sizes(self, info, labels=None, compatibility_mode=False):
+        """
+        [(label, bytes or None)] for each quality label (default: quality_labels(info)).
+        Runs yt-dlp's real format selector over the cached format table, so the
+        estimate is for the exact formats a download would pick. Audio Only is
+        the size of the downloaded stream, before conversion.
+        """
+        labels = labels or quality_labels(info)
+        if not info.get('formats'): return [(label, None) for label in labels]
+        with self.ydl_pool.lease({'quiet': True}) as ydl:
+            picks = [self._pick_format(ydl, info, label, compatibility_mode) for label in labels]
+        return [(label, estimate_size(p, info.get('duration')) if p else None) for label, p in zip(labels, picks)]
+
+    @staticmethod
+    def _pick_format(ydl, info, quality, compatibility_mode=False):
+        """The format (or merged pair) yt-dlp would download for `quality`, from the cached table."""
+        spec = get_quality_opts(quality, compatibility_mode=compatibility_mode)['format']
+        try:
+            picked = ydl._select_formats(info.get('formats') or [], ydl.build_format_selector(spec))
+        except Exception as e:
+            print(f"Format selection error ({quality}): {e}")
+            return None
+        return picked[0] if picked else None
+
+    def estimate_footprint(self, info, quality, advanced_opts):
+        """Peak bytes on disk for downloading `info` at `quality` with these options. None if unknown."""
+        if not info or not info.get('formats'): return None
+        with self.ydl_pool.lease({'quiet': True}) as ydl:
+            picked = self._pick_format(ydl, info, quality, advanced_opts.get('compatibility_mode', False))
+        duration = info.get('duration') or 0
+        download = estimate_size(picked, duration) if picked else None
+        if not download: return None
+
+        # Clips only download (roughly) their section
+        start = parse_time_to_seconds(advanced_opts.get('time_start')) or 0
+        end = parse_time_to_seconds(advanced_opts.get('time_end'))
+        seconds = duration
+        if duration and (start or (end is not None and end < duration)):
+            seconds = max(0, min(end if end is not None else duration, duration) - start)
+            download = download * seconds / duration
+        clip = seconds != duration and "Audio Only" not in quality
+        audio = advanced_opts.get('audio_outputs') if "Audio Only" in quality else None
+        return peak_footprint(download, merge=bool(picked.get('requested_formats')), clip=clip,
+                              audio_outputs=audio, seconds=seconds)
+
+    def link_speed(self, url):
+        """Expected download speed (bytes/s) for `url`: the measured one, capped by the global limit."""
+        speed = self.tuner.link_speed(host_key(url))
+        if self.bandwidth.total_rate: speed = min(speed or self.bandwidth.total_rate, self.bandwidth.total_rate)
+        return speed
+
+    def resolve_auto_quality(self, url, budget_seconds, compatibility_mode=False, info=None):
+        """
+        Picks the best quality that downloads within `budget_seconds` at the measured
+        link speed (see formats.pick_for_budget). Returns (label, estimated bytes, speed);
+        label is None when the video's formats are unknown.
+        """
+        info = info or self.fetch_video_info(url)
+        if not info: return None, None, None
+        estimates = self.estimate_sizes(info, compatibility_mode=compatibility_mode)
+        speed = self.link_speed(url)
+        label = pick_for_budget(estimates, budget_seconds, speed)
+        return label, dict(estimates).get(label), speed
+
+    def estimate_clip(self, url, quality, start, end):
+        """
+        ClipPlan (re-encoded vs copied seconds) for clipping `url` at `quality`,
+        probed from the format the download would most likely pick. None if
+        it can't be probed (no metadata, no ffprobe, audio only).
+        """
+        if "Audio Only" in quality or shutil.which('ffprobe') is None: return None
+        info = self.fetch_video_info(url)
+        if not info: return None
+        videos = [f for f in info['formats'] if f.get('vcodec') not in (None, 'none') and f.get('height') and f.get('url')]
+        if not videos: return None
+        match = re.search(r'(\d{3,4})p', quality)
+        limit = int(match.group(1)) if match else (None if ("4K" in quality or "Best" in quality) else 1080)
+        fitting = [f for f in videos if limit is None or f['height'] <= limit] or videos
+        fmt = max(fitting, key=lambda f: (f['height'], f.get('tbr') or 0))
+        end = end if end is not None else info.get('duration') or 0
+        if end <= start: return None
+        from clipping import plan_remote
+        try:
+            return plan_remote(fmt['url'], start, end)
+        except Exception as e:
+            print(f"Clip estimate error: {e}")
+            return None
+
     def start_download(self, url, path, quality, custom_name, advanced_opts,
                        progress_callback, status_callback, finish_callback, error_callback, is_resume=False):
-        self.abort_action = None
-        self.is_downloading = True
+        job = DownloadJob(url, path, quality, custom_name, advanced_opts,
+                          progress_callback, status_callback, finish_callback, error_callback, is_resume)
+        with self._lock: self.jobs[job.id] = job
+        self.submit(job)
+        return job
 
-        t = threading.Thread(target=self._run_process, 
-                             args=(url, path, quality, custom_name, advanced_opts,
-                                   progress_callback, status_callback, finish_callback, error_callback, is_resume))
-        t.start()
+    def submit(self, job):
+        job.metrics = JobMetrics()  # every (re)submission is a new run
+        self._set_state(job, 'queued')
+        self._ensure_workers()
+        self._queue.put(job)
+        return job
 
-    def cancel(self): self.abort_action = 'cancel'
-    def stop_and_save(self): self.abort_action = 'stop_save'
-    
-    def manual_cleanup(self):
-        self.abort_action = 'cancel'
-        return self._handle_cleanup_and_exit()
-
-    def restore_partials(self):
-        if not self.active_dir or not self.active_file_prefix: return
-        search_pattern = os.path.join(self.active_dir, f"{self.active_file_prefix}*")
-        found_files = glob.glob(search_pattern)
-        for f in found_files:
-            # Skip metadata/thumbs, only touch video parts
-            if f.lower().endswith(('.part', '.ytdl', '.info.json', '.webp', '.jpg', '.png', '.description')): continue
-            
-            part_name = f + ".part"
-            if not os.path.exists(part_name):
-                try: os.rename(f, part_name)
-                except: pass
+    def resume(self, job):
+        """Re-queues a paused job. Reuses its saved name so no new collision search happens."""
+        self.restore_partials(job)
+        job.abort_action = None
+        job.is_resume = True
+        if job.active_file_prefix: job.custom_name = job.active_file_prefix
+        return self.submit(job)
+
+    def cancel_all(self):
+        with self._lock: jobs = list(self.jobs.values())
+        for job in jobs:
+            if job.is_downloading: job.cancel()
+
+    # --- Playlists / Channels ---
+    def iter_playlist(self, url, _depth=0):
+        """
+        Yields {'url', 'id', 'title'} for each entry, lazily. Uses flat extraction
+        with process=False, so yt-dlp pages through the playlist as we iterate
+        instead of building every entry's full info dict up front.
+        A plain video URL yields itself once.
+        """
+        import yt_dlp
+        opts = {'quiet': True, 'skip_download': True, 'extract_flat': 'in_playlist', 'lazy_playlist': True}
+        # Private instance: the lease would be held for the whole (possibly long) walk
+        with yt_dlp.YoutubeDL(params=opts) as ydl: # type: ignore
+            info = ydl.extract_info(url, download=False, process=False)
+            yield from self._walk_entries(ydl, info, url, _depth)
+
+    def _walk_entries(self, ydl, info, url, depth):
+        if not info: return
+        kind = info.get('_type', 'video')
+        if kind in ('playlist', 'multi_video'):
+            for entry in info.get('entries') or []:
+                if entry: yield from self._walk_entries(ydl, entry, url, depth)
+        elif kind in ('url', 'url_transparent') and depth < config.PLAYLIST_MAX_DEPTH and self._is_container_ie(info.get('ie_key')):
+            # Nested tab / sub-playlist (e.g. a channel's "Videos" tab): expand it lazily too
+            nested = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+            if nested and nested.get('_type') in ('playlist', 'multi_video'):
+                yield from self._walk_entries(ydl, nested, url, depth + 1)
+            else:
+                yield self._flat_entry(info, url)
+        else:
+            yield self._flat_entry(info, url)
+
+    @staticmethod
+    def _is_container_ie(ie_key):
+        # Tabs/playlists/channels; following a plain video entry would cost a full extraction
+        return bool(ie_key) and any(x in ie_key for x in ('Tab', 'Playlist', 'Channel'))
+
+    def _flat_entry(self, info, fallback_url):
+        return {
+            'url': info.get('webpage_url') or info.get('url') or fallback_url,
+            'id': info.get('id'),
+            'title': info.get('title'),
+            'ie_key': info.get('ie_key'),
+        }
+
+    def start_playlist(self, url, path, quality, advanced_opts, make_callbacks):
+        """
+        Expands a playlist/channel in the background and queues each entry as
+        soon as it is discovered. `make_callbacks(entry)` returns the usual
+        progress/status/finish/error callbacks for that entry's job, plus an
+        optional 'job_callback' that gets the DownloadJob once it is queued.
+        Metadata for upcoming entries is resolved PLAYLIST_METADATA_WORKERS at a
+        time, and expansion pauses while PLAYLIST_MAX_PENDING entries are in flight.
+        """
+        run = PlaylistRun(url)
+        threading.Thread(target=self._expand_playlist, daemon=True, name="playlist-expander",
+                         args=(run, self.iter_playlist(url), path, quality, advanced_opts, make_callbacks)).start()
+        return run
+
+    def start_batch(self, urls, path, quality, advanced_opts, make_callbacks):
+        """
+        Queues a list of URLs (pasted, from a file or stdin) the way playlist
+        entries are: metadata is prefetched PLAYLIST_METADATA_WORKERS at a time
+        and each job enters the queue once its info is cached, so download
+        workers never sit waiting on extraction. Links that turn out to be the
+        same video are queued once. Returns the PlaylistRun handle.
+        """
+        run = PlaylistRun(None)
+        run.total = len(urls)
+        entries = ({'url': url, 'id': None, 'title': None} for url in urls)
+        threading.Thread(target=self._expand_playlist, daemon=True, name="batch-prefetch",
+                         args=(run, entries, path, quality, advanced_opts, make_callbacks)).start()
+        return run
+
+    def _expand_playlist(self, run, entries, path, quality, advanced_opts, make_callbacks):
+        slots = threading.Semaphore(config.PLAYLIST_MAX_PENDING)
+        try:
+            with ThreadPoolExecutor(max_workers=config.PLAYLIST_METADATA_WORKERS) as resolver:
+                for entry in entries:
+                    while not slots.acquire(timeout=0.5):
+                        if run.cancelled: break
+                    if run.cancelled: break
+                    with run._lock: run.discovered += 1
+                    resolver.submit(self._resolve_and_queue, run, entry, slots, path, quality, advanced_opts, make_callbacks)
+        except Exception as e:
+            run.error = str(e)
+            print(f"Playlist expansion error: {e}")
+        finally:
+            run.expanded.set()
+
+    def _resolve_and_queue(self, run, entry, slots, path, quality, advanced_opts, make_callbacks):
+        cbs = make_callbacks(entry)
+        holder = {}
+
+        def done(failed):
+            job = holder.get('job')
+            with run._lock:
+                if job is not None: run.active.pop(job.id, None)
+                run.finished += 1
+                if failed: run.failed += 1
+            slots.release()
+
+        def finish(success):
+            if holder['job'].state != 'paused': done(not success)
+            cbs['finish_callback'](success)
+
+        def error(msg):
+            done(True)
+            cbs['error_callback'](msg)
+
+        if run.cancelled:
+            done(True)
+            return
+        if advanced_opts.get('use_archive', True) and self._entry_archive_id(entry) in self.archive:
+            # Skipped on the ID the link / flat entry already carries, before any extraction
+            done(False)
+            cbs['status_callback']("Already downloaded (in archive). Skipped.", "green")
+            cbs['finish_callback'](True)
+            return
+        # Warms the metadata cache so the job's title lookup is a cache hit
+        archive_id = DownloadArchive.id_for_info(self.fetch_video_info(entry['url']))
+        if run.cancelled:
+            # Cancelled while this entry was being resolved
+            done(True)
+            return
+        with run._lock:
+            duplicate = archive_id in run.seen
+            if archive_id: run.seen.add(archive_id)
+        if duplicate:
+            # Different links (or a playlist listing a video twice) for a video already queued
+            with run._lock: run.duplicates += 1
+            done(False)
+            cbs['status_callback']("Same video as an earlier link. Skipped.", "green")
+            cbs['finish_callback'](True)
+            return
+        job = DownloadJob(entry['url'], path, quality, "", dict(advanced_opts),
+                          cbs['progress_callback'], cbs['status_callback'], finish, error)
+        holder['job'] = job
+        with run._lock: run.active[job.id] = job
+        with self._lock: self.jobs[job.id] = job
+        if cbs.get('job_callback'): cbs['job_callback'](job)
+        self.submit(job)
+
+    @staticmethod
+    def _entry_archive_id(entry):
+        """Archive ID of a playlist / batch entry without extracting it; None if it can't be told."""
+        archive_id = DownloadArchive.id_for_url(entry['url'])
+        if not archive_id and entry.get('ie_key') and entry.get('id'):
+            archive_id = f"{entry['ie_key'].lower()} {entry['id']}"
+        return archive_id
+
+    # --- Crash Recovery ---
+    def recover_jobs(self, make_callbacks):
+        """
+        Rebuilds jobs the journal saw queued/running/processing/paused when the last process
+        ended. They come back paused with their resolved name (is_resume=True), so
+        resume() needs no title fetch or collision search; the recorded manifest
+        and saved partials drive restore_partials().
+        `make_callbacks(record)` returns the callbacks for each recovered job.
+        """
+        jobs = []
+        for rec in self.journal.load_unfinished():
+            job = DownloadJob(rec['url'], rec['path'], rec['quality'], rec['final_name'] or "",
+                              rec['options'], is_resume=bool(rec['final_name']), **make_callbacks(rec))
+            job.uid = rec['uid']
+            job.created_at = rec['created_at']
+            job.active_dir = rec['path']
+            job.active_file_prefix = rec['final_name']
+            job.manifest = set(rec['manifest'])
+            job.saved_partials = list(rec['saved_partials'])
+            job.recovered_bytes = (rec['downloaded'], rec['total'])
+            with self._lock: self.jobs[job.id] = job
+            self._set_state(job, 'paused')
+            jobs.append(job)
+        return jobs
+
+    def manual_cleanup(self, job):
+        """Cancels a paused job (no worker owns it): deletes its files and ends it like a worker would."""
+        job.abort_action = 'cancel'
+        msg = self._handle_cleanup_and_exit(job)
+        self._set_state(job, 'cancelled')
+        with self._lock: self.jobs.pop(job.id, None)
+        # Playlist / batch entries free their slot and count as finished through this
+        job.finish_callback(success=False)
+        return msg
+
+    def restore_partials(self, job):
+        """Turns the partials saved by stop/pause back into .part files so yt-dlp continues them."""
+        for part_name, f in job.saved_partials:
+            if os.path.exists(f) and not os.path.exists(part_name):
+                try:
+                    os.rename(f, part_name)
+                    self.dir_index.rename(f, part_name)
+                    job.manifest.discard(f)
+                    job.manifest.add(part_name)
+                except OSError: pass
+        job.saved_partials = []
 
     def _get_unique_filename(self, path, base_name, ext, is_resume=False):
         """
         Determines final filename.
         Resume: Returns base_name (No checks, trusts the saved name).
-        Start:  Loops (1, 2, 3...) using SMART GLOB to find empty slots.
-                It considers a slot 'taken' if ANY video file exists,
-                but ignores .webp/.json files.
+        Start:  Loops (1, 2, 3...) asking the DIRECTORY INDEX for empty slots.
+                A slot is 'taken' if ANY video/part file "name.*" exists
+                or a running job reserved it; .webp/.json sidecars are ignored.
         """
         if is_resume: return base_name
 
-        def is_taken(candidate_name):
-            # 1. PARANOID GLOB SEARCH
-            # Find ANY file that starts with "candidate_name."
-            pattern = os.path.join(path, f"{candidate_name}.*")
-            matches = glob.glob(pattern)
-            
-            # 2. FILTER RESULTS
-            for f in matches:
-                # If we find a file, check its extension
-                lower_f = f.lower()
-                
-                # IGNORE these extensions (Metadata/Thumbs are NOT collisions)
-                if lower_f.endswith(('.webp', '.jpg', '.png', '.description', '.info.json', '.txt')):
-                    continue
-                
-                # If it's NOT in the ignore list, it's a Video/Part/Temp file.
-                # This counts as a collision!
-                return True
-            
-            return False
-
         # --- LOOP LOGIC ---
         # 1. Try Base Name
-        if not is_taken(base_name): return base_name
+        if not self.dir_index.is_taken(path, base_name, ext): return base_name
 
-        # 2. Loop until we find a "Safe" slot
+        # 2. Loop until we find a "Safe" slot (each check is a dict lookup)
         counter = 1
         while True:
             new_name = f"{base_name} ({counter})"
-            if not is_taken(new_name): return new_name
+            if not self.dir_index.is_taken(path, new_name, ext): return new_name
             counter += 1
 
-    def _run_process(self, url, path, quality, custom_name, advanced_opts,
-                     progress_callback, status_callback, finish_callback, error_callback, is_resume):
-        
+    def _reserve_filename(self, job, path, base_name, ext):
+        """Picks a unique name and claims it until the job ends, so parallel jobs never share one."""
+        with self._name_lock:
+            name = self._get_unique_filename(path, base_name, ext, job.is_resume)
+            self.dir_index.reserve(path, name)
+            job.reserved_name = (path, name)
+            return name
+
+    def _release_filename(self, job):
+        if not job.reserved_name: return
+        # Whatever the job left on disk now has to hold the name on its own
+        for f in job.manifest:
+            if os.path.exists(f): self.dir_index.add(f)
+        with self._name_lock:
+            self.dir_index.release(*job.reserved_name)
+            job.reserved_name = None
+
+    def _run_process(self, job):
+        url, path, quality, custom_name, advanced_opts = job.url, job.path, job.quality, job.custom_name, job.advanced_opts
+        progress_callback, status_callback = job.progress_callback, job.status_callback
+        finish_callback, error_callback = job.finish_callback, job.error_callback
+        job.metrics.add('queue_wait', time.perf_counter() - job.metrics.queued_at)
+        self._set_state(job, 'running')
+
         def hook(d):
-            if self.abort_action: raise Exception("ABORT_SIGNAL")
+            if job.abort_action: raise Exception("ABORT_SIGNAL")
+            tmp = d.get('tmpfilename')
+            if tmp and tmp not in seen_tmp:
+                # First tick for this stream: record it (+ yt-dlp's .ytdl resume file)
+                seen_tmp.add(tmp)
+                job.track(tmp)
+                job.track(tmp + '.ytdl')
+                job.track(d.get('filename'))
+                # Fragment downloaders keep their resume state next to the final name
+                if d.get('filename'): job.track(d['filename'] + '.ytdl')
+                job.track_info(d.get('info_dict'))
+                if not job.archive_id:
+                    i = d.get('info_dict') or {}
+                    job.archive_id = DownloadArchive.id_for_info({'id': i.get('id'), 'extractor': i.get('extractor_key')})
+            if d.get('fragment_index') is not None and tmp:
+                # fragment_index counts finished fragments; files are numbered from 1, and
+                # with concurrent fragments several of the next ones are already in flight
+                ahead = (ydl_ref['ydl'].params.get('concurrent_fragment_downloads') or 1) if ydl_ref.get('ydl') else 1
+                for i in range(d['fragment_index'], d['fragment_index'] + ahead + 1):
+                    job.track(f"{tmp}-Frag{i}")
+                    job.track(f"{tmp}-Frag{i}.part")
             if d['status'] == 'downloading':
-                progress_callback(d.get('downloaded_bytes', 0), d.get('total_bytes') or d.get('total_bytes_estimate') or 0, d.get('speed', 0), d.get('eta', 0))
+                if d.get('filename') not in stream_start:
+                    stream_start[d.get('filename')] = (time.monotonic(), d.get('downloaded_bytes') or 0)
+                # Charge the bytes since the last tick to this job's share of the global budget
+                got = d.get('downloaded_bytes') or 0
+                delta = got - last_bytes.get(d.get('filename'), got)
+                last_bytes[d.get('filename')] = max(got, last_bytes.get(d.get('filename'), 0))
+                if delta > 0:
+                    job.metrics.bytes += delta
+                    self.disk.progress(job.uid, job.metrics.bytes)
+                    self.bandwidth.consume(job.uid, delta, lambda: job.abort_action)
+                job.metrics.tick(got, d.get('speed'))
+                total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+                self.journal.progress(job, d.get('downloaded_bytes', 0), total)
+                progress_callback(d.get('downloaded_bytes', 0), total, d.get('speed', 0), d.get('eta', 0))
             elif d['status'] == 'finished':
-                status_callback("Download 100%. Processing & Converting...", "blue")
+                job.track(d.get('filename'))
+                if adaptive: self._adaptive_feedback(url, ydl_ref.get('ydl'), stream_start.get(d.get('filename')), d)
+                status_callback("Download 100%.", "blue")
+
+        def pp_hook(d):
+            job.track_info(d.get('info_dict'))
+            # yt-dlp's set_downloader() re-adds hooks, so one event can arrive twice (same dict)
+            if d['status'] == 'started' and d is not pp_last.get('started'):
+                pp_last['started'] = d
+                job.pp_step += 1
+                status_callback(f"Post-processing (step {job.pp_step}): {d.get('postprocessor')}...", "blue")
+
+        seen_tmp = set()
+        stream_start = {}  # filename -> (monotonic time, bytes) at its first tick
+        last_bytes = {}    # filename -> downloaded_bytes at the previous tick
+        pp_last = {}
+        ydl_ref = {}
+        adaptive = False
+        abort_exc = None
+        handed_off = False
 
         try:
+            # One metadata lookup (cache first) serves Auto quality, disk admission and the file name
+            status_callback("Fetching video info..." if custom_name else "Fetching title...", "black")
+            with job.metrics.phase('metadata'): info = self.fetch_video_info(url)
+            if info:
+                # Non-YouTube URLs only get an archive ID once extracted
+                job.archive_id = job.archive_id or DownloadArchive.id_for_info(info)
+                if self._skip_if_archived(job): return
+
+            if quality == config.AUTO_QUALITY:
+                # Resolved once: the journal keeps the concrete label, so a resume gets the same formats
+                status_callback("Choosing quality for the time budget...", "black")
+                with job.metrics.phase('metadata'):
+                    label, size, speed = self.resolve_auto_quality(
+                        url, advanced_opts.get('time_budget') or config.AUTO_TIME_BUDGET,
+                        advanced_opts.get('compatibility_mode', False), info=info)
+                quality = job.quality = label or config.DEFAULT_QUALITY
+                advanced_opts['container'] = 'mkv' if is_high_res(quality) else 'mp4'
+                status_callback(f"Auto quality: {quality} ({describe_estimate(size, speed)})", "blue")
+            if self._hold_for_disk_space(job, quality, info):
+                handed_off = True  # back in the queue once space frees up
+                return True
+
             target_ext = advanced_opts.get('container', 'mp4')
-            if "Audio Only" in quality: target_ext = "mp3"
+            audio_outputs = advanced_opts.get('audio_outputs') or []
+            if "Audio Only" in quality:
+                target_ext = AUDIO_CODECS.get(audio_outputs[0][0], "mp3") if audio_outputs else "mp3"
 
             if custom_name:
-                final_name = self._get_unique_filename(path, custom_name, target_ext, is_resume)
+                final_name = self._reserve_filename(job, path, custom_name, target_ext)
+            elif info:
+                safe_title = info['title'].replace('/', '_').replace('\\', '_').replace(':', '-')
+                final_name = self._reserve_filename(job, path, safe_title, target_ext)
             else:
-                status_callback("Fetching title...", "black")
-                info = self.fetch_video_info(url)
-                if info:
-                    safe_title = info['title'].replace('/', '_').replace('\\', '_').replace(':', '-')
-                    final_name = self._get_unique_filename(path, safe_title, target_ext, is_resume)
-                else:
-                    final_name = "%(title)s"
+                final_name = "%(title)s"
             
-            self.active_dir = path
-            self.active_file_prefix = final_name 
+            job.active_dir = path
+            job.active_file_prefix = final_name
+            self.journal.record(job)
+            if final_name != "%(title)s":
+                # Sidecars are written before any progress tick; their names are fixed by outtmpl.
+                # Only claim names that are free now: an existing Title.jpg is the user's, not ours
+                # (a resume's own sidecars are already in its manifest)
+                for side_ext in ('description', 'info.json', 'webp', 'jpg', 'png'):
+                    side = os.path.join(path, f"{final_name}.{side_ext}")
+                    if not os.path.exists(side): job.track(side)
 
             opts = {
                 'outtmpl': f'{path}/{final_name}.%(ext)s',
                 'noplaylist': True,
                 'progress_hooks': [hook],
+                'postprocessor_hooks': [pp_hook],
+                'post_hooks': [job.track],
                 'addmetadata': advanced_opts.get('embed_meta', False),
                 'writethumbnail': advanced_opts.get('embed_meta', False),
             }
@@ -150,8 +724,12 @@ class DownloadManager:
             is_clipping = not (is_start_zero and is_end_full) and (s_sec is not None or e_sec is not None)
 
             if is_clipping:
+                from yt_dlp.utils import download_range_func
                 opts['download_ranges'] = download_range_func([], [(s_sec, e_sec)]) # type: ignore
                 opts['force_keyframes_at_cuts'] = False 
+            # Video clips: yt-dlp stream-copies the section, KeyframeClipPP then trims it
+            # frame-accurately by re-encoding only the boundary GOPs
+            smart_clip = is_clipping and "Audio Only" not in quality and shutil.which('ffprobe') is not None
 
             if "Audio Only" not in quality:
                 opts['merge_output_format'] = target_ext
@@ -164,62 +742,245 @@ class DownloadManager:
             quality_settings = get_quality_opts(
                 selection=quality, 
                 audio_format=advanced_opts.get('audio_format', 'MP3'),
-                compatibility_mode=advanced_opts.get('compatibility_mode', False)
+                compatibility_mode=advanced_opts.get('compatibility_mode', False),
+                audio_outputs=audio_outputs
             )
             opts.update(quality_settings)
+            # A power arg (SponsorBlock) may ask for keyframes at cuts: that would re-encode the whole section
+            if smart_clip: opts['force_keyframes_at_cuts'] = False
+
+            # yt-dlp compares ratelimit as a number; the power arg stores "5M"
+            if opts.get('ratelimit'): opts['ratelimit'] = parse_rate(opts['ratelimit']) or None
+            # Adaptive fragments (POWER_ARG): start from the best known rung for this host
+            # (skipped when throttled: the measured speed would be our own limit)
+            adaptive = opts.pop('adaptive_fragments', False) and not opts.get('ratelimit') and not self.bandwidth.total_rate
+            if adaptive: opts.update(self.tuner.settings_for(host_key(url)))
 
             for pp in opts.get('postprocessors', []):
                 if pp['key'] == 'FFmpegExtractAudio':
                     pp['preferredquality'] = advanced_opts.get('audio_bitrate', '192')
 
             status_callback("Starting Download...", "black")
-            with yt_dlp.YoutubeDL(params=opts) as ydl: # type: ignore
-                ydl.download([url])
-            
-            finish_callback(success=True)
-            
+            self.bandwidth.register(job.uid, advanced_opts.get('bandwidth_weight', 1.0),
+                                    advanced_opts.get('bandwidth_priority', 0))
+            extra_pps = []
+            if smart_clip:
+                from clipping import KeyframeClipPP
+                clip = (0.0 if is_start_zero else s_sec, None if is_end_full else e_sec)
+                extra_pps.append(lambda ydl: KeyframeClipPP(ydl, *clip))
+            if "Audio Only" in quality and len(audio_outputs) > 1:
+                # One FFmpeg pass decodes once and writes every requested format
+                from audio_export import MultiAudioExportPP
+                extra_pps.append(lambda ydl: MultiAudioExportPP(ydl, audio_outputs))
+            with self.ydl_pool.lease(opts) as ydl:
+                ydl_ref['ydl'] = ydl
+                pending = self._defer_post_processing(ydl)
+                job.metrics.mark('download_start')
+                try: ydl.download([url])
+                finally: job.metrics.end_download()
+            # What this download really got is the next "Auto" choice's link speed
+            transfer = job.metrics.phases.get('transfer')
+            if transfer and job.metrics.bytes >= config.TUNING_MIN_BYTES:
+                self.tuner.observe(host_key(url), job.metrics.bytes / transfer)
+
+            # Network part is done: merge/convert on the post-processing pool while
+            # this worker moves on to the next download
+            self._set_state(job, 'processing')
+            status_callback("Downloaded. Waiting for post-processing...", "blue")
+            job.metrics.mark('handoff')
+            self._post_processor_pool().submit(self._post_process, job, opts, pending, extra_pps)
+            handed_off = True
+            return True
+
         except Exception as e:
-            if self.abort_action is not None or "ABORT_SIGNAL" in str(e):
-                msg = self._handle_cleanup_and_exit()
-                status_callback(msg, "orange" if self.abort_action == 'stop_save' else "red")
-                finish_callback(success=False)
+            if job.abort_action is not None or "ABORT_SIGNAL" in str(e):
+                abort_exc = True
             else:
+                self._set_state(job, 'error')
                 error_callback(str(e))
         finally:
-            self.is_downloading = False
+            # Frees this job's share for the others right away (finish, error, pause, cancel)
+            self.bandwidth.unregister(job.uid)
+            if not handed_off: self._release_disk(job)
+            if not abort_exc and not handed_off: self._release_filename(job)
+
+        if abort_exc:
+            # Outside the except block: the traceback (and the writer's open file) is gone now
+            with job.metrics.phase('cleanup'): msg = self._handle_cleanup_and_exit(job)
+            self._set_state(job, {'cancel': 'cancelled', 'pause': 'paused'}.get(job.abort_action, 'stopped'))
+            self._release_filename(job)
+            status_callback(msg, "red" if job.abort_action == 'cancel' else "orange")
+            finish_callback(success=False)
+
+    # --- Disk space admission ---
+    def _hold_for_disk_space(self, job, quality, info):
+        """
+        Reserves the job's estimated peak footprint on its output volume (minus
+        what a resume already has on disk). Returns True when it doesn't fit yet:
+        the job goes back to 'queued' and is retried when another job releases
+        space (or every DISK_RECHECK_SECONDS). Raises when it can never fit, so it
+        fails before any transfer.
+        """
+        peak = self.estimate_footprint(info, quality, job.advanced_opts)
+        if peak: peak = max(0, peak - self._partial_bytes(job))
+        if not peak: return False  # size unknown (nothing to plan with), or already on disk
+        verdict, available = self.disk.admit(job.uid, job.path, peak)
+        if verdict == 'never':
+            raise Exception(f"Not enough disk space in {job.path}: needs ~{format_bytes(peak)}, "
+                            f"only ~{format_bytes(available)} free")
+        if verdict == 'ok': return False
+        job.metrics.queued_at = time.perf_counter()
+        self._set_state(job, 'queued')
+        job.status_callback(f"Waiting for disk space: needs ~{format_bytes(peak)}, "
+                            f"~{format_bytes(available)} left after running downloads", "orange")
+        with self._lock:
+            self._held.append(job)
+            if self._disk_recheck is None:
+                self._disk_recheck = threading.Thread(target=self._disk_recheck_loop, daemon=True, name="disk-admission")
+                self._disk_recheck.start()
+        return True
+
+    def _partial_bytes(self, job):
+        """Bytes of a resumed job's .part / fragment / saved partial files (they count toward its peak already)."""
+        if not job.is_resume or not job.active_file_prefix: return 0
+        prefix = f"{job.active_file_prefix}."
+        try:
+            with os.scandir(job.active_dir or job.path) as entries:
+                return sum(e.stat().st_size for e in entries if e.name.startswith(prefix) and e.is_file())
+        except OSError: return 0
+
+    def _release_disk(self, job):
+        if self.disk.release(job.uid): self._requeue_held()
+
+    def _requeue_held(self):
+        # Held jobs never left the queue's unfinished count: put() + task_done() keeps it balanced
+        with self._lock: held, self._held = self._held, []
+        for job in held:
+            self._queue.put(job)
+            self._queue.task_done()
+
+    def _disk_recheck_loop(self):
+        # Space can also free up outside the app (files deleted, another program finishing)
+        while True:
+            time.sleep(config.DISK_RECHECK_SECONDS)
+            with self._lock:
+                if not self._held:
+                    self._disk_recheck = None
+                    return
+            self._requeue_held()
+
+    # --- Post-processing stage ---
+    def _post_processor_pool(self):
+        with self._lock:
+            if self._pp_executor is None:
+                self._pp_executor = ThreadPoolExecutor(max_workers=config.POSTPROCESS_WORKERS,
+                                                       thread_name_prefix="postprocess")
+            return self._pp_executor
+
+    @staticmethod
+    def _defer_post_processing(ydl):
+        """
+        Makes the leased YoutubeDL stop after downloading: process_info()'s call
+        to post_process() only records its arguments. Returns the list they go to.
+        The pool drops this override when the lease ends.
+        """
+        pending = []
+        def capture(filename, info, files_to_move=None):
+            info['filepath'] = filename
+            pending.append((filename, info, files_to_move))
+            return info
+        ydl.post_process = capture
+        return pending
+
+    def _post_process(self, job, opts, pending, extra_pps):
+        """Runs on the post-processing pool: merge / extract audio / embed / clip, then finish the job."""
+        job.metrics.mark('pp_start')
+        job.metrics.span('postprocess_wait', 'handoff', 'pp_start')
+        try:
+            with job.metrics.phase('postprocess', cpu=True), self.ydl_pool.lease(opts) as ydl:
+                for make_pp in extra_pps: ydl.add_post_processor(make_pp(ydl), when='post_process')
+                for filename, info, files_to_move in pending:
+                    # Merger/fixups queued on the info dict were bound to the download's instance
+                    for pp in info.get('__postprocessors') or []: pp.set_downloader(ydl)
+                    job.track_info(ydl.post_process(filename, info, files_to_move))
+
+            if job.abort_action == 'cancel':
+                # FFmpeg can't be interrupted midway; a cancel during processing deletes afterwards
+                with job.metrics.phase('cleanup'): msg = self._handle_cleanup_and_exit(job)
+                self._set_state(job, 'cancelled')
+                job.status_callback(msg, "red")
+                job.finish_callback(success=False)
+            else:
+                self.archive.add(job.archive_id)
+                self._set_state(job, 'done')
+                job.finish_callback(success=True)
+        except Exception as e:
+            self._set_state(job, 'error')
+            job.error_callback(str(e))
+        finally:
+            self._release_filename(job)
+            self._release_disk(job)
+            self._finish_job(job)
 
-    def _handle_cleanup_and_exit(self):
-        if not self.active_dir or not self.active_file_prefix: return "Cancelled."
-        time.sleep(0.5) 
-        search_pattern = os.path.join(self.active_dir, f"{self.active_file_prefix}*")
+    def _adaptive_feedback(self, url, ydl, start, d):
+        """
+        Called when a stream finishes: reports its throughput to the tuner and
+        applies the next settings to the live YoutubeDL, so the job's following
+        stream (e.g. audio after video) and later jobs on this host use them.
+        """
+        if not ydl or not start: return
+        elapsed = time.monotonic() - start[0]
+        transferred = (d.get('downloaded_bytes') or d.get('total_bytes') or 0) - start[1]
+        if elapsed < config.TUNING_MIN_SECONDS or transferred < config.TUNING_MIN_BYTES: return
+        host = host_key(url)
+        used = {k: ydl.params.get(k) for k in ('concurrent_fragment_downloads', 'http_chunk_size')}
+        self.tuner.report(host, used, transferred / elapsed)
+        ydl.params.update(self.tuner.settings_for(host))
+
+    def _handle_cleanup_and_exit(self, job):
         action_msg = "Cancelled."
-        if self.abort_action == 'stop_save': action_msg = "Stopped. Saved partials."
-        
-        for attempt in range(6): 
-            found_files = glob.glob(search_pattern)
-            files_locked = False
-            for f in found_files:
-                try:
-                    # CANCEL: Delete EVERYTHING (Video + Thumbs)
-                    if self.abort_action == 'cancel':
-                        if os.path.exists(f): os.remove(f)
-                    
-                    # STOP & SAVE: Protect Video, Delete ONLY junk
-                    elif self.abort_action == 'stop_save':
-                        if f.endswith('.part'):
-                            new_name = f.replace('.part', '')
-                            if os.path.exists(new_name): os.remove(new_name)
-                            os.rename(f, new_name)
-                        
-                        # PROTECT these (Ignored extensions)
-                        elif f.lower().endswith(('.webp', '.jpg', '.png', '.description', '.info.json')):
-                            pass 
-                        
-                        # DELETE pure junk
-                        elif f.endswith('.ytdl'):
-                            os.remove(f) 
-                except PermissionError: files_locked = True
-                except Exception: pass
-            if not files_locked: break
-            time.sleep(0.5)
-        return action_msg
\ No newline at end of file
+        if job.abort_action == 'stop_save': action_msg = "Stopped. Saved partials."
+        elif job.abort_action == 'pause': action_msg = "Paused. Saved partials."
+        if not job.manifest: return action_msg
+
+        # Frames from the aborted download may sit in a reference cycle still holding
+        # the .part handle; collect them instead of sleeping until Windows lets go.
+        gc.collect()
+        delay = config.CLEANUP_RETRY_DELAY
+        for attempt in range(config.CLEANUP_RETRIES):
+            if not self._cleanup_manifest(job): break
+            time.sleep(delay)
+            delay *= 2
+        return action_msg
+
+    def _cleanup_manifest(self, job):
+        """One pass over the job's own files. Returns True if something was still locked."""
+        files_locked = False
+        for f in sorted(job.manifest):
+            if not os.path.exists(f): continue
+            try:
+                # CANCEL: Delete EVERYTHING (Video + Thumbs)
+                if job.abort_action == 'cancel':
+                    os.remove(f)
+                    self.dir_index.discard(f)
+                    job.manifest.discard(f)
+
+                # STOP & SAVE / PAUSE: Protect Video, Delete ONLY junk
+                elif job.abort_action in ('stop_save', 'pause'):
+                    if f.endswith('.part') and '-Frag' not in os.path.basename(f):
+                        new_name = f[:-len('.part')]
+                        if os.path.exists(new_name): os.remove(new_name)
+                        os.rename(f, new_name)
+                        self.dir_index.rename(f, new_name)
+                        job.manifest.discard(f)
+                        job.manifest.add(new_name)
+                        job.saved_partials.append((f, new_name))
+
+                    # DELETE pure junk (PROTECT sidecars: thumbs/description/json)
+                    elif f.endswith('.ytdl') or '-Frag' in os.path.basename(f):
+                        os.remove(f)
+                        self.dir_index.discard(f)
+                        job.manifest.discard(f)
+            except PermissionError: files_locked = True
+            except OSError: pass
+        return files_locked
@@ -1,14 +1,56 @@
+import sys
+import time
+_T0 = time.perf_counter()
+
 import tkinter as tk
+import config
 from gui.main_window import YTDLPGui
+_T_IMPORTS = time.perf_counter()
+
+# Must not be imported before the window is on screen (see gui.main_window._background_init)
+HEAVY_MODULES = ("yt_dlp", "PIL", "requests")
+
+def _ms(t): return (t - _T0) * 1000
+
+def run_startup_profile(root, app):
+    """
+    --startup-profile: reports time-to-first-window and background warm-up,
+    then exits. Non-zero exit code if the budget is blown or a heavy module
+    was imported before first paint, so it can gate releases / CI.
+    """
+    root.update()  # forces map + first draw
+    t_window = time.perf_counter()
+    eager = [m for m in HEAVY_MODULES if m in sys.modules]
+
+    def finish():
+        if not app.warmup_done.is_set():
+            root.after(20, finish)
+            return
+        t_warm = time.perf_counter()
+        over_budget = _ms(t_window) > config.STARTUP_BUDGET_MS
+        print("Startup profile:")
+        print(f"  imports              {_ms(_T_IMPORTS):8.1f} ms")
+        print(f"  first window         {_ms(t_window):8.1f} ms  (budget {config.STARTUP_BUDGET_MS} ms){'  OVER BUDGET' if over_budget else ''}")
+        print(f"  background warm-up   {_ms(t_warm):8.1f} ms")
+        print(f"  heavy imports before first paint: {', '.join(eager) or 'none'}")
+        root.exit_code = 1 if (over_budget or eager) else 0
+        root.destroy()
+
+    root.after(0, finish)
 
 def main():
     root = tk.Tk()
     # Optional: Set icon if you have one
     # try: root.iconbitmap("icon.ico")
     # except: pass
-    
-    app = YTDLPGui(root)
+
+    profile = "--startup-profile" in sys.argv[1:]
+    app = YTDLPGui(root, startup_warnings=not profile)
+    root.exit_code = 0
+    if profile:
+        run_startup_profile(root, app)
     root.mainloop()
+    return root.exit_code
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
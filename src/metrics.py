@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+import config
+
+# Phases in the order a job goes through them (also the order in the outputs)
+PHASES = ('queue_wait', 'metadata', 'extract', 'transfer', 'postprocess_wait', 'postprocess', 'cleanup')
+
+def _children_cpu():
+    t = os.times()
+    return t.children_user + t.children_system
+
+class JobMetrics:
+    """
+    Timings and byte counts for one run of a job (a resume starts a new run).
+    Phases are wall-clock seconds from time.perf_counter(). pp_cpu_seconds is
+    the CPU time of child processes (FFmpeg) that exited during post-processing.
+    It is process-wide, so it is approximate while several jobs post-process
+    at once, and always 0 on Windows.
+    """
+    __slots__ = ('queued_at', 'phases', 'marks', 'bytes', 'peak_bps', 'ttfb', 'pp_cpu_seconds')
+
+    def __init__(self):
+        self.queued_at = time.perf_counter()
+        self.phases = {}
+        self.marks = {}
+        self.bytes = 0
+        self.peak_bps = 0.0
+        self.ttfb = None
+        self.pp_cpu_seconds = 0.0
+
+    @contextmanager
+    def phase(self, name, cpu=False):
+        start, cpu_start = time.perf_counter(), _children_cpu() if cpu else 0.0
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+            if cpu: self.pp_cpu_seconds += max(0.0, _children_cpu() - cpu_start)
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def mark(self, name):
+        """Records a point in time once; returns it."""
+        return self.marks.setdefault(name, time.perf_counter())
+
+    def span(self, name, start_mark, end_mark):
+        """Adds the time between two marks as a phase (if both happened)."""
+        if start_mark in self.marks and end_mark in self.marks:
+            self.add(name, self.marks[end_mark] - self.marks[start_mark])
+
+    # --- Download hook ---
+    def tick(self, downloaded, speed):
+        now = self.mark('first_tick')
+        if downloaded and self.ttfb is None and 'download_start' in self.marks:
+            self.ttfb = now - self.marks['download_start']
+        if speed and speed > self.peak_bps: self.peak_bps = speed
+        self.marks['last_tick'] = time.perf_counter()
+
+    def end_download(self):
+        """Turns the download marks into 'extract' (until the first tick) and 'transfer' phases."""
+        if 'download_start' not in self.marks: return
+        self.mark('first_tick')  # no tick at all: the whole call was extraction (or failed in it)
+        self.span('extract', 'download_start', 'first_tick')
+        self.span('transfer', 'first_tick', 'last_tick')
+
+    def as_record(self, job):
+        transfer = self.phases.get('transfer', 0.0)
+        return {
+            'ts': round(time.time(), 3),
+            'job': job.uid,
+            'url': job.url,
+            'quality': job.quality,
+            'state': job.state,
+            'phases': {p: round(self.phases[p], 4) for p in PHASES if p in self.phases},
+            'total_seconds': round(time.perf_counter() - self.queued_at, 4),
+            'bytes': self.bytes,
+            'ttfb_seconds': round(self.ttfb, 4) if self.ttfb is not None else None,
+            'avg_bps': round(self.bytes / transfer) if transfer > 0 else None,
+            'peak_bps': round(self.peak_bps),
+            'pp_cpu_seconds': round(self.pp_cpu_seconds, 3),
+        }
+
+class MetricsSink:
+    """
+    Receives a JobMetrics record whenever a run ends. It appends the record as
+    one JSON line to jsonl_path and rewrites prom_path: process-lifetime
+    counters and summaries in the Prometheus text format, in the shape
+    node_exporter's textfile collector expects (atomic replace). Pass "" for
+    either path to turn that output off (None = the config default).
+    """
+    def __init__(self, jsonl_path=None, prom_path=None):
+        self.jsonl_path = config.METRICS_JSONL_PATH if jsonl_path is None else jsonl_path
+        self.prom_path = config.METRICS_PROM_PATH if prom_path is None else prom_path
+        self._jobs = {}                               # final state -> count
+        self._phase = {p: [0.0, 0] for p in PHASES}   # phase -> [sum, count]
+        self._ttfb = [0.0, 0]
+        self._bytes = 0
+        self._pp_cpu = 0.0
+        self._peak = 0.0
+        self._lock = threading.Lock()
+
+    def emit(self, job):
+        record = job.metrics.as_record(job)
+        with self._lock:
+            self._jobs[record['state']] = self._jobs.get(record['state'], 0) + 1
+            for name, seconds in record['phases'].items():
+                self._phase[name][0] += seconds
+                self._phase[name][1] += 1
+            if record['ttfb_seconds'] is not None:
+                self._ttfb[0] += record['ttfb_seconds']
+                self._ttfb[1] += 1
+            self._bytes += record['bytes']
+            self._pp_cpu += record['pp_cpu_seconds']
+            self._peak = max(self._peak, record['peak_bps'])
+            try:
+                if self.jsonl_path: self._append_jsonl(record)
+                if self.prom_path: self._write_prom()
+            except OSError as e:
+                print(f"Metrics write error: {e}")
+        return record
+
+    def _append_jsonl(self, record):
+        os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+        with open(self.jsonl_path, 'a', encoding='utf-8') as fh:
+            fh.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def _write_prom(self):
+        lines = [
+            '# HELP ytdl_jobs_total Job runs that ended, by final state.',
+            '# TYPE ytdl_jobs_total counter',
+            *(f'ytdl_jobs_total{{state="{s}"}} {n}' for s, n in sorted(self._jobs.items())),
+            '# HELP ytdl_phase_seconds Wall time spent per job phase.',
+            '# TYPE ytdl_phase_seconds summary',
+        ]
+        for name in PHASES:
+            total, count = self._phase[name]
+            lines += [f'ytdl_phase_seconds_sum{{phase="{name}"}} {total:.4f}',
+                      f'ytdl_phase_seconds_count{{phase="{name}"}} {count}']
+        lines += [
+            '# HELP ytdl_ttfb_seconds Time from starting a download to its first received byte.',
+            '# TYPE ytdl_ttfb_seconds summary',
+            f'ytdl_ttfb_seconds_sum {self._ttfb[0]:.4f}',
+            f'ytdl_ttfb_seconds_count {self._ttfb[1]}',
+            '# HELP ytdl_downloaded_bytes_total Bytes received by finished runs.',
+            '# TYPE ytdl_downloaded_bytes_total counter',
+            f'ytdl_downloaded_bytes_total {self._bytes}',
+            '# HELP ytdl_postprocess_cpu_seconds_total CPU time of FFmpeg children during post-processing.',
+            '# TYPE ytdl_postprocess_cpu_seconds_total counter',
+            f'ytdl_postprocess_cpu_seconds_total {self._pp_cpu:.3f}',
+            '# HELP ytdl_peak_throughput_bytes Highest per-job speed seen (bytes/s).',
+            '# TYPE ytdl_peak_throughput_bytes gauge',
+            f'ytdl_peak_throughput_bytes {self._peak:.0f}',
+        ]
+        os.makedirs(os.path.dirname(self.prom_path) or ".", exist_ok=True)
+        tmp = f"{self.prom_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as fh: fh.write('\n'.join(lines) + '\n')
+        os.replace(tmp, self.prom_path)
@@ -0,0 +1,63 @@
+import time
+import threading
+from collections import namedtuple
+import config
+
+ProgressSnapshot = namedtuple('ProgressSnapshot', 'downloaded total speed eta percent')
+
+class ProgressBus:
+    """
+    Sits between yt-dlp progress hooks (worker threads) and the UI.
+    publish() only overwrites the latest sample for a job, so it costs the
+    same no matter how fast ticks arrive. The UI calls drain() on its own
+    timer (config.PROGRESS_UI_HZ) and gets at most one snapshot per job,
+    with speed/ETA smoothed from byte deltas instead of raw per-tick values.
+    """
+    def __init__(self, smoothing=None):
+        self.smoothing = config.PROGRESS_SMOOTHING if smoothing is None else smoothing
+        self._latest = {}    # key -> (downloaded, total, raw_speed, monotonic time)
+        self._history = {}   # key -> (downloaded, time, smoothed_speed); UI thread only
+        self._lock = threading.Lock()
+
+    # --- Worker side ---
+    def publish(self, key, downloaded, total, speed=None, eta=None):
+        sample = (downloaded or 0, total or 0, speed or 0, time.monotonic())
+        with self._lock: self._latest[key] = sample
+
+    def sink(self, key):
+        """Returns a callable with the DownloadManager progress_callback signature."""
+        return lambda downloaded, total, speed, eta: self.publish(key, downloaded, total, speed, eta)
+
+    def discard(self, key):
+        """Drops a pending sample (e.g. a status message must not be overwritten by an older tick)."""
+        with self._lock: self._latest.pop(key, None)
+
+    def forget(self, key):
+        self.discard(key)
+        self._history.pop(key, None)
+
+    # --- UI side ---
+    def drain(self):
+        """Returns {key: ProgressSnapshot} for every job that reported since the last drain."""
+        with self._lock:
+            pending, self._latest = self._latest, {}
+
+        out = {}
+        for key, (downloaded, total, raw_speed, now) in pending.items():
+            speed = self._smooth(key, downloaded, raw_speed, now)
+            remaining = total - downloaded if total else 0
+            eta = remaining / speed if speed > 0 and remaining > 0 else None
+            percent = (downloaded / total) * 100 if total > 0 else 0
+            out[key] = ProgressSnapshot(downloaded, total, speed, eta, percent)
+        return out
+
+    def _smooth(self, key, downloaded, raw_speed, now):
+        prev = self._history.get(key)
+        if prev is None or downloaded < prev[0] or now <= prev[1]:
+            # First sample, or yt-dlp moved on to the next stream (video -> audio)
+            speed = raw_speed
+        else:
+            measured = (downloaded - prev[0]) / (now - prev[1])
+            speed = prev[2] + self.smoothing * (measured - prev[2]) if prev[2] else measured
+        self._history[key] = (downloaded, now, speed)
+        return speed
@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import urlparse
+import config
+
+# (concurrent_fragment_downloads, http_chunk_size) from cautious to aggressive.
+# The tuner climbs this ladder one rung at a time.
+LADDER = [
+    (1, 10 * 1024**2),
+    (2, 10 * 1024**2),
+    (4, 10 * 1024**2),
+    (8, 20 * 1024**2),
+    (16, 40 * 1024**2),
+]
+
+def host_key(url):
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+class ThroughputTuner:
+    """
+    Per-host hill climbing over LADDER.
+    Every finished stream reports the throughput it achieved with the rung it
+    used. If it beat the host's best by TUNING_MIN_GAIN we keep climbing in
+    the same direction; otherwise we fall back to the best rung and try the
+    other direction, and after TUNING_PATIENCE misses the host is settled.
+    State is saved to TUNING_PATH so the next job (or run) starts from the
+    best known rung. Every finished download also feeds observe(), a smoothed
+    per-host link speed that "Auto" quality sizes its choice against.
+    """
+    def __init__(self, path=None):
+        self.path = path or config.TUNING_PATH
+        self._hosts = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh: return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _state(self, host):
+        if self._hosts is None: self._hosts = self._load()
+        return self._hosts.setdefault(host, {'level': 1, 'best_level': 1, 'best_speed': 0.0,
+                                             'direction': 1, 'misses': 0, 'settled': False})
+
+    # --- Public API ---
+    def settings_for(self, host):
+        """Returns {'concurrent_fragment_downloads': n, 'http_chunk_size': bytes} to try next."""
+        with self._lock:
+            level = self._state(host)['level']
+        fragments, chunk = LADDER[level]
+        return {'concurrent_fragment_downloads': fragments, 'http_chunk_size': chunk}
+
+    def observe(self, host, speed):
+        """Folds a finished download's average speed (bytes/s) into the host's link speed."""
+        if not speed: return
+        with self._lock:
+            st = self._state(host)
+            prev = st.get('link_speed')
+            st['link_speed'] = speed if not prev else prev + config.LINK_SPEED_SMOOTHING * (speed - prev)
+            self._save()
+
+    def link_speed(self, host):
+        """Measured download speed for `host` (bytes/s), else the average over all hosts, else None."""
+        with self._lock:
+            if self._hosts is None: self._hosts = self._load()
+            speed = (self._hosts.get(host) or {}).get('link_speed')
+            if speed: return speed
+            known = [st['link_speed'] for st in self._hosts.values() if st.get('link_speed')]
+            return sum(known) / len(known) if known else None
+
+    def report(self, host, settings, speed):
+        """Feeds back a measured throughput (bytes/s) for the settings a stream used."""
+        level = self._level_of(settings)
+        if level is None or not speed: return
+        with self._lock:
+            st = self._state(host)
+            if speed > st['best_speed'] * (1 + config.TUNING_MIN_GAIN):
+                st['best_speed'], st['best_level'], st['misses'] = speed, level, 0
+            elif level == st['best_level']:
+                # Same rung again: track the link drifting instead of a stale peak
+                st['best_speed'] = (st['best_speed'] + speed) / 2
+            else:
+                st['misses'] += 1
+                st['direction'] = -st['direction']
+
+            if st['misses'] >= config.TUNING_PATIENCE:
+                st['settled'] = True
+            nxt = st['best_level'] if st['settled'] else st['best_level'] + st['direction']
+            if not 0 <= nxt < len(LADDER):
+                st['direction'] = -st['direction']
+                nxt = max(0, min(len(LADDER) - 1, st['best_level'] + st['direction']))
+            st['level'] = nxt
+            st['updated_at'] = time.time()
+            self._save()
+
+    # --- Internals ---
+    @staticmethod
+    def _level_of(settings):
+        pair = (settings.get('concurrent_fragment_downloads'), settings.get('http_chunk_size'))
+        return LADDER.index(pair) if pair in LADDER else None
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as fh: json.dump(self._hosts, fh, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Tuning state write error: {e}")
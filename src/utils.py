@@ -1,5 +1,6 @@
 import shutil
 import re
+from urllib.parse import urlparse, parse_qs, parse_qsl, urlencode
 
 def format_bytes(bytes_val):
     if bytes_val is None: return "0 B"
@@ -25,11 +26,105 @@ def parse_time_to_seconds(time_str):
     except: return None
     return None
 
-def get_quality_opts(selection, audio_format="MP3", compatibility_mode=False):
+RATE_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?(?:/s)?\s*$', re.IGNORECASE)
+
+def parse_rate(value):
+    """'5M', '500K', '1.5MB/s' or a number of bytes/s -> int bytes/s. Empty/invalid/0 -> 0 (unlimited)."""
+    if value is None or value == "": return 0
+    if isinstance(value, (int, float)): return max(0, int(value))
+    match = RATE_RE.match(str(value))
+    if not match: return 0
+    return int(float(match.group(1)) * 1024 ** " KMG".index(match.group(2).upper() or " "))
+
+YOUTUBE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+def canonical_video_id(url):
+    """
+    Maps a URL to a stable cache key without touching the network.
+    YouTube variants (watch?v=, youtu.be, shorts, embed, live) all become
+    "youtube:<id>". Anything else is keyed by the URL itself.
+    """
+    if not url: return None
+    url = url.strip()
+    if YOUTUBE_ID_RE.match(url): return f"youtube:{url}"
+    parsed = urlparse(url if "://" in url else "https://" + url)
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."): host = host[4:]
+    if host.startswith("m."): host = host[2:]
+
+    video_id = None
+    if host == "youtu.be":
+        video_id = parsed.path.strip("/").split("/")[0]
+    elif host in ("youtube.com", "music.youtube.com", "youtube-nocookie.com"):
+        parts = [p for p in parsed.path.split("/") if p]
+        if parts and parts[0] == "watch":
+            video_id = (parse_qs(parsed.query).get("v") or [None])[0]
+        elif len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v"):
+            video_id = parts[1]
+
+    if video_id and YOUTUBE_ID_RE.match(video_id): return f"youtube:{video_id}"
+    return f"url:{url}"
+
+# Query parameters that only say where a link was shared from (utm_* too)
+TRACKING_PARAMS = {'si', 'feature', 'pp', 'ab_channel', 'fbclid', 'gclid', 'igshid', 'ref', 'ref_src', 'share'}
+URL_RE = re.compile(r'(?:https?://|www\.|youtu\.be/|(?:m\.|music\.)?youtube\.com/)[^\s<>"\'`]+', re.I)
+
+def canonical_url(url):
+    """
+    One spelling per video: YouTube links (youtu.be, shorts, embed, m., &t=, &si=...)
+    become https://www.youtube.com/watch?v=<id>; other URLs lose tracking
+    parameters and their #fragment.
+    """
+    key = canonical_video_id(url)
+    if key and key.startswith("youtube:"): return f"https://www.youtube.com/watch?v={key.split(':', 1)[1]}"
+    url = url.strip()
+    parsed = urlparse(url if "://" in url else "https://" + url)
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_")]
+    return parsed._replace(netloc=parsed.netloc.lower(), query=urlencode(query), fragment="").geturl()
+
+def parse_url_list(text, canonicalize=True):
+    """
+    Every URL in pasted text or a list file, in order: one per line or mixed into
+    prose / markdown (# starts a comment line). A line without a recognisable link
+    counts as one URL if it has no spaces (yt-dlp accepts many forms).
+    Returns (urls, duplicates); variants of the same video count once and come
+    back canonical unless `canonicalize` is False (e.g. to keep a &list= for playlists).
+    """
+    urls, seen, duplicates = [], set(), 0
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"): continue
+        found = [m.group().rstrip(".,;:!?)]}>") for m in URL_RE.finditer(line)]
+        if not found and not any(c.isspace() for c in line): found = [line]
+        for url in found:
+            canonical = canonical_url(url)
+            key = canonical_video_id(canonical)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            urls.append(canonical if canonicalize else url)
+    return urls, duplicates
+
+AUDIO_CODECS = {"MP3": "mp3", "M4A": "m4a", "WAV": "wav", "FLAC": "flac"}
+
+def parse_audio_outputs(spec, default_bitrate="192"):
+    """'FLAC, MP3:320, MP3:128' -> [('FLAC', '192'), ('MP3', '320'), ('MP3', '128')]. Unknown formats are dropped."""
+    outputs = []
+    for part in (spec or "").split(","):
+        fmt, _, bitrate = part.strip().partition(":")
+        entry = (fmt.strip().upper(), bitrate.strip() or default_bitrate)
+        if entry[0] in AUDIO_CODECS and entry not in outputs: outputs.append(entry)
+    return outputs
+
+def get_quality_opts(selection, audio_format="MP3", compatibility_mode=False, audio_outputs=None):
     # 1. Audio Only
     if "Audio Only" in selection:
-        codec_map = {"MP3": "mp3", "M4A": "m4a", "WAV": "wav", "FLAC": "flac"}
-        codec = codec_map.get(audio_format, "mp3")
+        if audio_outputs and len(audio_outputs) > 1:
+            # Several outputs: DownloadManager adds MultiAudioExportPP (one decode, all encoders)
+            return {'format': 'bestaudio/best', 'keepvideo': False}
+        codec = AUDIO_CODECS.get(audio_format, "mp3")
         return {
             'format': 'bestaudio/best',
             'keepvideo': False,
@@ -64,6 +159,41 @@ def get_quality_opts(selection, audio_format="MP3", compatibility_mode=False):
     # 5. Fallback Default
     return {'format': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best'}
 
+def is_high_res(selection):
+    return any(x in selection for x in ["4K", "2K", "2160p", "1440p"])
+
+def build_advanced_opts(quality, audio_format="MP3", compatibility_mode=False, audio_bitrate="192",
+                        embed_subs=False, embed_meta=True, custom_args=None,
+                        time_start="", time_end="", total_duration=0, use_archive=True,
+                        bandwidth_weight=1.0, bandwidth_priority=0, audio_outputs=None, time_budget=None):
+    """
+    Builds the advanced_opts dict DownloadManager expects (shared by the GUI and CLI).
+    `audio_outputs` ([(format, bitrate)]) asks for several audio files from one download
+    (Audio Only); it defaults to the single audio_format/audio_bitrate pair.
+    `time_budget` (seconds) is what the "Auto" quality has to fit the download into.
+    """
+    if "Audio Only" in quality: final_container = "mp3"
+    elif is_high_res(quality): final_container = "mkv"
+    else: final_container = "mp4"
+
+    return {
+        'container': final_container,
+        'audio_format': audio_format,
+        'compatibility_mode': compatibility_mode,
+        'audio_bitrate': audio_bitrate,
+        'embed_subs': embed_subs,
+        'embed_meta': embed_meta,
+        'custom_args': list(custom_args or []),
+        'time_start': time_start,
+        'time_end': time_end,
+        'total_duration': total_duration,
+        'use_archive': use_archive,
+        'bandwidth_weight': bandwidth_weight,
+        'bandwidth_priority': bandwidth_priority,
+        'audio_outputs': [list(o) for o in (audio_outputs or [(audio_format, audio_bitrate)])],
+        'time_budget': time_budget,
+    }
+
 def is_ffmpeg_installed():
     """Checks if FFmpeg is available in the system path."""
     return shutil.which("ffmpeg") is not None
\ No newline at end of file
@@ -0,0 +1,134 @@
+import threading
+from contextlib import contextmanager
+import config
+
+# Options that are baked into the networking stack or the output console when a
+# YoutubeDL is constructed. Overlays that touch these get a private instance.
+CONSTRUCTION_ONLY_KEYS = {
+    'cookiefile', 'cookiesfrombrowser', 'proxy', 'geo_verification_proxy',
+    'http_headers', 'source_address', 'nocheckcertificate', 'socket_timeout',
+    'legacyserverconnect', 'impersonate', 'client_certificate', 'client_certificate_key',
+    'client_certificate_password', 'compat_opts', 'color', 'logger', 'download_archive',
+}
+
+class YDLPool:
+    """
+    Keeps a handful of warm YoutubeDL instances (extractors already loaded)
+    that all share one cookie jar and one request director (connection pool).
+    Each lease applies a per-job overlay (outtmpl, hooks, format, postprocessors...)
+    on top of the base params and strips it again on release.
+    """
+    def __init__(self, size=None, base_params=None):
+        self.size = size or config.YDL_POOL_SIZE
+        self.base_params = dict(base_params or {})
+        self._idle = []
+        self._created = 0
+        self._cond = threading.Condition()
+        self._anchor = None  # first instance; owns the shared cookie jar + director
+
+    # --- Public API ---
+    @contextmanager
+    def lease(self, overlay=None):
+        overlay = overlay or {}
+        if CONSTRUCTION_ONLY_KEYS & overlay.keys():
+            # Can't be overlaid safely, fall back to a throwaway instance
+            import yt_dlp
+            with yt_dlp.YoutubeDL(params={**self.base_params, **overlay}) as ydl: # type: ignore
+                yield ydl
+            return
+
+        entry = self._acquire()
+        ydl, base = entry
+        try:
+            self._apply(ydl, base, overlay)
+            yield ydl
+        finally:
+            self._apply(ydl, base, {})
+            self._release(entry)
+
+    def warm(self, count=1):
+        """Pre-builds instances (importing yt_dlp + extractors) so the first job doesn't pay for it."""
+        entries = []
+        for _ in range(min(count, self.size)):
+            with self._cond:
+                if self._created >= self.size: break
+            entries.append(self._acquire())
+        for entry in entries: self._release(entry)
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        # Only the anchor owns the director; the others just borrowed it
+        for ydl, _ in idle:
+            if ydl is not self._anchor:
+                ydl.__dict__.pop('_request_director', None)
+        for ydl, _ in idle:
+            try: ydl.close()
+            except Exception: pass
+        if any(ydl is self._anchor for ydl, _ in idle): self._anchor = None
+
+    # --- Internals ---
+    def _acquire(self):
+        with self._cond:
+            while not self._idle and self._created >= self.size:
+                self._cond.wait()
+            if self._idle: return self._idle.pop()
+            self._created += 1
+        try:
+            return self._build()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, entry):
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def _build(self):
+        import yt_dlp  # deferred: importing yt_dlp costs ~250 ms
+        ydl = yt_dlp.YoutubeDL(params=dict(self.base_params)) # type: ignore
+        with self._cond:
+            anchor = self._anchor
+            if anchor is None: self._anchor = ydl
+        if anchor is not None:
+            # cached_property slots: reuse the anchor's jar + connection pool
+            ydl.__dict__['cookiejar'] = anchor.cookiejar
+            ydl.__dict__['_request_director'] = anchor._request_director
+        base = dict(ydl.params)
+        return (ydl, base)
+
+    def _apply(self, ydl, base, overlay):
+        from yt_dlp.postprocessor import get_postprocessor
+        params = dict(base)
+        params.update(overlay)
+        if isinstance(params.get('outtmpl'), dict): params['outtmpl'] = dict(params['outtmpl'])
+        ydl.params = params
+        ydl._parse_outtmpl()
+
+        fmt = params.get('format')
+        ydl.format_selector = (
+            fmt if fmt in (None, '-') or callable(fmt) else ydl.build_format_selector(fmt))
+
+        # Per-job state that YoutubeDL accumulates between downloads
+        ydl._progress_hooks = []
+        ydl._postprocessor_hooks = []
+        ydl._post_hooks = []
+        ydl._pps = {k: [] for k in ydl._pps}
+        ydl._download_retcode = 0
+        ydl._num_downloads = 0
+        ydl._num_videos = 0
+        ydl._playlist_level = 0
+        ydl._playlist_urls = set()
+        ydl.__dict__.pop('post_process', None)  # per-lease override (deferred post-processing)
+
+        for ph in params.get('progress_hooks', []): ydl.add_progress_hook(ph)
+        for ph in params.get('postprocessor_hooks', []): ydl.add_postprocessor_hook(ph)
+        for ph in params.get('post_hooks', []): ydl.add_post_hook(ph)
+        for pp_def_raw in params.get('postprocessors', []):
+            pp_def = dict(pp_def_raw)
+            when = pp_def.pop('when', 'post_process')
+            ydl.add_post_processor(get_postprocessor(pp_def.pop('key'))(ydl, **pp_def), when=when)
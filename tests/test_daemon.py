@@ -0,0 +1,163 @@
+# test_daemon.py
+# SSE stream and job control of the daemon (python -m pytest tests, or python -m unittest discover tests).
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import config
+from archive import DownloadArchive
+from cache import MetadataCache
+from daemon import DaemonServer, JobService
+from fake_media import FakeMediaServer
+from journal import JobJournal
+from logic import DownloadManager
+from stub_extractor import BenchPool
+from tuning import ThroughputTuner
+
+class EventStreamTest(unittest.TestCase):
+    def setUp(self):
+        # The stream only needs the event log and the (empty) job list, not a DownloadManager
+        self.service = JobService(manager=None, output_dir=tempfile.mkdtemp(prefix='ytdl-test-'))
+        self.server = DaemonServer(self.service, "127.0.0.1", 0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.heartbeat, config.DAEMON_HEARTBEAT_SECONDS = config.DAEMON_HEARTBEAT_SECONDS, 0.2
+
+    def tearDown(self):
+        config.DAEMON_HEARTBEAT_SECONDS = self.heartbeat
+        self.server.stopping.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self.service._stop.set()
+
+    def _open_stream(self, last_event_id):
+        sock = socket.create_connection(self.server.server_address, timeout=5)
+        sock.sendall(f"GET /api/events HTTP/1.1\r\nHost: test\r\nLast-Event-ID: {last_event_id}\r\n\r\n".encode())
+        stream = sock.makefile('rb')
+        while stream.readline().strip(): pass  # response headers
+        self.addCleanup(sock.close)
+        self.addCleanup(stream.close)
+        return stream
+
+    @staticmethod
+    def _next_event(stream, keep_alives=10):
+        """The next event's fields, or {} if only keep-alives came for a while."""
+        fields = {}
+        for line in stream:
+            line = line.decode().rstrip("\n")
+            if not line:
+                if fields: return fields
+                continue
+            if line.startswith(":"):
+                keep_alives -= 1
+                if keep_alives < 0: return {}
+                continue
+            key, _, value = line.partition(": ")
+            fields[key] = value
+
+    def test_last_event_id_from_before_a_restart_gets_a_snapshot(self):
+        self.service.events.publish('job', {'id': 'a'})
+        self.service.events.publish('job', {'id': 'b'})
+        stream = self._open_stream(1000)
+
+        first = self._next_event(stream)
+        self.assertEqual((first.get('event'), first.get('id')), ('snapshot', '2'))
+
+        self.service.events.publish('state', {'id': 'c'})
+        event = self._next_event(stream)
+        self.assertEqual((event.get('event'), event.get('id')), ('state', '3'))
+
+    def test_known_last_event_id_resumes_without_snapshot(self):
+        for name in ('a', 'b', 'c'): self.service.events.publish('job', {'id': name})
+        stream = self._open_stream(1)
+
+        event = self._next_event(stream)
+        self.assertEqual((event.get('event'), event.get('id')), ('job', '2'))
+
+class SubmitValidationTest(unittest.TestCase):
+    def test_wrong_field_types_are_rejected_before_anything_is_queued(self):
+        service = JobService(manager=None, output_dir=tempfile.mkdtemp(prefix='ytdl-test-'))
+        self.addCleanup(service._stop.set)
+        url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        for body in ({'url': url, 'quality': 720}, {'url': url, 'folder': ['a']}, {'url': url, 'playlist': "yes"},
+                     {'url': 5}, {'text': {'a': url}}, {'url': url, 'name': 1}):
+            with self.subTest(body=body), self.assertRaises(ValueError):
+                service.submit(body)
+
+class PlaylistControlTest(unittest.TestCase):
+    """A real DownloadManager against the benchmark's fake media server, all state in a temp folder."""
+    def setUp(self):
+        tmp = tempfile.mkdtemp(prefix='ytdl-test-')
+        self.media = FakeMediaServer().start()
+        self.addCleanup(self.media.stop)
+        self.manager = DownloadManager(
+            max_workers=2, ydl_pool=BenchPool(), journal=JobJournal(db_path=os.path.join(tmp, 'jobs.sqlite3')),
+            metadata_cache=MetadataCache(cache_dir=os.path.join(tmp, 'metadata')),
+            archive=DownloadArchive(os.path.join(tmp, 'archive.txt')),
+            tuner=ThroughputTuner(os.path.join(tmp, 'tuning.json')))
+        # The stub extractor has no playlists: hand the run its entries directly
+        self.entries = [{'url': self.media.watch_url('progressive', f'v{i}', 8 << 20, rate=256 << 10),
+                         'id': f'v{i}', 'title': f'v{i}', 'ie_key': None} for i in range(2)]
+        self.manager.iter_playlist = lambda url: iter(self.entries)
+        self.service = JobService(self.manager, os.path.join(tmp, 'out'))
+        self.server = DaemonServer(self.service, "127.0.0.1", 0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        # One slot: the second entry is only queued once the first one gives its slot back
+        self.pending, config.PLAYLIST_MAX_PENDING = config.PLAYLIST_MAX_PENDING, 1
+
+    def tearDown(self):
+        config.PLAYLIST_MAX_PENDING = self.pending
+        for job in self.manager.active_jobs(): job.cancel()
+        self.manager.wait()
+        self.server.shutdown()
+        self.server.server_close()
+        self.service._stop.set()
+        self.manager.journal.close()
+
+    def _call(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(f"http://127.0.0.1:{self.server.server_address[1]}{path}", data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=5) as resp: return json.load(resp)
+
+    def _wait_for(self, predicate, timeout=15):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            result = predicate()
+            if result: return result
+            time.sleep(0.05)
+        self.fail("timed out")
+
+    def _child(self, playlist_id, url, state):
+        def find():
+            for rec in self._call('GET', '/api/jobs'):
+                if rec['parent'] == playlist_id and rec['url'] == url and rec['state'] == state: return rec
+        return self._wait_for(find)
+
+    def test_cancelling_a_paused_entry_frees_its_slot(self):
+        playlist, = self._call('POST', '/api/jobs', {'url': self.media.base_url + '/playlist', 'playlist': True,
+                                                     'quality': "720p Limit", 'options': {'use_archive': False}})
+        first = self._child(playlist['id'], self.entries[0]['url'], 'running')
+        self._call('POST', f"/api/jobs/{first['id']}/pause")
+        self._child(playlist['id'], self.entries[0]['url'], 'paused')
+
+        self.assertEqual(self._call('POST', f"/api/jobs/{first['id']}/cancel")['state'], 'cancelled')
+        self.assertFalse(any(job.uid == first['id'] for job in self.manager.jobs.values()))
+        second = self._child(playlist['id'], self.entries[1]['url'], 'running')
+
+        self._call('POST', f"/api/jobs/{second['id']}/cancel")
+        self._wait_for(lambda: self._call('GET', f"/api/jobs/{playlist['id']}")['state'] != 'running')
+        done = self._call('GET', f"/api/jobs/{playlist['id']}")
+        self.assertEqual((done['discovered'], done['completed'], done['failed']), (2, 2, 2))
+
+if __name__ == "__main__":
+    unittest.main()
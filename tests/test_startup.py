@@ -0,0 +1,22 @@
+# test_startup.py
+# The GUI must reach its first paint without yt-dlp, Pillow or requests (python -m pytest tests).
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+class LazyImportTest(unittest.TestCase):
+    def test_gui_modules_do_not_import_heavy_modules(self):
+        # A fresh interpreter: this test process may already have them loaded
+        probe = ("import json, sys\n"
+                 "import gui.main_window, main\n"
+                 "print(json.dumps([m for m in main.HEAVY_MODULES if m in sys.modules]))\n")
+        out = subprocess.run([sys.executable, "-c", probe], cwd=SRC, capture_output=True, text=True, timeout=60)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        self.assertEqual(json.loads(out.stdout.strip().splitlines()[-1]), [])
+
+if __name__ == "__main__":
+    unittest.main()